@@ -24,6 +24,15 @@ from app.models.base import Base  # noqa: E402
 from app.models.user import User   # noqa: E402, F401
 from app.models.telegram_verification import TelegramVerification  # noqa: E402, F401
 from app.models.session import Session  # noqa: E402, F401
+from app.models.identity_fingerprint import IdentityFingerprint  # noqa: E402, F401
+from app.models.job import Job  # noqa: E402, F401
+from app.models.broadcast import Broadcast  # noqa: E402, F401
+from app.models.campaign import Campaign, CampaignCounterShard  # noqa: E402, F401
+from app.models.donation import CampaignDonor, Donation  # noqa: E402, F401
+from app.models.donation_ledger import DonationLedgerEntry  # noqa: E402, F401
+from app.models.trending import TrendingCampaign  # noqa: E402, F401
+from app.models.withdrawal import PayoutRun, Withdrawal  # noqa: E402, F401
+from app.models.progress_card import ProgressCardFile  # noqa: E402, F401
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,78 @@
+"""add donation ledger
+
+Revision ID: 0d9c4e7a6b31
+Revises: f81a2c6d3e57
+Create Date: 2026-10-19 17:02:11.840377
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d9c4e7a6b31'
+down_revision: Union[str, None] = 'f81a2c6d3e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created up front; `make partitions` keeps creating them ahead.
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    op.create_table('donation_ledger',
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('kind', sa.Enum('donation', 'refund', 'withdrawal', name='ledgerentrykindenum'), nullable=False),
+    sa.Column('campaign_id', sa.Uuid(), nullable=False),
+    sa.Column('donation_id', sa.Uuid(), nullable=True),
+    sa.Column('donor_telegram_id', sa.String(length=255), nullable=True),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('telegram_payment_charge_id', sa.String(length=255), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    op.create_index(op.f('ix_donation_ledger_id'), 'donation_ledger', ['id'], unique=False)
+    op.create_index('ix_donation_ledger_campaign_created_at', 'donation_ledger', ['campaign_id', 'created_at'], unique=False)
+    op.create_index('ix_donation_ledger_donor_created_at', 'donation_ledger', ['donor_telegram_id', 'created_at'], unique=False)
+
+    op.execute(
+        """
+        CREATE FUNCTION donation_ledger_append_only() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'donation_ledger is append-only';
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER donation_ledger_append_only
+        BEFORE UPDATE OR DELETE ON donation_ledger
+        FOR EACH ROW EXECUTE FUNCTION donation_ledger_append_only()
+        """
+    )
+    op.execute('CREATE SCHEMA IF NOT EXISTS ledger_archive')
+
+    month = datetime.date.today().replace(day=1)
+    for _ in range(MONTHS_AHEAD + 1):
+        following = (month + datetime.timedelta(days=32)).replace(day=1)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS donation_ledger_y{month:%Y}m{month:%m} "
+            f"PARTITION OF donation_ledger "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+
+
+def downgrade() -> None:
+    op.drop_table('donation_ledger')
+    op.execute('DROP FUNCTION IF EXISTS donation_ledger_append_only()')
+    sa.Enum(name='ledgerentrykindenum').drop(op.get_bind(), checkfirst=True)
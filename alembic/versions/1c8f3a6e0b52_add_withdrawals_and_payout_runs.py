@@ -0,0 +1,75 @@
+"""add withdrawals and payout runs
+
+Revision ID: 1c8f3a6e0b52
+Revises: d4a7c2e9f015
+Create Date: 2026-10-19 19:22:48.306145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c8f3a6e0b52'
+down_revision: Union[str, None] = 'd4a7c2e9f015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('campaigns', sa.Column('withdrawn_amount', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('campaigns', sa.Column('reserved_amount', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_table('payout_runs',
+    sa.Column('status', sa.Enum('running', 'done', name='payoutrunstatusenum'), nullable=False),
+    sa.Column('withdrawal_count', sa.Integer(), nullable=False),
+    sa.Column('campaign_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.BigInteger(), nullable=False),
+    sa.Column('duration_seconds', sa.Float(), nullable=False),
+    sa.Column('latency_avg', sa.Float(), nullable=False),
+    sa.Column('latency_max', sa.Float(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_payout_runs_id'), 'payout_runs', ['id'], unique=False)
+    op.create_table('withdrawals',
+    sa.Column('campaign_id', sa.Uuid(), nullable=False),
+    sa.Column('owner_telegram_id', sa.String(length=255), nullable=False),
+    sa.Column('idempotency_key', sa.String(length=255), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'settled', name='withdrawalstatusenum'), nullable=False),
+    sa.Column('payout_run_id', sa.Uuid(), nullable=True),
+    sa.Column('settled_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+    sa.ForeignKeyConstraint(['payout_run_id'], ['payout_runs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('owner_telegram_id', 'idempotency_key', name='uq_withdrawals_idempotency_key')
+    )
+    op.create_index(op.f('ix_withdrawals_campaign_id'), 'withdrawals', ['campaign_id'], unique=False)
+    op.create_index(op.f('ix_withdrawals_id'), 'withdrawals', ['id'], unique=False)
+    op.create_index('ix_withdrawals_pending', 'withdrawals', ['created_at', 'id'], unique=False, postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_withdrawals_pending', table_name='withdrawals', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_index(op.f('ix_withdrawals_id'), table_name='withdrawals')
+    op.drop_index(op.f('ix_withdrawals_campaign_id'), table_name='withdrawals')
+    op.drop_table('withdrawals')
+    op.drop_index(op.f('ix_payout_runs_id'), table_name='payout_runs')
+    op.drop_table('payout_runs')
+    sa.Enum(name='withdrawalstatusenum').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='payoutrunstatusenum').drop(op.get_bind(), checkfirst=True)
+    op.drop_column('campaigns', 'reserved_amount')
+    op.drop_column('campaigns', 'withdrawn_amount')
@@ -0,0 +1,46 @@
+"""add identity fingerprints
+
+Revision ID: 2b8d6f4e1a90
+Revises: 9e4b27d1c5f3
+Create Date: 2026-10-19 11:20:05.731462
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '2b8d6f4e1a90'
+down_revision: Union[str, None] = '9e4b27d1c5f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('identity_fingerprints',
+    sa.Column('telegram_id', sa.String(length=255), nullable=False),
+    sa.Column('kind', sa.String(length=32), nullable=False),
+    sa.Column('value', sa.String(length=64), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_identity_fingerprints_id'), 'identity_fingerprints', ['id'], unique=False)
+    op.create_index(op.f('ix_identity_fingerprints_telegram_id'), 'identity_fingerprints', ['telegram_id'], unique=False)
+    op.create_index('ix_identity_fingerprints_kind_value', 'identity_fingerprints', ['kind', 'value'], unique=False)
+    op.create_index('ix_identity_fingerprints_created_at', 'identity_fingerprints', ['created_at'], unique=False)
+    op.add_column('telegram_verifications', sa.Column('duplicate_matches', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('telegram_verifications', 'duplicate_matches')
+    op.drop_index('ix_identity_fingerprints_created_at', table_name='identity_fingerprints')
+    op.drop_index('ix_identity_fingerprints_kind_value', table_name='identity_fingerprints')
+    op.drop_index(op.f('ix_identity_fingerprints_telegram_id'), table_name='identity_fingerprints')
+    op.drop_index(op.f('ix_identity_fingerprints_id'), table_name='identity_fingerprints')
+    op.drop_table('identity_fingerprints')
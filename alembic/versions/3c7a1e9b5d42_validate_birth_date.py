@@ -0,0 +1,55 @@
+"""validate birth date
+
+Revision ID: 3c7a1e9b5d42
+Revises: 9d3b6f1e4a27
+Create Date: 2026-10-19 23:41:08.562914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7a1e9b5d42'
+down_revision: Union[str, None] = '9d3b6f1e4a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BIRTH_DATE = "personal_details->>'birth_date'"
+_BIRTH_DAY = f"substring({_BIRTH_DATE} from 1 for 2)::int"
+_BIRTH_MONTH = f"substring({_BIRTH_DATE} from 4 for 2)::int"
+_BIRTH_YEAR = f"substring({_BIRTH_DATE} from 7 for 4)::int"
+BIRTH_DATE_SQL = (
+    f"CASE WHEN {_BIRTH_DATE} ~ '^[0-9]{{2}}\\.[0-9]{{2}}\\.[0-9]{{4}}$' THEN "
+    f"CASE WHEN {_BIRTH_YEAR} >= 1 AND {_BIRTH_MONTH} BETWEEN 1 AND 12 AND {_BIRTH_DAY} BETWEEN 1 AND "
+    f"CASE WHEN {_BIRTH_MONTH} = 2 THEN "
+    f"CASE WHEN ({_BIRTH_YEAR} % 4 = 0 AND {_BIRTH_YEAR} % 100 <> 0) OR {_BIRTH_YEAR} % 400 = 0 "
+    f"THEN 29 ELSE 28 END "
+    f"WHEN {_BIRTH_MONTH} IN (4, 6, 9, 11) THEN 30 ELSE 31 END "
+    f"THEN make_date({_BIRTH_YEAR}, {_BIRTH_MONTH}, {_BIRTH_DAY}) END END"
+)
+OLD_BIRTH_DATE_SQL = (
+    "CASE WHEN personal_details->>'birth_date' ~ '^[0-9]{2}\\.[0-9]{2}\\.[0-9]{4}$' "
+    "THEN make_date("
+    "substring(personal_details->>'birth_date' from 7 for 4)::int, "
+    "substring(personal_details->>'birth_date' from 4 for 2)::int, "
+    "substring(personal_details->>'birth_date' from 1 for 2)::int"
+    ") END"
+)
+
+
+def _replace_birth_date(expression: str) -> None:
+    # a generated column's expression can't be altered; dropping the column drops its index
+    op.drop_column('telegram_verifications', 'birth_date')
+    op.add_column('telegram_verifications', sa.Column('birth_date', sa.Date(), sa.Computed(expression, persisted=True), nullable=True))
+    op.create_index('ix_telegram_verifications_birth_date', 'telegram_verifications', ['birth_date'], unique=False)
+
+
+def upgrade() -> None:
+    _replace_birth_date(BIRTH_DATE_SQL)
+
+
+def downgrade() -> None:
+    _replace_birth_date(OLD_BIRTH_DATE_SQL)
@@ -0,0 +1,26 @@
+"""add campaign owner keyset index
+
+Revision ID: 3f6a0b9d2c74
+Revises: 0d9c4e7a6b31
+Create Date: 2026-10-19 17:40:52.117063
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a0b9d2c74'
+down_revision: Union[str, None] = '0d9c4e7a6b31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_campaigns_owner_created_at', 'campaigns', ['owner_telegram_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_campaigns_owner_created_at', table_name='campaigns')
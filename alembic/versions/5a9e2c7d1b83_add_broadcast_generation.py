@@ -0,0 +1,26 @@
+"""add broadcast generation
+
+Revision ID: 5a9e2c7d1b83
+Revises: 7e0d4b8a3f61
+Create Date: 2026-10-19 21:02:17.640215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9e2c7d1b83'
+down_revision: Union[str, None] = '7e0d4b8a3f61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('broadcasts', sa.Column('generation', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('broadcasts', 'generation')
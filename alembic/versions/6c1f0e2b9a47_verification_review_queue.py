@@ -0,0 +1,38 @@
+"""verification review queue
+
+Revision ID: 6c1f0e2b9a47
+Revises: a3e28800935b
+Create Date: 2026-10-19 09:12:31.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c1f0e2b9a47'
+down_revision: Union[str, None] = 'a3e28800935b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('telegram_verifications', sa.Column('reviewed_by', sa.String(length=255), nullable=True))
+    op.add_column('telegram_verifications', sa.Column('claimed_by', sa.String(length=255), nullable=True))
+    op.add_column('telegram_verifications', sa.Column('claimed_until', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_telegram_verifications_pending',
+        'telegram_verifications',
+        ['created_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_telegram_verifications_pending', table_name='telegram_verifications')
+    op.drop_column('telegram_verifications', 'claimed_until')
+    op.drop_column('telegram_verifications', 'claimed_by')
+    op.drop_column('telegram_verifications', 'reviewed_by')
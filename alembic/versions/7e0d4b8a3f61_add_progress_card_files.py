@@ -0,0 +1,38 @@
+"""add progress card files
+
+Revision ID: 7e0d4b8a3f61
+Revises: 1c8f3a6e0b52
+Create Date: 2026-10-19 20:10:33.478920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e0d4b8a3f61'
+down_revision: Union[str, None] = '1c8f3a6e0b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('progress_card_files',
+    sa.Column('card_key', sa.String(length=255), nullable=False),
+    sa.Column('file_id', sa.String(length=255), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('card_key')
+    )
+    op.create_index(op.f('ix_progress_card_files_id'), 'progress_card_files', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_progress_card_files_id'), table_name='progress_card_files')
+    op.drop_table('progress_card_files')
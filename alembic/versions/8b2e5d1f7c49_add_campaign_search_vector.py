@@ -0,0 +1,34 @@
+"""add campaign search vector
+
+Revision ID: 8b2e5d1f7c49
+Revises: 3f6a0b9d2c74
+Create Date: 2026-10-19 18:05:37.902214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e5d1f7c49'
+down_revision: Union[str, None] = '3f6a0b9d2c74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.add_column('campaigns', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True))
+    op.create_index('ix_campaigns_search_vector', 'campaigns', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_campaigns_search_vector', table_name='campaigns', postgresql_using='gin')
+    op.drop_column('campaigns', 'search_vector')
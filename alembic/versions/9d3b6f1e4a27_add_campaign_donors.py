@@ -0,0 +1,49 @@
+"""add campaign donors
+
+Revision ID: 9d3b6f1e4a27
+Revises: 5a9e2c7d1b83
+Create Date: 2026-10-19 21:24:51.102384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3b6f1e4a27'
+down_revision: Union[str, None] = '5a9e2c7d1b83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('campaign_donors',
+    sa.Column('campaign_id', sa.Uuid(), nullable=False),
+    sa.Column('donor_telegram_id', sa.String(length=255), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('campaign_id', 'donor_telegram_id', name='uq_campaign_donor')
+    )
+    op.create_index(op.f('ix_campaign_donors_id'), 'campaign_donors', ['id'], unique=False)
+    # every donor seen so far
+    op.execute(
+        """
+        INSERT INTO campaign_donors (id, campaign_id, donor_telegram_id, is_deleted)
+        SELECT gen_random_uuid(), campaign_id, donor_telegram_id, false
+        FROM donations
+        WHERE donor_telegram_id IS NOT NULL
+        GROUP BY campaign_id, donor_telegram_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_campaign_donors_id'), table_name='campaign_donors')
+    op.drop_table('campaign_donors')
@@ -0,0 +1,114 @@
+"""verification search fields
+
+Revision ID: 9e4b27d1c5f3
+Revises: 6c1f0e2b9a47
+Create Date: 2026-10-19 10:02:47.118520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b27d1c5f3'
+down_revision: Union[str, None] = '6c1f0e2b9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_COLUMNS = (
+    'passport_data',
+    'personal_details',
+    'driver_license',
+    'identity_card',
+    'utility_bill',
+    'bank_statement',
+    'address',
+    'address_documents',
+)
+
+DOCUMENT_NUMBER_SQL = (
+    "upper(regexp_replace(coalesce("
+    "passport_data->>'document_no', "
+    "identity_card->>'document_no', "
+    "driver_license->>'document_no'"
+    "), '[^[:alnum:]]', '', 'g'))"
+)
+COUNTRY_CODE_SQL = "upper(personal_details->>'country_code')"
+FIRST_NAME_SQL = "lower(personal_details->>'first_name')"
+LAST_NAME_SQL = "lower(personal_details->>'last_name')"
+FULL_NAME_SQL = (
+    "lower(coalesce(personal_details->>'first_name', '') || ' ' || "
+    "coalesce(personal_details->>'middle_name', '') || ' ' || "
+    "coalesce(personal_details->>'last_name', ''))"
+)
+BIRTH_DATE_SQL = (
+    "CASE WHEN personal_details->>'birth_date' ~ '^[0-9]{2}\\.[0-9]{2}\\.[0-9]{4}$' "
+    "THEN make_date("
+    "substring(personal_details->>'birth_date' from 7 for 4)::int, "
+    "substring(personal_details->>'birth_date' from 4 for 2)::int, "
+    "substring(personal_details->>'birth_date' from 1 for 2)::int"
+    ") END"
+)
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'telegram_verifications',
+            column,
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            existing_type=postgresql.JSON(astext_type=sa.Text()),
+            postgresql_using=f'{column}::jsonb',
+        )
+
+    op.add_column('telegram_verifications', sa.Column('document_number', sa.String(length=255), sa.Computed(DOCUMENT_NUMBER_SQL, persisted=True), nullable=True))
+    op.add_column('telegram_verifications', sa.Column('country_code', sa.String(length=8), sa.Computed(COUNTRY_CODE_SQL, persisted=True), nullable=True))
+    op.add_column('telegram_verifications', sa.Column('first_name', sa.String(length=255), sa.Computed(FIRST_NAME_SQL, persisted=True), nullable=True))
+    op.add_column('telegram_verifications', sa.Column('last_name', sa.String(length=255), sa.Computed(LAST_NAME_SQL, persisted=True), nullable=True))
+    op.add_column('telegram_verifications', sa.Column('full_name', sa.Text(), sa.Computed(FULL_NAME_SQL, persisted=True), nullable=True))
+    op.add_column('telegram_verifications', sa.Column('birth_date', sa.Date(), sa.Computed(BIRTH_DATE_SQL, persisted=True), nullable=True))
+
+    op.create_index('ix_telegram_verifications_document_number', 'telegram_verifications', ['document_number'], unique=False)
+    op.create_index('ix_telegram_verifications_country_name', 'telegram_verifications', ['country_code', 'last_name', 'first_name'], unique=False)
+    op.create_index('ix_telegram_verifications_birth_date', 'telegram_verifications', ['birth_date'], unique=False)
+    op.create_index(
+        'ix_telegram_verifications_full_name_trgm',
+        'telegram_verifications',
+        ['full_name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'full_name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_telegram_verifications_personal_details',
+        'telegram_verifications',
+        ['personal_details'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'personal_details': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_telegram_verifications_personal_details', table_name='telegram_verifications')
+    op.drop_index('ix_telegram_verifications_full_name_trgm', table_name='telegram_verifications')
+    op.drop_index('ix_telegram_verifications_birth_date', table_name='telegram_verifications')
+    op.drop_index('ix_telegram_verifications_country_name', table_name='telegram_verifications')
+    op.drop_index('ix_telegram_verifications_document_number', table_name='telegram_verifications')
+    op.drop_column('telegram_verifications', 'birth_date')
+    op.drop_column('telegram_verifications', 'full_name')
+    op.drop_column('telegram_verifications', 'last_name')
+    op.drop_column('telegram_verifications', 'first_name')
+    op.drop_column('telegram_verifications', 'country_code')
+    op.drop_column('telegram_verifications', 'document_number')
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'telegram_verifications',
+            column,
+            type_=postgresql.JSON(astext_type=sa.Text()),
+            existing_type=postgresql.JSONB(astext_type=sa.Text()),
+            postgresql_using=f'{column}::json',
+        )
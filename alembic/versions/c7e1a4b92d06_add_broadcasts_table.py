@@ -0,0 +1,45 @@
+"""add broadcasts table
+
+Revision ID: c7e1a4b92d06
+Revises: 5a3c9d7e2f18
+Create Date: 2026-10-19 14:05:12.664390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1a4b92d06'
+down_revision: Union[str, None] = '5a3c9d7e2f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('broadcasts',
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('status', sa.Enum('running', 'paused', 'done', 'cancelled', name='broadcaststatusenum'), nullable=False),
+    sa.Column('last_user_id', sa.Uuid(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('sent_count', sa.Integer(), nullable=False),
+    sa.Column('failed_count', sa.Integer(), nullable=False),
+    sa.Column('blocked_count', sa.Integer(), nullable=False),
+    sa.Column('elapsed_seconds', sa.Float(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_broadcasts_id'), 'broadcasts', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_broadcasts_id'), table_name='broadcasts')
+    op.drop_table('broadcasts')
+    sa.Enum(name='broadcaststatusenum').drop(op.get_bind(), checkfirst=True)
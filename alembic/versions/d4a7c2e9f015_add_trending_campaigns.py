@@ -0,0 +1,40 @@
+"""add trending campaigns
+
+Revision ID: d4a7c2e9f015
+Revises: 8b2e5d1f7c49
+Create Date: 2026-10-19 18:41:09.551872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c2e9f015'
+down_revision: Union[str, None] = '8b2e5d1f7c49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('trending_campaigns',
+    sa.Column('campaign_id', sa.Uuid(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('campaign_id')
+    )
+    op.create_index(op.f('ix_trending_campaigns_id'), 'trending_campaigns', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_trending_campaigns_id'), table_name='trending_campaigns')
+    op.drop_table('trending_campaigns')
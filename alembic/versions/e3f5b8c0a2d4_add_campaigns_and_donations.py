@@ -0,0 +1,68 @@
+"""add campaigns and donations
+
+Revision ID: e3f5b8c0a2d4
+Revises: c7e1a4b92d06
+Create Date: 2026-10-19 15:32:40.091224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f5b8c0a2d4'
+down_revision: Union[str, None] = 'c7e1a4b92d06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('campaigns',
+    sa.Column('owner_telegram_id', sa.String(length=255), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('goal_amount', sa.BigInteger(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('status', sa.Enum('active', 'closed', name='campaignstatusenum'), nullable=False),
+    sa.Column('raised_amount', sa.BigInteger(), nullable=False),
+    sa.Column('donor_count', sa.Integer(), nullable=False),
+    sa.Column('last_donation_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_campaigns_id'), 'campaigns', ['id'], unique=False)
+    op.create_index(op.f('ix_campaigns_owner_telegram_id'), 'campaigns', ['owner_telegram_id'], unique=False)
+    op.create_table('donations',
+    sa.Column('campaign_id', sa.Uuid(), nullable=False),
+    sa.Column('donor_telegram_id', sa.String(length=255), nullable=True),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('telegram_payment_charge_id', sa.String(length=255), nullable=True),
+    sa.Column('provider_payment_charge_id', sa.String(length=255), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('telegram_payment_charge_id')
+    )
+    op.create_index(op.f('ix_donations_id'), 'donations', ['id'], unique=False)
+    op.create_index('ix_donations_campaign_donor', 'donations', ['campaign_id', 'donor_telegram_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_donations_campaign_donor', table_name='donations')
+    op.drop_index(op.f('ix_donations_id'), table_name='donations')
+    op.drop_table('donations')
+    op.drop_index(op.f('ix_campaigns_owner_telegram_id'), table_name='campaigns')
+    op.drop_index(op.f('ix_campaigns_id'), table_name='campaigns')
+    op.drop_table('campaigns')
+    sa.Enum(name='campaignstatusenum').drop(op.get_bind(), checkfirst=True)
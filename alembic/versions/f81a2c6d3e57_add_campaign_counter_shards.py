@@ -0,0 +1,60 @@
+"""add campaign counter shards
+
+Revision ID: f81a2c6d3e57
+Revises: e3f5b8c0a2d4
+Create Date: 2026-10-19 16:10:27.553018
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f81a2c6d3e57'
+down_revision: Union[str, None] = 'e3f5b8c0a2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('campaigns', sa.Column('counter_shards', sa.Integer(), server_default='1', nullable=False))
+    op.create_table('campaign_counter_shards',
+    sa.Column('campaign_id', sa.Uuid(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('raised_amount', sa.BigInteger(), nullable=False),
+    sa.Column('donor_count', sa.Integer(), nullable=False),
+    sa.Column('donation_count', sa.BigInteger(), nullable=False),
+    sa.Column('last_donation_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('campaign_id', 'shard', name='uq_campaign_counter_shard')
+    )
+    op.create_index(op.f('ix_campaign_counter_shards_id'), 'campaign_counter_shards', ['id'], unique=False)
+    op.create_index('ix_campaign_counter_shards_last_donation_at', 'campaign_counter_shards', ['last_donation_at'], unique=False)
+    # carry existing totals over into shard 0
+    op.execute(
+        """
+        INSERT INTO campaign_counter_shards
+            (id, campaign_id, shard, raised_amount, donor_count, donation_count,
+             last_donation_at, is_deleted)
+        SELECT gen_random_uuid(), c.id, 0, c.raised_amount, c.donor_count,
+               (SELECT count(*) FROM donations d WHERE d.campaign_id = c.id),
+               c.last_donation_at, false
+        FROM campaigns c
+        WHERE c.raised_amount > 0 OR c.donor_count > 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_campaign_counter_shards_last_donation_at', table_name='campaign_counter_shards')
+    op.drop_index(op.f('ix_campaign_counter_shards_id'), table_name='campaign_counter_shards')
+    op.drop_table('campaign_counter_shards')
+    op.drop_column('campaigns', 'counter_shards')
@@ -0,0 +1,144 @@
+"""Fingerprinted static assets.
+
+`build_assets` copies every file in `static/` to `static/dist/` under a
+content-hashed name (`tg.3f2a9c1d0b.js`), writes gzip/brotli variants
+next to compressible files and records the mapping in
+`static/dist/manifest.json`. Hashed names never change content, so they
+are served with `Cache-Control: immutable` and browsers don't even
+revalidate them on repeat visits.
+
+Run `python -m app.assets` in a deploy step; the app also builds on
+startup, only writing files that don't exist yet.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from mimetypes import guess_type
+
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+
+from app.page_cache import parse_accept_encoding
+from app.settings import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = f"{settings.BASE_DIR}/static"
+DIST_DIR = f"{STATIC_DIR}/dist"
+STATIC_URL = "/static/"
+DIST_URL = "/static/dist/"
+MANIFEST = "manifest.json"
+IMMUTABLE = "public, max-age=31536000, immutable"
+COMPRESSIBLE = (".js", ".css", ".svg", ".json", ".html", ".txt", ".map")
+
+manifest = {}
+
+
+def _write(path: str, content: bytes):
+    if os.path.exists(path):
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def build_assets(source: str = STATIC_DIR, output: str = DIST_DIR):
+    """Fingerprint and precompress assets, then load the manifest."""
+    os.makedirs(output, exist_ok=True)
+    entries = {}
+    for name in sorted(os.listdir(source)):
+        path = os.path.join(source, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()[:10]
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{digest}{ext}"
+        target = os.path.join(output, hashed)
+        _write(target, content)
+        if ext in COMPRESSIBLE:
+            _write(f"{target}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(f"{target}.br", brotli.compress(content, quality=11))
+        entries[name] = hashed
+
+    _write_manifest(output, entries)
+    manifest.clear()
+    manifest.update(entries)
+    return entries
+
+
+def _write_manifest(output: str, entries: dict):
+    path = os.path.join(output, MANIFEST)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def asset_url(name: str):
+    """URL of an asset, fingerprinted when it's in the manifest."""
+    hashed = manifest.get(name)
+    if hashed is None:
+        return f"{STATIC_URL}{name}"
+    return f"{DIST_URL}{hashed}"
+
+
+_STATIC_REF = re.compile(r"""(["'])/static/([^"'?#]+)\1""")
+
+
+def rewrite_asset_urls(html: str):
+    """Point `/static/<name>` references in html to fingerprinted files."""
+    return _STATIC_REF.sub(
+        lambda match: f"{match.group(1)}{asset_url(match.group(2))}{match.group(1)}",
+        html,
+    )
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Serves fingerprinted assets forever-cacheable and precompressed."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        accepted = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+        response = None
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding not in accepted:
+                continue
+            try:
+                compressed_stat = os.stat(f"{full_path}{suffix}")
+            except FileNotFoundError:
+                continue
+            response = FileResponse(
+                f"{full_path}{suffix}",
+                status_code=status_code,
+                stat_result=compressed_stat,
+                media_type=guess_type(str(full_path))[0],
+                headers={"Content-Encoding": encoding},
+            )
+            break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response.headers["Cache-Control"] = IMMUTABLE
+        response.headers["Vary"] = "Accept-Encoding"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    for name, hashed in build_assets().items():
+        print(f"{name} -> {hashed}")
@@ -1,10 +1,25 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.assets import build_assets
+from app.page_cache import verification_pages
+from app.routes.bots import load_passport_params
 from app.settings import settings
 from app.telegram_app.main import ptb
+from app.telegram_app.outbox import outbox
+from app.telegram_app.payments import payable_campaigns, refresh_payable_campaigns_forever
+from app.telegram_app.withdrawals import settle_withdrawals_forever
+from internal.campaign_stats import campaign_stats
+from internal.dao.campaign_counter import fold_counters_forever
+from internal.identity_index import identity_index
+from internal.jobs import JobWorker
+from internal.ledger_partitions import maintain_partitions_forever
+from internal.profiler import profiler
+from internal.progress_card import progress_cards
+from internal.trending import snapshot_trending_forever, trending
 
 logger = logging.getLogger('fastapi')
 
@@ -12,9 +27,54 @@ logger = logging.getLogger('fastapi')
 async def lifespan(_: FastAPI):
     webhook_endpoint = f"{settings.BACKEND_URL}{settings.WEBHOOK_ENDPOINT}"
     await ptb.bot.setWebhook(webhook_endpoint)
+    if settings.DEBUG:
+        # serve live files from /static and reload pages as they change
+        verification_pages.load()
+        verification_pages.start_watcher()
+    else:
+        # pages reference fingerprinted assets, build them first
+        build_assets()
+        verification_pages.load()
+    # load known fingerprints so the first duplicate check is already fast
+    identity_index.refresh()
+    # pre-checkout answers must not wait for the first refresh
+    payable_campaigns.start()
+    payable_campaigns.refresh()
+    # follow new donations first, then replay the ledger; the ranking
+    # counts a donation seen both ways once
+    trending.start()
+    trending.rebuild()
+    campaign_stats.start()
+    progress_cards.start()
     # async with ptb:
     await ptb.initialize()
     await ptb.start()
+    await outbox.start(ptb.bot)
+    load_passport_params()
+    job_worker = JobWorker(ptb.bot, poll_interval=settings.JOB_POLL_INTERVAL)
+    await job_worker.start()
+    folder = asyncio.create_task(fold_counters_forever(settings.COUNTER_FOLD_INTERVAL))
+    partitioner = asyncio.create_task(maintain_partitions_forever())
+    payable_refresher = asyncio.create_task(
+        refresh_payable_campaigns_forever(settings.PAYABLE_CAMPAIGNS_REFRESH_INTERVAL)
+    )
+    snapshotter = asyncio.create_task(snapshot_trending_forever(settings.TRENDING_SNAPSHOT_INTERVAL))
+    settler = asyncio.create_task(
+        settle_withdrawals_forever(settings.SETTLEMENT_INTERVAL, settings.SETTLEMENT_BATCH_SIZE)
+    )
     yield
+    settler.cancel()
+    snapshotter.cancel()
+    payable_refresher.cancel()
+    partitioner.cancel()
+    folder.cancel()
+    await job_worker.stop()
+    await outbox.stop()
+    await verification_pages.stop_watcher()
     await ptb.stop()
+    payable_campaigns.stop()
+    trending.stop()
+    campaign_stats.stop()
+    progress_cards.stop()
+    profiler.stop()
     
\ No newline at end of file
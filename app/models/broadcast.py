@@ -0,0 +1,82 @@
+import datetime
+import enum
+import uuid
+from typing import Optional
+
+from sqlalchemy import Text, Enum
+from sqlalchemy.orm import Mapped, mapped_column
+from pydantic import BaseModel
+
+from .base import Base
+
+
+class BroadcastStatusEnum(enum.Enum):
+    running = "running"
+    paused = "paused"
+    done = "done"
+    cancelled = "cancelled"
+
+
+class Broadcast(Base):
+    __tablename__ = "broadcasts"
+
+    text: Mapped[str] = mapped_column(Text())
+    status: Mapped[str] = mapped_column(
+        Enum(BroadcastStatusEnum, name="broadcaststatusenum"),
+        default="running",
+    )
+    # Keyset checkpoint: every user with a smaller id has been handled
+    last_user_id: Mapped[Optional[uuid.UUID]] = mapped_column()
+    total: Mapped[int] = mapped_column(default=0)
+    sent_count: Mapped[int] = mapped_column(default=0)
+    failed_count: Mapped[int] = mapped_column(default=0)
+    blocked_count: Mapped[int] = mapped_column(default=0)
+    # Time actually spent sending, so pauses don't skew the throughput
+    elapsed_seconds: Mapped[float] = mapped_column(default=0.0)
+    finished_at: Mapped[Optional[datetime.datetime]] = mapped_column()
+    # Bumped on every resume; only the job chain of the current one may run
+    generation: Mapped[int] = mapped_column(default=0)
+
+    def __str__(self):
+        return f"Broadcast {self.id} ({self.status})"
+
+    def __repr__(self):
+        return f"<Broadcast: {self.id}>"
+
+
+class BroadcastSchema(BaseModel):
+    id: uuid.UUID
+    text: str
+    status: str
+    total: int
+    processed: int
+    sent_count: int
+    failed_count: int
+    blocked_count: int
+    throughput: float
+    eta_seconds: Optional[float] = None
+    created_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+
+    @classmethod
+    def from_orm(cls, broadcast: Broadcast):
+        processed = broadcast.sent_count + broadcast.failed_count + broadcast.blocked_count
+        throughput = processed / broadcast.elapsed_seconds if broadcast.elapsed_seconds else 0.0
+        status = BroadcastStatusEnum(broadcast.status).value
+        eta_seconds = None
+        if throughput and status == "running":
+            eta_seconds = max(broadcast.total - processed, 0) / throughput
+        return cls(
+            id=broadcast.id,
+            text=broadcast.text,
+            status=status,
+            total=broadcast.total,
+            processed=processed,
+            sent_count=broadcast.sent_count,
+            failed_count=broadcast.failed_count,
+            blocked_count=broadcast.blocked_count,
+            throughput=throughput,
+            eta_seconds=eta_seconds,
+            created_at=broadcast.created_at,
+            finished_at=broadcast.finished_at,
+        )
@@ -0,0 +1,122 @@
+import datetime
+import enum
+import uuid
+from typing import Optional
+
+from sqlalchemy import BigInteger, Computed, ForeignKey, Index, String, Text, Enum, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column
+from pydantic import BaseModel
+
+from .base import Base
+
+
+# The 'simple' configuration doesn't stem or drop stop words: campaigns are
+# written in any language, and inline search matches words by prefix.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+
+class CampaignStatusEnum(enum.Enum):
+    active = "active"
+    closed = "closed"
+
+
+class Campaign(Base):
+    __tablename__ = "campaigns"
+    __table_args__ = (
+        # keyset pagination of an owner's campaigns, newest first
+        Index("ix_campaigns_owner_created_at", "owner_telegram_id", "created_at", "id"),
+        Index("ix_campaigns_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    owner_telegram_id: Mapped[str] = mapped_column(String(255), index=True)
+    title: Mapped[str] = mapped_column(String(255))
+    description: Mapped[Optional[str]] = mapped_column(Text())
+    # Amounts are in the smallest unit of the currency, like Telegram payments
+    goal_amount: Mapped[int] = mapped_column(BigInteger())
+    currency: Mapped[str] = mapped_column(String(3), default="USD")
+    status: Mapped[str] = mapped_column(
+        Enum(CampaignStatusEnum, name="campaignstatusenum"),
+        default="active",
+    )
+
+    # Folded from the counter shards every few seconds, so showing a
+    # campaign never has to aggregate its donations.
+    raised_amount: Mapped[int] = mapped_column(BigInteger(), default=0)
+    donor_count: Mapped[int] = mapped_column(default=0)
+    last_donation_at: Mapped[Optional[datetime.datetime]] = mapped_column()
+    # Paid out, and requested but not settled yet; both lock the campaign row
+    withdrawn_amount: Mapped[int] = mapped_column(BigInteger(), default=0)
+    reserved_amount: Mapped[int] = mapped_column(BigInteger(), default=0)
+    # How many counter shards donations are spread over; grows with contention
+    counter_shards: Mapped[int] = mapped_column(default=1)
+    search_vector = mapped_column(TSVECTOR(), Computed(SEARCH_VECTOR_SQL, persisted=True))
+
+    def __str__(self):
+        return f"{self.title}"
+
+    def __repr__(self):
+        return f"<Campaign: {self.title}>"
+
+
+class CampaignCounterShard(Base):
+    """One slice of a campaign's totals.
+
+    Each donation adds to a random shard of its campaign, so concurrent
+    donations to a hot campaign don't all queue on the same row lock.
+    """
+
+    __tablename__ = "campaign_counter_shards"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "shard", name="uq_campaign_counter_shard"),
+        Index("ix_campaign_counter_shards_last_donation_at", "last_donation_at"),
+    )
+
+    campaign_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("campaigns.id"))
+    shard: Mapped[int] = mapped_column()
+    raised_amount: Mapped[int] = mapped_column(BigInteger(), default=0)
+    donor_count: Mapped[int] = mapped_column(default=0)
+    donation_count: Mapped[int] = mapped_column(BigInteger(), default=0)
+    last_donation_at: Mapped[Optional[datetime.datetime]] = mapped_column()
+
+    def __str__(self):
+        return f"{self.campaign_id}:{self.shard}"
+
+    def __repr__(self):
+        return f"<CampaignCounterShard: {self.campaign_id}:{self.shard}>"
+
+
+class CampaignSchema(BaseModel):
+    id: Optional[uuid.UUID] = None
+    owner_telegram_id: str
+    title: str
+    description: Optional[str] = None
+    goal_amount: int
+    currency: str = "USD"
+    status: str = "active"
+    raised_amount: int = 0
+    donor_count: int = 0
+    last_donation_at: Optional[datetime.datetime] = None
+    created_at: Optional[datetime.datetime] = None
+
+    def __str__(self):
+        return f"{self.title}"
+
+    @classmethod
+    def from_orm(cls, campaign: Campaign):
+        return cls(
+            id=campaign.id,
+            owner_telegram_id=campaign.owner_telegram_id,
+            title=campaign.title,
+            description=campaign.description,
+            goal_amount=campaign.goal_amount,
+            currency=campaign.currency,
+            status=CampaignStatusEnum(campaign.status).value,
+            raised_amount=campaign.raised_amount,
+            donor_count=campaign.donor_count,
+            last_donation_at=campaign.last_donation_at,
+            created_at=campaign.created_at,
+        )
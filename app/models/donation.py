@@ -0,0 +1,71 @@
+import datetime
+import uuid
+from typing import Optional
+
+from sqlalchemy import BigInteger, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from pydantic import BaseModel
+
+from .base import Base
+
+
+class Donation(Base):
+    __tablename__ = "donations"
+    __table_args__ = (
+        Index("ix_donations_campaign_donor", "campaign_id", "donor_telegram_id"),
+    )
+
+    campaign_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("campaigns.id"))
+    # Donors don't need an account, so this can be empty
+    donor_telegram_id: Mapped[Optional[str]] = mapped_column(String(255))
+    amount: Mapped[int] = mapped_column(BigInteger())
+    currency: Mapped[str] = mapped_column(String(3))
+    telegram_payment_charge_id: Mapped[Optional[str]] = mapped_column(
+        String(255), unique=True
+    )
+    provider_payment_charge_id: Mapped[Optional[str]] = mapped_column(String(255))
+
+    def __str__(self):
+        return f"{self.amount} {self.currency}"
+
+    def __repr__(self):
+        return f"<Donation: {self.amount} {self.currency}>"
+
+
+class CampaignDonor(Base):
+    """A donor of a campaign, one row each; inserting it decides who is new."""
+
+    __tablename__ = "campaign_donors"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "donor_telegram_id", name="uq_campaign_donor"),
+    )
+
+    campaign_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("campaigns.id"))
+    donor_telegram_id: Mapped[str] = mapped_column(String(255))
+
+    def __repr__(self):
+        return f"<CampaignDonor: {self.campaign_id} {self.donor_telegram_id}>"
+
+
+class DonationSchema(BaseModel):
+    id: Optional[uuid.UUID] = None
+    campaign_id: uuid.UUID
+    donor_telegram_id: Optional[str] = None
+    amount: int
+    currency: str
+    telegram_payment_charge_id: Optional[str] = None
+    provider_payment_charge_id: Optional[str] = None
+    created_at: Optional[datetime.datetime] = None
+
+    @classmethod
+    def from_orm(cls, donation: Donation):
+        return cls(
+            id=donation.id,
+            campaign_id=donation.campaign_id,
+            donor_telegram_id=donation.donor_telegram_id,
+            amount=donation.amount,
+            currency=donation.currency,
+            telegram_payment_charge_id=donation.telegram_payment_charge_id,
+            provider_payment_charge_id=donation.provider_payment_charge_id,
+            created_at=donation.created_at,
+        )
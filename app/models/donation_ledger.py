@@ -0,0 +1,52 @@
+import datetime
+import enum
+import uuid
+from typing import Optional
+
+from sqlalchemy import BigInteger, Enum, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class LedgerEntryKindEnum(enum.Enum):
+    donation = "donation"
+    refund = "refund"
+    withdrawal = "withdrawal"
+
+
+class DonationLedgerEntry(Base):
+    """Append-only record of money moving in or out of a campaign.
+
+    The table is partitioned by month on created_at, which therefore is
+    part of the primary key. A trigger rejects UPDATE and DELETE, so
+    `updated_at`, `is_deleted` and `deleted_at` keep their defaults.
+    """
+
+    __tablename__ = "donation_ledger"
+    __table_args__ = (
+        Index("ix_donation_ledger_campaign_created_at", "campaign_id", "created_at"),
+        Index("ix_donation_ledger_donor_created_at", "donor_telegram_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        primary_key=True, server_default=func.now()
+    )
+    kind: Mapped[str] = mapped_column(
+        Enum(LedgerEntryKindEnum, name="ledgerentrykindenum"),
+    )
+    campaign_id: Mapped[uuid.UUID] = mapped_column()
+    donation_id: Mapped[Optional[uuid.UUID]] = mapped_column()
+    donor_telegram_id: Mapped[Optional[str]] = mapped_column(String(255))
+    # Signed, in the smallest currency unit: money out of a campaign is negative
+    amount: Mapped[int] = mapped_column(BigInteger())
+    currency: Mapped[str] = mapped_column(String(3))
+    telegram_payment_charge_id: Mapped[Optional[str]] = mapped_column(String(255))
+
+    def __str__(self):
+        return f"{self.kind}: {self.amount} {self.currency}"
+
+    def __repr__(self):
+        return f"<DonationLedgerEntry: {self.kind} {self.amount} {self.currency}>"
@@ -0,0 +1,30 @@
+from sqlalchemy import String, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class IdentityFingerprint(Base):
+    """A hash that identifies a KYC submission.
+
+    `kind` is either `document_number` (sha256 of the normalized document
+    number, matched exactly) or an image kind such as `selfie` and
+    `front_side` (64 bit perceptual hash in hex, matched by Hamming
+    distance).
+    """
+
+    __tablename__ = "identity_fingerprints"
+    __table_args__ = (
+        Index("ix_identity_fingerprints_kind_value", "kind", "value"),
+        Index("ix_identity_fingerprints_created_at", "created_at"),
+    )
+
+    telegram_id: Mapped[str] = mapped_column(String(255), index=True)
+    kind: Mapped[str] = mapped_column(String(32))
+    value: Mapped[str] = mapped_column(String(64))
+
+    def __str__(self):
+        return f"{self.kind}: {self.value}"
+
+    def __repr__(self):
+        return f"<IdentityFingerprint: {self.kind} {self.value}>"
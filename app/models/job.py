@@ -0,0 +1,51 @@
+import datetime
+import enum
+from typing import Optional
+
+from sqlalchemy import String, Text, Enum, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class JobStatusEnum(enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    dead = "dead"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers only look at runnable rows; finished jobs don't bloat the
+        # index they claim from.
+        Index(
+            "ix_jobs_runnable",
+            "type",
+            "run_at",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    type: Mapped[str] = mapped_column(String(64))
+    payload: Mapped[dict] = mapped_column(JSONB(), default=dict)
+    status: Mapped[str] = mapped_column(
+        Enum(JobStatusEnum, name="jobstatusenum"),
+        default="pending",
+    )
+    attempts: Mapped[int] = mapped_column(default=0)
+    max_attempts: Mapped[int] = mapped_column(default=5)
+    run_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    locked_by: Mapped[Optional[str]] = mapped_column(String(255))
+    locked_until: Mapped[Optional[datetime.datetime]] = mapped_column()
+    last_error: Mapped[Optional[str]] = mapped_column(Text())
+    finished_at: Mapped[Optional[datetime.datetime]] = mapped_column()
+
+    def __str__(self):
+        return f"{self.type} ({self.status})"
+
+    def __repr__(self):
+        return f"<Job: {self.type} {self.id}>"
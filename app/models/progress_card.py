@@ -0,0 +1,20 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ProgressCardFile(Base):
+    """Telegram file_id of an uploaded progress card, reused instead of uploading again."""
+
+    __tablename__ = "progress_card_files"
+
+    # see internal.progress_card.card_key
+    card_key: Mapped[str] = mapped_column(String(255), unique=True)
+    file_id: Mapped[str] = mapped_column(String(255))
+
+    def __str__(self):
+        return f"{self.card_key}"
+
+    def __repr__(self):
+        return f"<ProgressCardFile: {self.card_key}>"
@@ -1,10 +1,11 @@
 import datetime
 import enum
-from typing import Dict, Optional
+import uuid
+from typing import Dict, List, Optional
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Text, Column, Enum
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import String, Text, Column, Computed, Date, Enum, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 
 from pydantic import BaseModel
 
@@ -18,28 +19,119 @@ class StatusEnum(enum.Enum):
     rejected = "rejected"
 
 
+# Generated column expressions. They have to stay immutable for Postgres to
+# accept them, which is why birth_date is parsed with make_date instead of
+# to_date. Telegram Passport sends dates as DD.MM.YYYY.
+DOCUMENT_NUMBER_SQL = (
+    "upper(regexp_replace(coalesce("
+    "passport_data->>'document_no', "
+    "identity_card->>'document_no', "
+    "driver_license->>'document_no'"
+    "), '[^[:alnum:]]', '', 'g'))"
+)
+COUNTRY_CODE_SQL = "upper(personal_details->>'country_code')"
+FIRST_NAME_SQL = "lower(personal_details->>'first_name')"
+LAST_NAME_SQL = "lower(personal_details->>'last_name')"
+FULL_NAME_SQL = (
+    "lower(coalesce(personal_details->>'first_name', '') || ' ' || "
+    "coalesce(personal_details->>'middle_name', '') || ' ' || "
+    "coalesce(personal_details->>'last_name', ''))"
+)
+_BIRTH_DATE = "personal_details->>'birth_date'"
+_BIRTH_DAY = f"substring({_BIRTH_DATE} from 1 for 2)::int"
+_BIRTH_MONTH = f"substring({_BIRTH_DATE} from 4 for 2)::int"
+_BIRTH_YEAR = f"substring({_BIRTH_DATE} from 7 for 4)::int"
+# An impossible date like 31.02.1990 is NULL; make_date would raise and
+# fail the whole INSERT. The CASEs are nested because AND doesn't promise
+# to check the format before the casts.
+BIRTH_DATE_SQL = (
+    f"CASE WHEN {_BIRTH_DATE} ~ '^[0-9]{{2}}\\.[0-9]{{2}}\\.[0-9]{{4}}$' THEN "
+    f"CASE WHEN {_BIRTH_YEAR} >= 1 AND {_BIRTH_MONTH} BETWEEN 1 AND 12 AND {_BIRTH_DAY} BETWEEN 1 AND "
+    f"CASE WHEN {_BIRTH_MONTH} = 2 THEN "
+    f"CASE WHEN ({_BIRTH_YEAR} % 4 = 0 AND {_BIRTH_YEAR} % 100 <> 0) OR {_BIRTH_YEAR} % 400 = 0 "
+    f"THEN 29 ELSE 28 END "
+    f"WHEN {_BIRTH_MONTH} IN (4, 6, 9, 11) THEN 30 ELSE 31 END "
+    f"THEN make_date({_BIRTH_YEAR}, {_BIRTH_MONTH}, {_BIRTH_DAY}) END END"
+)
+
+
 class TelegramVerification(Base):
     __tablename__ = "telegram_verifications"
+    __table_args__ = (
+        # Reviewers only ever scan pending rows, oldest first. Keeping the
+        # index partial means claiming stays O(log n) however many
+        # approved/rejected rows pile up.
+        Index(
+            "ix_telegram_verifications_pending",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index("ix_telegram_verifications_document_number", "document_number"),
+        Index(
+            "ix_telegram_verifications_country_name",
+            "country_code",
+            "last_name",
+            "first_name",
+        ),
+        Index("ix_telegram_verifications_birth_date", "birth_date"),
+        Index(
+            "ix_telegram_verifications_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_telegram_verifications_personal_details",
+            "personal_details",
+            postgresql_using="gin",
+            postgresql_ops={"personal_details": "jsonb_path_ops"},
+        ),
+    )
 
     # user = ForeignKeyField(User, backref="telegram_verifications")
-    user: Mapped[User] = relationship(backref="telegram_verifications")
+    user: Mapped[User] = relationship(
+        primaryjoin="foreign(TelegramVerification.telegram_id) == User.telegram_id",
+        backref="telegram_verifications",
+        viewonly=True,
+    )
 
     telegram_id: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     phone_number: Mapped[Optional[str]] = mapped_column(String(255))
-    passport_data: Mapped[Optional[dict]] = mapped_column(JSON())
-    personal_details: Mapped[Optional[dict]] = mapped_column(JSON())
-    driver_license: Mapped[Optional[dict]] = mapped_column(JSON())
-    identity_card: Mapped[Optional[dict]] = mapped_column(JSON())
-    utility_bill: Mapped[Optional[dict]] = mapped_column(JSON())
-    bank_statement: Mapped[Optional[dict]] = mapped_column(JSON())
-    address: Mapped[Optional[dict]] = mapped_column(JSON())
-    address_documents: Mapped[Optional[dict]] = mapped_column(JSON())
+    passport_data: Mapped[Optional[dict]] = mapped_column(JSONB())
+    personal_details: Mapped[Optional[dict]] = mapped_column(JSONB())
+    driver_license: Mapped[Optional[dict]] = mapped_column(JSONB())
+    identity_card: Mapped[Optional[dict]] = mapped_column(JSONB())
+    utility_bill: Mapped[Optional[dict]] = mapped_column(JSONB())
+    bank_statement: Mapped[Optional[dict]] = mapped_column(JSONB())
+    address: Mapped[Optional[dict]] = mapped_column(JSONB())
+    address_documents: Mapped[Optional[dict]] = mapped_column(JSONB())
     identity_front_side: Mapped[Optional[str]] = mapped_column(String(255))
     identity_reverse_side: Mapped[Optional[str]] = mapped_column(
         String(255),
     )
     selfie: Mapped[Optional[str]] = mapped_column(String(255))
 
+    # Search fields, generated by Postgres from the documents above
+    document_number: Mapped[Optional[str]] = mapped_column(
+        String(255), Computed(DOCUMENT_NUMBER_SQL, persisted=True)
+    )
+    country_code: Mapped[Optional[str]] = mapped_column(
+        String(8), Computed(COUNTRY_CODE_SQL, persisted=True)
+    )
+    first_name: Mapped[Optional[str]] = mapped_column(
+        String(255), Computed(FIRST_NAME_SQL, persisted=True)
+    )
+    last_name: Mapped[Optional[str]] = mapped_column(
+        String(255), Computed(LAST_NAME_SQL, persisted=True)
+    )
+    full_name: Mapped[Optional[str]] = mapped_column(
+        Text(), Computed(FULL_NAME_SQL, persisted=True)
+    )
+    birth_date: Mapped[Optional[datetime.date]] = mapped_column(
+        Date(), Computed(BIRTH_DATE_SQL, persisted=True)
+    )
+
     # Server side fields
     status: Mapped[str] = mapped_column(
         Enum(StatusEnum),
@@ -49,14 +141,24 @@ class TelegramVerification(Base):
     approved_at: Mapped[Optional[datetime.datetime]] = mapped_column()
     rejected_at: Mapped[Optional[datetime.datetime]] = mapped_column()
 
+    # Other users whose documents or photos match this submission
+    duplicate_matches: Mapped[Optional[list]] = mapped_column(JSONB())
+
+    # Review queue
+    reviewed_by: Mapped[Optional[str]] = mapped_column(String(255))
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(255))
+    claimed_until: Mapped[Optional[datetime.datetime]] = mapped_column()
+
     def __str__(self):
-        return f"{self.telegram_first_name} {self.telegram_last_name}"
+        return f"{self.telegram_id}"
 
     def __repr__(self):
-        return f"<TelegramVerification: {self.telegram_first_name} {self.telegram_last_name}>"
+        return f"<TelegramVerification: {self.telegram_id}>"
 
 
 class TelegramVerificationSchema(BaseModel):
+    id: Optional[uuid.UUID] = None
+    created_at: Optional[datetime.datetime] = None
     telegram_id: str
     phone_number: Optional[str] = None
     passport_data: Optional[Dict] = None
@@ -70,19 +172,29 @@ class TelegramVerificationSchema(BaseModel):
     identity_front_side: Optional[str] = None
     identity_reverse_side: Optional[str] = None
     selfie: Optional[str] = None
+    document_number: Optional[str] = None
+    country_code: Optional[str] = None
+    full_name: Optional[str] = None
+    birth_date: Optional[datetime.date] = None
 
     # Server side fields
     status: str = "pending"
     rejected_reason: Optional[str] = None
     approved_at: Optional[datetime.datetime] = None
     rejected_at: Optional[datetime.datetime] = None
+    duplicate_matches: Optional[List[Dict]] = None
+    reviewed_by: Optional[str] = None
+    claimed_by: Optional[str] = None
+    claimed_until: Optional[datetime.datetime] = None
 
     def __str__(self):
-        return f"{self.telegram_first_name} {self.telegram_last_name}"
+        return f"{self.telegram_id}"
 
     @classmethod
     def from_orm(cls, telegram_verification: TelegramVerification):
         return cls(
+            id=telegram_verification.id,
+            created_at=telegram_verification.created_at,
             telegram_id=telegram_verification.telegram_id,
             phone_number=telegram_verification.phone_number,
             passport_data=telegram_verification.passport_data,
@@ -96,8 +208,16 @@ class TelegramVerificationSchema(BaseModel):
             identity_front_side=telegram_verification.identity_front_side,
             identity_reverse_side=telegram_verification.identity_reverse_side,
             selfie=telegram_verification.selfie,
-            status=telegram_verification.status,
+            document_number=telegram_verification.document_number,
+            country_code=telegram_verification.country_code,
+            full_name=telegram_verification.full_name,
+            birth_date=telegram_verification.birth_date,
+            status=StatusEnum(telegram_verification.status).value,
             rejected_reason=telegram_verification.rejected_reason,
             approved_at=telegram_verification.approved_at,
             rejected_at=telegram_verification.rejected_at,
+            duplicate_matches=telegram_verification.duplicate_matches,
+            reviewed_by=telegram_verification.reviewed_by,
+            claimed_by=telegram_verification.claimed_by,
+            claimed_until=telegram_verification.claimed_until,
         )
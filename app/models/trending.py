@@ -0,0 +1,22 @@
+import uuid
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class TrendingCampaign(Base):
+    """Latest snapshot of the in-memory trending ranking, one row per rank."""
+
+    __tablename__ = "trending_campaigns"
+
+    campaign_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("campaigns.id"), unique=True)
+    rank: Mapped[int] = mapped_column()
+    score: Mapped[float] = mapped_column()
+
+    def __str__(self):
+        return f"{self.rank}: {self.campaign_id}"
+
+    def __repr__(self):
+        return f"<TrendingCampaign: {self.rank} {self.campaign_id}>"
@@ -0,0 +1,135 @@
+import datetime
+import enum
+import uuid
+from typing import Optional
+
+from sqlalchemy import BigInteger, Enum, ForeignKey, Index, String, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column
+from pydantic import BaseModel
+
+from .base import Base
+
+
+class WithdrawalStatusEnum(enum.Enum):
+    pending = "pending"
+    settled = "settled"
+
+
+class PayoutRunStatusEnum(enum.Enum):
+    running = "running"
+    done = "done"
+
+
+class Withdrawal(Base):
+    __tablename__ = "withdrawals"
+    __table_args__ = (
+        # a retried request (same key) returns the first withdrawal
+        UniqueConstraint("owner_telegram_id", "idempotency_key", name="uq_withdrawals_idempotency_key"),
+        # settlement only scans pending rows, oldest first
+        Index(
+            "ix_withdrawals_pending",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    campaign_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("campaigns.id"), index=True)
+    owner_telegram_id: Mapped[str] = mapped_column(String(255))
+    idempotency_key: Mapped[str] = mapped_column(String(255))
+    # In the smallest currency unit, reserved on the campaign until settled
+    amount: Mapped[int] = mapped_column(BigInteger())
+    currency: Mapped[str] = mapped_column(String(3))
+    status: Mapped[str] = mapped_column(
+        Enum(WithdrawalStatusEnum, name="withdrawalstatusenum"),
+        default="pending",
+    )
+    payout_run_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("payout_runs.id"))
+    settled_at: Mapped[Optional[datetime.datetime]] = mapped_column()
+
+    def __str__(self):
+        return f"{self.amount} {self.currency} ({self.status})"
+
+    def __repr__(self):
+        return f"<Withdrawal: {self.id}>"
+
+
+class PayoutRun(Base):
+    """One settlement batch, with the numbers to tell how it went."""
+
+    __tablename__ = "payout_runs"
+
+    status: Mapped[str] = mapped_column(
+        Enum(PayoutRunStatusEnum, name="payoutrunstatusenum"),
+        default="running",
+    )
+    withdrawal_count: Mapped[int] = mapped_column(default=0)
+    campaign_count: Mapped[int] = mapped_column(default=0)
+    total_amount: Mapped[int] = mapped_column(BigInteger(), default=0)
+    duration_seconds: Mapped[float] = mapped_column(default=0.0)
+    # Seconds from request to settlement over the run's withdrawals
+    latency_avg: Mapped[float] = mapped_column(default=0.0)
+    latency_max: Mapped[float] = mapped_column(default=0.0)
+    finished_at: Mapped[Optional[datetime.datetime]] = mapped_column()
+
+    def __str__(self):
+        return f"Payout run {self.id} ({self.status})"
+
+    def __repr__(self):
+        return f"<PayoutRun: {self.id}>"
+
+
+class WithdrawalSchema(BaseModel):
+    id: uuid.UUID
+    campaign_id: uuid.UUID
+    owner_telegram_id: str
+    amount: int
+    currency: str
+    status: str
+    payout_run_id: Optional[uuid.UUID] = None
+    created_at: Optional[datetime.datetime] = None
+    settled_at: Optional[datetime.datetime] = None
+
+    @classmethod
+    def from_orm(cls, withdrawal: Withdrawal):
+        return cls(
+            id=withdrawal.id,
+            campaign_id=withdrawal.campaign_id,
+            owner_telegram_id=withdrawal.owner_telegram_id,
+            amount=withdrawal.amount,
+            currency=withdrawal.currency,
+            status=WithdrawalStatusEnum(withdrawal.status).value,
+            payout_run_id=withdrawal.payout_run_id,
+            created_at=withdrawal.created_at,
+            settled_at=withdrawal.settled_at,
+        )
+
+
+class PayoutRunSchema(BaseModel):
+    id: uuid.UUID
+    status: str
+    withdrawal_count: int
+    campaign_count: int
+    total_amount: int
+    duration_seconds: float
+    throughput: float
+    latency_avg: float
+    latency_max: float
+    created_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+
+    @classmethod
+    def from_orm(cls, run: PayoutRun):
+        return cls(
+            id=run.id,
+            status=PayoutRunStatusEnum(run.status).value,
+            withdrawal_count=run.withdrawal_count,
+            campaign_count=run.campaign_count,
+            total_amount=run.total_amount,
+            duration_seconds=run.duration_seconds,
+            throughput=run.withdrawal_count / run.duration_seconds if run.duration_seconds else 0.0,
+            latency_avg=run.latency_avg,
+            latency_max=run.latency_max,
+            created_at=run.created_at,
+            finished_at=run.finished_at,
+        )
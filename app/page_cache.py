@@ -0,0 +1,164 @@
+"""Verification pages, loaded once and kept in memory precompressed.
+
+Each page is stored with its gzip (and brotli, when the `brotli` package
+is installed) variants and a strong ETag per variant, so serving one is a dict lookup:
+no disk I/O on the event loop and no compression per request.
+"""
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+from dataclasses import dataclass, field
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.settings import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Page:
+    digest: str
+    mtime: float
+    variants: dict = field(default_factory=dict)
+
+    def etag(self, encoding: str):
+        """Strong ETag of one variant; the bytes differ per encoding, so must the tag."""
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+
+def parse_accept_encoding(header: str):
+    """Return the encodings the client accepts (q > 0)."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(name)
+    return accepted
+
+
+class PageCache:
+    def __init__(self, directory: str, transform=None):
+        self.directory = directory
+        # `transform(html) -> html` is applied before compressing, e.g. to
+        # rewrite asset URLs.
+        self.transform = transform
+        self._pages = {}
+        self._watcher = None
+
+    def _load(self, name: str):
+        path = os.path.join(self.directory, name)
+        mtime = os.path.getmtime(path)
+        with open(path, "rb") as f:
+            content = f.read()
+        if self.transform:
+            content = self.transform(content.decode()).encode()
+
+        page = Page(
+            digest=hashlib.sha1(content).hexdigest(),
+            mtime=mtime,
+            variants={"identity": content},
+        )
+        page.variants["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+        if brotli is not None:
+            page.variants["br"] = brotli.compress(content, quality=11)
+        self._pages[name] = page
+
+    def load(self):
+        """Load every html page in the directory."""
+        for name in os.listdir(self.directory):
+            if name.endswith(".html"):
+                self._load(name)
+
+    def reload_changed(self):
+        """Reload pages whose file changed on disk."""
+        for name in os.listdir(self.directory):
+            if not name.endswith(".html"):
+                continue
+            page = self._pages.get(name)
+            path = os.path.join(self.directory, name)
+            if page is None or os.path.getmtime(path) != page.mtime:
+                logger.info("Reloading %s", name)
+                self._load(name)
+
+    def response(self, request: Request, name: str, status_code: int = 200):
+        """Serve a page, honouring If-None-Match and Accept-Encoding."""
+        page = self._pages.get(name)
+        if page is None:
+            self._load(name)
+            page = self._pages[name]
+
+        accepted = parse_accept_encoding(request.headers.get("accept-encoding", ""))
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in accepted and candidate in page.variants:
+                encoding = candidate
+                break
+
+        etag = page.etag(encoding)
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "no-cache",
+        }
+        if status_code == 200:
+            if_none_match = request.headers.get("if-none-match", "")
+            if etag in (tag.strip() for tag in if_none_match.split(",")):
+                return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(
+            page.variants[encoding],
+            status_code=status_code,
+            headers=headers,
+            media_type="text/html; charset=utf-8",
+        )
+
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.reload_changed()
+            except Exception:
+                logger.exception("Reloading pages failed")
+
+    def start_watcher(self, interval: float = 1.0):
+        """Reload pages when they change on disk (development only)."""
+        self._watcher = asyncio.create_task(self._watch(interval))
+
+    async def stop_watcher(self):
+        if self._watcher:
+            self._watcher.cancel()
+            self._watcher = None
+
+
+def _rewrite_asset_urls(html: str):
+    # imported late, app.assets depends on this module
+    from app.assets import rewrite_asset_urls
+
+    return rewrite_asset_urls(html)
+
+
+verification_pages = PageCache(
+    f"{settings.BASE_DIR}/app/verification", transform=_rewrite_asset_urls
+)
@@ -0,0 +1,196 @@
+"""Rate limiting and load shedding for the public verification endpoints.
+
+`RateLimitMiddleware` is a plain ASGI middleware, so a rejected request
+costs a dict lookup and a tiny 429: no routing, no body parsing, no DB or
+file work. Requests are limited per client IP and, where the URL carries
+one, per session token, with token buckets kept in memory. Buckets that
+have refilled are dropped periodically so the table only holds clients
+that were active recently.
+
+The campaign stats stream is public too, and each open stream takes one
+of the process's STATS_STREAM_MAX_SUBSCRIBERS slots. So a client IP can
+open only so many streams per second and hold only so many at once,
+leaving the rest of the slots to other viewers.
+"""
+import math
+import re
+import time
+from collections import Counter
+
+from app.routes import api
+from app.settings import settings
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by an arbitrary string.
+
+    Each bucket is a `(tokens, updated_at)` tuple; a key that's not in the
+    table is a full bucket, which is why full buckets can be compacted
+    away without changing behaviour.
+    """
+
+    def __init__(self, rate: float, burst: int, compact_interval: float = 60.0):
+        self.rate = rate
+        self.burst = burst
+        self.compact_interval = compact_interval
+        self._buckets = {}
+        self._next_compaction = time.monotonic() + compact_interval
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def hit(self, key: str, now: float = None):
+        """Take a token for `key`.
+
+        Returns 0 when allowed, otherwise the seconds until a token is free.
+        """
+        if now is None:
+            now = time.monotonic()
+        if now >= self._next_compaction:
+            self.compact(now)
+
+        tokens, updated_at = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self._buckets[key] = (tokens - 1, now)
+        return 0
+
+    def compact(self, now: float = None):
+        """Forget buckets that have refilled completely."""
+        if now is None:
+            now = time.monotonic()
+        refill = self.burst / self.rate
+        self._buckets = {
+            key: bucket
+            for key, bucket in self._buckets.items()
+            if now - bucket[1] < refill
+        }
+        self._next_compaction = now + self.compact_interval
+
+
+def route_pattern(endpoint: str):
+    """Compile a route path like `/verify/{token}` into a regex with named groups."""
+    parts = re.split(r"\{(\w+)\}", endpoint)
+    pattern = "".join(
+        re.escape(part) if i % 2 == 0 else f"(?P<{part}>[^/]+)"
+        for i, part in enumerate(parts)
+    )
+    return re.compile(f"^{pattern}$")
+
+
+# (method, path pattern); a `token` group is limited per session token too
+LIMITED_ROUTES = (
+    ("GET", route_pattern(settings.VERIFY_CALLBACK_ENDPOINT)),
+    ("GET", route_pattern(settings.VERIFY_ENDPOINT)),
+    ("POST", route_pattern(settings.PASSPORT_DATA_ENDPOINT)),
+)
+
+# limited per client IP, in streams opened and streams open
+STREAM_ROUTES = (
+    ("GET", route_pattern(api.PREFIX + api.CAMPAIGN_STREAM_ENDPOINT)),
+)
+
+
+def _client_ip(scope):
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        # the client can write any entries it likes on the left; only the
+        # ones appended by our own proxies, counted from the right, are real
+        forwarded = [
+            entry.strip()
+            for name, value in scope["headers"]
+            if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",")
+        ]
+        hops = max(1, settings.RATE_LIMIT_TRUSTED_PROXY_HOPS)
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+async def _reject(send, status: int, retry_after: float):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"text/plain"),
+                (b"content-length", b"0"),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": b""})
+
+
+class RateLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.ip_limiter = TokenBucketLimiter(
+            settings.RATE_LIMIT_IP_RATE, settings.RATE_LIMIT_IP_BURST
+        )
+        self.token_limiter = TokenBucketLimiter(
+            settings.RATE_LIMIT_TOKEN_RATE, settings.RATE_LIMIT_TOKEN_BURST
+        )
+        self.max_in_flight = settings.RATE_LIMIT_MAX_IN_FLIGHT
+        self.in_flight = 0
+        self.stream_limiter = TokenBucketLimiter(
+            settings.STATS_STREAM_IP_RATE, settings.STATS_STREAM_IP_BURST
+        )
+        self.max_streams_per_ip = settings.STATS_STREAM_MAX_PER_IP
+        # client IP -> streams open
+        self.streams = Counter()
+
+    def _match(self, scope, routes=LIMITED_ROUTES):
+        method = scope["method"]
+        path = scope["path"]
+        for route_method, pattern in routes:
+            if method != route_method:
+                continue
+            match = pattern.match(path)
+            if match:
+                return match
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self._match(scope, STREAM_ROUTES):
+            return await self._stream(scope, receive, send)
+        match = self._match(scope)
+        if match is None:
+            return await self.app(scope, receive, send)
+
+        retry_after = self.ip_limiter.hit(_client_ip(scope))
+        token = match.groupdict().get("token")
+        if not retry_after and token:
+            retry_after = self.token_limiter.hit(token)
+        if retry_after:
+            return await _reject(send, 429, retry_after)
+
+        # shed load instead of queueing behind a saturated DB
+        if self.in_flight >= self.max_in_flight:
+            return await _reject(send, 503, 1)
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def _stream(self, scope, receive, send):
+        ip = _client_ip(scope)
+        retry_after = self.stream_limiter.hit(ip)
+        if retry_after:
+            return await _reject(send, 429, retry_after)
+        if self.streams[ip] >= self.max_streams_per_ip:
+            return await _reject(send, 429, 1)
+        # the app call lasts as long as the stream stays open
+        self.streams[ip] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.streams[ip] -= 1
+            if not self.streams[ip]:
+                del self.streams[ip]
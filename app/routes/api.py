@@ -1,5 +1,245 @@
-from fastapi import APIRouter
+import datetime
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.models.broadcast import BroadcastSchema, BroadcastStatusEnum
+from app.models.telegram_verification import StatusEnum, TelegramVerificationSchema
+from app.models.withdrawal import PayoutRunSchema
+from app.routes.auth import require_admin, require_reviewer
 from app.settings import settings
+from app.telegram_app.broadcast import resume_broadcast, start_broadcast
+from app.telegram_app.main import bot_request
+from app.telegram_app.outbox import outbox
+from internal.campaign_stats import campaign_stats, format_event
+from internal.dao.broadcast import get_broadcast, set_broadcast_status
+from internal.dao.campaign import get_campaign
+from internal.dao.job import count_jobs_by_status, retry_dead_job
+from internal.dao.telegram_verification import (
+    approve_verification,
+    claim_pending_verifications,
+    count_verifications_by_status,
+    get_verifications,
+    reject_verification,
+    release_verification,
+    search_verifications,
+)
+from internal.dao.withdrawal import get_payout_runs
+from internal.profiler import profiler
+from internal.trending import trending_campaigns
 
 PREFIX = "/api"
+# unauthenticated and long-lived, so RateLimitMiddleware limits it per client IP
+CAMPAIGN_STREAM_ENDPOINT = "/campaigns/{id}/stream"
 router = APIRouter()
+
+
+class ClaimSchema(BaseModel):
+    limit: int = Field(10, ge=1, le=100)
+    lease_seconds: int = Field(300, ge=30, le=3600)
+
+
+class BroadcastCreateSchema(BaseModel):
+    text: str = Field(..., min_length=1, max_length=4096)
+
+
+class ReviewSchema(BaseModel):
+    reason: Optional[str] = None
+
+
+@router.get("/verifications", dependencies=[Depends(require_admin)])
+async def list_verifications(
+    status: StatusEnum = StatusEnum.pending,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+):
+    limit = max(1, min(limit, 100))
+    try:
+        verifications, next_cursor = get_verifications(status, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "items": [TelegramVerificationSchema.from_orm(v) for v in verifications],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/verifications/stats", dependencies=[Depends(require_admin)])
+async def verification_stats():
+    return count_verifications_by_status()
+
+
+@router.get("/verifications/search", dependencies=[Depends(require_admin)])
+async def search(
+    document_number: Optional[str] = None,
+    country_code: Optional[str] = None,
+    name: Optional[str] = None,
+    birth_date: Optional[datetime.date] = None,
+    limit: int = 20,
+):
+    if not any((document_number, country_code, name, birth_date)):
+        raise HTTPException(status_code=400, detail="At least one search field is required")
+    limit = max(1, min(limit, 100))
+    verifications = search_verifications(
+        document_number, country_code, name, birth_date, limit
+    )
+    return {"items": [TelegramVerificationSchema.from_orm(v) for v in verifications]}
+
+
+@router.post("/verifications/claim")
+async def claim_verifications(body: ClaimSchema, reviewer: str = Depends(require_reviewer)):
+    verifications = claim_pending_verifications(reviewer, body.limit, body.lease_seconds)
+    return {"items": verifications}
+
+
+@router.post("/verifications/{id}/release")
+async def release(id: uuid.UUID, reviewer: str = Depends(require_reviewer)):
+    if not release_verification(id, reviewer):
+        raise HTTPException(status_code=409, detail="Verification is not claimed by you")
+    return {"status": "ok"}
+
+
+@router.post("/verifications/{id}/approve")
+async def approve(id: uuid.UUID, reviewer: str = Depends(require_reviewer)):
+    verification = approve_verification(id, reviewer)
+    if not verification:
+        raise HTTPException(status_code=409, detail="Verification is not claimed by you")
+    return TelegramVerificationSchema.from_orm(verification)
+
+
+@router.post("/verifications/{id}/reject")
+async def reject(id: uuid.UUID, body: ReviewSchema, reviewer: str = Depends(require_reviewer)):
+    verification = reject_verification(id, reviewer, body.reason)
+    if not verification:
+        raise HTTPException(status_code=409, detail="Verification is not claimed by you")
+    return TelegramVerificationSchema.from_orm(verification)
+
+
+@router.get("/jobs/stats", dependencies=[Depends(require_admin)])
+async def job_stats():
+    return count_jobs_by_status()
+
+
+@router.post("/jobs/{id}/retry", dependencies=[Depends(require_admin)])
+async def retry_job(id: uuid.UUID):
+    if not retry_dead_job(id):
+        raise HTTPException(status_code=404, detail="Dead job not found")
+    return {"status": "ok"}
+
+
+@router.get("/outbox/stats", dependencies=[Depends(require_admin)])
+async def outbox_stats():
+    return outbox.stats.as_dict(outbox.queued())
+
+
+@router.get("/transport/stats", dependencies=[Depends(require_admin)])
+async def transport_stats():
+    return bot_request.stats()
+
+
+@router.post("/broadcasts", dependencies=[Depends(require_admin)])
+async def create_broadcast(body: BroadcastCreateSchema):
+    broadcast = start_broadcast(body.text)
+    return BroadcastSchema.from_orm(broadcast)
+
+
+@router.get("/broadcasts/{id}", dependencies=[Depends(require_admin)])
+async def broadcast_progress(id: uuid.UUID):
+    broadcast = get_broadcast(id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return BroadcastSchema.from_orm(broadcast)
+
+
+@router.post("/broadcasts/{id}/{action}", dependencies=[Depends(require_admin)])
+async def control_broadcast(id: uuid.UUID, action: str):
+    broadcast = get_broadcast(id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    status = BroadcastStatusEnum(broadcast.status)
+    if action == "pause" and status == BroadcastStatusEnum.running:
+        set_broadcast_status(broadcast, BroadcastStatusEnum.paused)
+    elif action == "resume" and status == BroadcastStatusEnum.paused:
+        resume_broadcast(broadcast)
+    elif action == "cancel" and status in (BroadcastStatusEnum.running, BroadcastStatusEnum.paused):
+        set_broadcast_status(broadcast, BroadcastStatusEnum.cancelled)
+    else:
+        raise HTTPException(status_code=409, detail=f"Cannot {action} a {status.value} broadcast")
+    return BroadcastSchema.from_orm(broadcast)
+
+
+@router.get("/payout-runs", dependencies=[Depends(require_admin)])
+async def list_payout_runs(limit: int = 20):
+    limit = max(1, min(limit, 100))
+    return {"items": [PayoutRunSchema.from_orm(run) for run in get_payout_runs(limit)]}
+
+
+@router.get("/profiler", dependencies=[Depends(require_admin)])
+async def profiler_status():
+    return profiler.status()
+
+
+@router.post("/profiler", dependencies=[Depends(require_admin)])
+async def enable_profiler(seconds: float = 30):
+    """Profile every update for `seconds`; 0 turns the profiler off."""
+    if seconds > 0:
+        profiler.enable(seconds)
+    else:
+        profiler.disable()
+    return profiler.status()
+
+
+@router.get("/profiler/{profile}", dependencies=[Depends(require_admin)])
+async def profile_handlers(profile: str):
+    handlers = profiler.handlers(profile)
+    if handlers is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {"handlers": handlers}
+
+
+@router.get("/profiler/{profile}/{handler}", dependencies=[Depends(require_admin)])
+async def profile_stacks(profile: str, handler: str):
+    """A handler's samples in collapsed stack format, for flamegraph.pl or speedscope."""
+    stacks = profiler.read(profile, handler)
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(stacks)
+
+
+@router.get("/trending")
+async def trending(limit: int = 10):
+    limit = max(1, min(limit, 20))
+    return {
+        "items": [
+            {"campaign": campaign, "score": score}
+            for campaign, score in trending_campaigns(limit)
+        ]
+    }
+
+
+@router.get(CAMPAIGN_STREAM_ENDPOINT)
+async def campaign_stream(id: uuid.UUID):
+    """Live totals of a campaign as Server-Sent Events."""
+    if not get_campaign(id):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    subscriber = campaign_stats.subscribe(id)
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many viewers, try again later")
+
+    async def events():
+        try:
+            while True:
+                state = await subscriber.next(settings.STATS_STREAM_HEARTBEAT)
+                # a comment keeps proxies from closing an idle stream
+                yield format_event(state) if state else ": keep-alive\n\n"
+        finally:
+            campaign_stats.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
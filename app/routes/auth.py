@@ -0,0 +1,28 @@
+from secrets import compare_digest
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.settings import settings
+
+
+def is_admin(token: Optional[str]):
+    """Whether `token` is the configured admin token."""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return compare_digest(token, settings.ADMIN_TOKEN)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Only let requests carrying the configured admin token through."""
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def require_reviewer(x_admin_token: Optional[str] = Header(None)):
+    """The name of the reviewer whose token the request carries."""
+    if x_admin_token:
+        for reviewer, token in settings.REVIEWER_TOKENS.items():
+            if compare_digest(x_admin_token, token):
+                return reviewer
+    raise HTTPException(status_code=403, detail="Forbidden")
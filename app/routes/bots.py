@@ -1,102 +1,167 @@
-from typing import Union
-
-from fastapi import APIRouter
-from fastapi.responses import HTMLResponse, JSONResponse
+import json
+import time
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import quote
+
+from cryptography.hazmat.primitives import serialization
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import Response
 from telegram import Update
 from pydantic import BaseModel
 
+from app.page_cache import verification_pages
+from app.routes.auth import is_admin
+from app.telegram_app import webhook_reply
 from app.telegram_app.constants import UpdateSchema
 from app.telegram_app.main import ptb
+from app.telegram_app.payments import answer_pre_checkout_query
 from internal.dao.session import get_session, delete_session
 from app.settings import settings
+from internal.db_events import track_update
+from internal.metrics import WEBHOOK_DURATION
+from internal.profiler import profiler
 
 PREFIX = "/telegram"
 WEBHOOK_ENDPOINT = settings.WEBHOOK_ENDPOINT.replace(PREFIX, "")
+VERIFY_ENDPOINT = settings.VERIFY_ENDPOINT.replace(PREFIX, "")
+VERIFY_CALLBACK_ENDPOINT = settings.VERIFY_CALLBACK_ENDPOINT.replace(PREFIX, "")
+PASSPORT_DATA_ENDPOINT = settings.PASSPORT_DATA_ENDPOINT.replace(PREFIX, "")
 router = APIRouter()
 
 
+CALLBACK_URL = f"{settings.BACKEND_URL}{settings.VERIFY_CALLBACK_ENDPOINT}"
+PASSPORT_SCOPE = {
+    "data": [
+        {"type": "id_document", "selfie": True},
+        "address_document",
+        "email",
+    ],
+    "v": "1",
+}
+_passport_params_prefix = None
+# update fields, one of which is set per update; the metrics label
+UPDATE_TYPES = tuple(name for name in UpdateSchema.model_fields if name != "update_id")
+
+
 class PassportDataSchema(BaseModel):
     token: Union[str, int]
 
 
-@router.post(WEBHOOK_ENDPOINT)
-async def process_update_post(request: UpdateSchema):
+def load_passport_params():
+    """Serialise the constant part of the /passport-data response once.
+
+    Needs the bot to be initialized, since it includes the bot id.
+    """
+    global _passport_params_prefix
+    private_key = serialization.load_pem_private_key(
+        Path(f"{settings.BASE_DIR}/private.key").read_bytes(), password=None
+    )
+    public_key = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    constant = {
+        "bot_id": ptb.bot.id,
+        "scope": PASSPORT_SCOPE,
+        "public_key": public_key.decode(),
+    }
+    # leave the object open so callback_url and nonce can be appended
+    _passport_params_prefix = json.dumps(constant)[:-1].encode() + b',"callback_url":'
+
+
+def passport_params_prefix():
+    if _passport_params_prefix is None:
+        load_passport_params()
+    return _passport_params_prefix
+
+
+async def process_update(request: UpdateSchema):
+    update_type = next(
+        (name for name in UPDATE_TYPES if getattr(request, name) is not None), "unknown"
+    )
+    started = time.perf_counter()
+    try:
+        with track_update(request.update_id, update_type):
+            return await _process_update(request)
+    finally:
+        WEBHOOK_DURATION.observe(time.perf_counter() - started, update_type)
+
+
+@profiler.root
+async def _process_update(request: UpdateSchema):
+    if request.pre_checkout_query:
+        # Telegram gives up after 10s; answer before anything else can delay it
+        return answer_pre_checkout_query(request.pre_checkout_query)
     req = request.model_dump()
     update = Update.de_json(req, ptb.bot)
-    await ptb.process_update(update)
+    with webhook_reply.collect() as reply:
+        await ptb.process_update(update)
+    if reply:
+        # Telegram executes the method in the response body
+        return reply
     return {"status": "ok"}
 
 
+async def process_update_profiled(request: UpdateSchema, x_profile, x_admin_token):
+    """Process an update, profiled when an admin replays it with X-Profile."""
+    if x_profile and is_admin(x_admin_token):
+        with profiler.capture():
+            return await process_update(request)
+    return await process_update(request)
+
+
+@router.post(WEBHOOK_ENDPOINT)
+async def process_update_post(
+    request: UpdateSchema,
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+):
+    return await process_update_profiled(request, x_profile, x_admin_token)
+
+
 @router.get(WEBHOOK_ENDPOINT)
-async def process_update_get(request: UpdateSchema):
-    req = request.model_dump()
-    update = Update.de_json(req, ptb.bot)
-    await ptb.process_update(update)
-    return {"status": "ok"}
+async def process_update_get(
+    request: UpdateSchema,
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+):
+    return await process_update_profiled(request, x_profile, x_admin_token)
 
 
-@router.get("/verify/{token}")
-async def verify(token: str):
+@router.get(VERIFY_ENDPOINT)
+async def verify(token: str, request: Request):
     session = get_session(token=token)
     if not session:
-        with open(f"{settings.BASE_DIR}/app/verification/unauthorized.html") as f:
-            html = f.read()
-        return HTMLResponse(html, status_code=401)
-    with open(f"{settings.BASE_DIR}/app/verification/index.html") as f:
-        html = f.read()
+        return verification_pages.response(request, "unauthorized.html", status_code=401)
 
-    return HTMLResponse(html)
+    return verification_pages.response(request, "index.html")
 
 
-@router.post("/passport-data")
+@router.post(PASSPORT_DATA_ENDPOINT)
 async def get_passport_params(body: PassportDataSchema):
-    data = {}
-
-    # load public key
-    # with open(f"{settings.BASE_DIR}/public.key", "r") as f:
-    #     public_key = f.read()
-    # data["public_key"] = public_key
-    data["bot_id"] = ptb.bot.id
-    # data["bot_id"] = 543260180
-    data[
-        "callback_url"
-    ] = f"{settings.BACKEND_URL}{settings.VERIFY_CALLBACK_ENDPOINT}".format(
-        token=body.token
+    token = str(body.token)
+    callback_url = CALLBACK_URL.format(token=quote(token, safe=""))
+    # only the token dependent fields are serialised per request
+    content = b"".join(
+        (
+            passport_params_prefix(),
+            json.dumps(callback_url).encode(),
+            b',"nonce":',
+            json.dumps(token).encode(),
+            b"}",
+        )
     )
-    # data[
-    #     "callback_url"
-    # ] = "https://core.telegram.org/passport/example?passport_ssid=175ee0225fcc4dce880ba841ea07f993_98508773_7a3b4c4fa717189b1c"
-    data["scope"] = {
-        "data": [
-            {"type": "id_document", "selfie": True},
-            "address_document",
-            "email",
-        ],
-        "v": "1",
-    }
-    data["nonce"] = body.token
-    data["nonce"] = "175ee0225fcc4dce880ba841ea07f993_98508773_c135032610860da1a6"
-    import json
-    print(json.dumps(data))
+    return Response(content, media_type="application/json")
 
-    return JSONResponse(data)
 
-
-@router.get("/verify/callback/{token}")
-async def verify_callback(token: str, tg_passport: str = None):
+@router.get(VERIFY_CALLBACK_ENDPOINT)
+async def verify_callback(token: str, request: Request, tg_passport: str = None):
     session = get_session(token=token)
     if not session:
-        with open(f"{settings.BASE_DIR}/app/verification/unauthorized.html") as f:
-            html = f.read()
-        return HTMLResponse(html, status_code=401)
-
-    if tg_passport.lower() == "success":
-        with open(f"{settings.BASE_DIR}/app/verification/success.html") as f:
-            html = f.read()
-
-        return HTMLResponse(html)
+        return verification_pages.response(request, "unauthorized.html", status_code=401)
 
-    with open(f"{settings.BASE_DIR}/app/verification/failure.html") as f:
-        html = f.read()
+    if tg_passport and tg_passport.lower() == "success":
+        return verification_pages.response(request, "success.html")
 
-    return HTMLResponse(html)
+    return verification_pages.response(request, "failure.html")
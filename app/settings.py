@@ -1,13 +1,113 @@
 import os
+from typing import Dict, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     BASE_DIR : str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Reload templates and assets when they change on disk
+    DEBUG: bool = False
     TELEGRAM_TOKEN: str
     BACKEND_URL: str
     WEBHOOK_ENDPOINT: str = '/telegram/webhook'
     VERIFY_ENDPOINT: str = '/telegram/verify/{token}'
     VERIFY_CALLBACK_ENDPOINT: str = '/telegram/verify/callback/{token}'
+    PASSPORT_DATA_ENDPOINT: str = '/telegram/passport-data'
+
+    # Rate limiting of the public verification endpoints
+    RATE_LIMIT_IP_RATE: float = 2.0
+    RATE_LIMIT_IP_BURST: int = 20
+    RATE_LIMIT_TOKEN_RATE: float = 0.5
+    RATE_LIMIT_TOKEN_BURST: int = 10
+    RATE_LIMIT_MAX_IN_FLIGHT: int = 64
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+    # proxies of ours in front of the app, each appending to X-Forwarded-For
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = 1
+
+    # HTTP pools for Bot API calls and file downloads
+    BOT_API_POOL_SIZE: int = 32
+    BOT_API_READ_TIMEOUT: float = 10.0
+    BOT_API_CONNECT_TIMEOUT: float = 5.0
+    BOT_API_POOL_TIMEOUT: float = 5.0
+    BOT_API_KEEPALIVE: float = 30.0
+    # needs the h2 package (httpx[http2])
+    BOT_API_HTTP2: bool = False
+    BOT_FILE_POOL_SIZE: int = 8
+    BOT_FILE_READ_TIMEOUT: float = 60.0
+
+    # Outbound Bot API sends (Telegram flood limits)
+    OUTBOX_GLOBAL_RATE: float = 30.0
+    OUTBOX_PER_CHAT_INTERVAL: float = 1.0
+
+    # Seconds between folding campaign counter shards into the campaign rows
+    COUNTER_FOLD_INTERVAL: float = 5.0
+
+    # Donation ledger: months of partitions created ahead, months kept
+    # attached, and an optional tablespace for detached partitions
+    LEDGER_PARTITIONS_AHEAD: int = 3
+    LEDGER_RETENTION_MONTHS: int = 24
+    LEDGER_ARCHIVE_TABLESPACE: Optional[str] = None
+
+    # Seconds a rendered bot view (e.g. a /my_campaigns page) is cached
+    VIEW_CACHE_TTL: float = 30.0
+
+    # Seconds Telegram may cache an inline search answer
+    INLINE_CACHE_TIME: int = 30
+
+    # Trending campaigns: seconds of donations counted, bucket size, time
+    # for a donation's weight to halve, and seconds between DB snapshots
+    TRENDING_WINDOW: float = 24 * 3600
+    TRENDING_BUCKET_SECONDS: float = 300
+    TRENDING_HALF_LIFE: float = 6 * 3600
+    TRENDING_SNAPSHOT_INTERVAL: float = 60.0
+
+    # Seconds between refreshes of the campaigns pre-checkout accepts
+    PAYABLE_CAMPAIGNS_REFRESH_INTERVAL: float = 10.0
+
+    # Withdrawals: seconds between payout runs and withdrawals per run
+    SETTLEMENT_INTERVAL: float = 300.0
+    SETTLEMENT_BATCH_SIZE: int = 500
+
+    # Progress cards: disk cache location and size, and rendering processes
+    PROGRESS_CARD_DIR: str = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "progress_cards"
+    )
+    PROGRESS_CARD_CACHE_BYTES: int = 100 * 1024 * 1024
+    PROGRESS_CARD_WORKERS: int = 2
+
+    # Live campaign stats (SSE): seconds updates are coalesced over,
+    # viewers per process, and seconds between keep-alive comments
+    STATS_STREAM_INTERVAL: float = 1.0
+    STATS_STREAM_MAX_SUBSCRIBERS: int = 10000
+    STATS_STREAM_HEARTBEAT: float = 15.0
+    # Per client IP: streams opened (token bucket) and streams open at once
+    STATS_STREAM_IP_RATE: float = 0.2
+    STATS_STREAM_IP_BURST: int = 10
+    STATS_STREAM_MAX_PER_IP: int = 10
+
+    # SQL instrumentation: queries slower than this many seconds are
+    # logged, and a statement run this many times in one update is
+    # reported as a possible N+1
+    DB_SLOW_QUERY_SECONDS: float = 0.2
+    DB_REPEATED_QUERY_THRESHOLD: int = 3
+
+    # Sampling profiler: seconds between samples, longest it may stay on,
+    # distinct stacks kept per profile, and profiles kept on disk
+    PROFILER_INTERVAL: float = 0.01
+    PROFILER_MAX_SECONDS: float = 300.0
+    PROFILER_MAX_STACKS: int = 5000
+    PROFILER_RETENTION: int = 10
+    PROFILER_DIR: str = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "profiles"
+    )
+
+    # Background jobs
+    JOB_POLL_INTERVAL: float = 5.0
+
+    # Admin API (disabled when unset)
+    ADMIN_TOKEN: Optional[str] = None
+    # Verification reviewers: name -> token, as JSON
+    REVIEWER_TOKENS: Dict[str, str] = {}
 
     # Database
     DB_USER: str
@@ -0,0 +1,122 @@
+"""Broadcasts to every active user.
+
+A broadcast runs as a chain of `broadcast.run` jobs. Each job streams
+recipients by keyset from the last checkpoint, sends them through the
+outbox at bulk priority (so the global rate limit is the only limit) and
+checkpoints after every batch. When its time slice is used up it enqueues
+the next job and returns, so a restart loses at most one batch of
+progress and the job lease never has to outlive a long broadcast.
+
+Resuming starts a new chain under the next `generation`. A job of an
+older generation stops at its next batch, and the new chain waits until
+no older job is still running, so a pause and resume within one slice
+never has two chains sending the same batch.
+"""
+import asyncio
+import logging
+import time
+
+from telegram.error import Forbidden
+
+from app.models.broadcast import BroadcastStatusEnum
+from app.telegram_app.outbox import BULK, outbox
+from internal.dao.broadcast import (
+    checkpoint_broadcast,
+    create_broadcast,
+    get_broadcast,
+    resume_broadcast as resume,
+    set_broadcast_status,
+)
+from internal.dao.job import enqueue_job, get_running_job_payloads
+from internal.dao.user import count_active_users, deactivate_users, get_active_users_after
+from internal.jobs import register
+
+logger = logging.getLogger(__name__)
+
+RUN_BROADCAST = "broadcast.run"
+BATCH_SIZE = 100
+TIME_SLICE = 60
+# seconds a new chain waits for the previous generation's job to stop
+HANDOVER_DELAY = 5
+
+
+def _enqueue_run(broadcast, generation: int, delay: int = 0):
+    enqueue_job(
+        RUN_BROADCAST,
+        {"broadcast_id": str(broadcast.id), "generation": generation},
+        delay=delay,
+    )
+
+
+def start_broadcast(text: str):
+    """Create a broadcast to every active user and start sending it."""
+    broadcast = create_broadcast(text, count_active_users())
+    _enqueue_run(broadcast, broadcast.generation)
+    return broadcast
+
+
+def resume_broadcast(broadcast):
+    """Continue a paused broadcast from its checkpoint."""
+    resume(broadcast)
+    _enqueue_run(broadcast, broadcast.generation)
+    return broadcast
+
+
+async def _send_batch(text: str, users):
+    futures = [
+        outbox.send_message(int(user.telegram_id), text, priority=BULK)
+        for user in users
+    ]
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    sent, failed, blocked = 0, 0, []
+    for user, result in zip(users, results):
+        if isinstance(result, Forbidden):
+            blocked.append(user.telegram_id)
+        elif isinstance(result, Exception):
+            failed += 1
+            logger.warning("Broadcast to %s failed: %s", user.telegram_id, result)
+        else:
+            sent += 1
+    return sent, failed, blocked
+
+
+@register(RUN_BROADCAST, concurrency=1)
+async def run_broadcast(bot, payload: dict) -> None:
+    broadcast = get_broadcast(payload["broadcast_id"])
+    generation = payload.get("generation", 0)
+    if not broadcast or broadcast.generation != generation:
+        return
+    if any(
+        other.get("broadcast_id") == payload["broadcast_id"] and other.get("generation") != generation
+        for other in get_running_job_payloads(RUN_BROADCAST)
+    ):
+        # a job of the previous generation is finishing its batch
+        _enqueue_run(broadcast, generation, delay=HANDOVER_DELAY)
+        return
+    deadline = time.monotonic() + TIME_SLICE
+    while time.monotonic() < deadline:
+        # re-read the status so pause/cancel/resume take effect between batches
+        if (
+            BroadcastStatusEnum(broadcast.status) != BroadcastStatusEnum.running
+            or broadcast.generation != generation
+        ):
+            return
+        users = get_active_users_after(broadcast.last_user_id, BATCH_SIZE)
+        if not users:
+            set_broadcast_status(broadcast, BroadcastStatusEnum.done)
+            return
+        started = time.monotonic()
+        sent, failed, blocked = await _send_batch(broadcast.text, users)
+        # users who blocked the bot won't be messaged again
+        deactivate_users(blocked)
+        checkpoint_broadcast(
+            broadcast,
+            users[-1].id,
+            sent,
+            failed,
+            len(blocked),
+            time.monotonic() - started,
+        )
+
+    # a superseded chain's next job stops straight away
+    _enqueue_run(broadcast, generation)
@@ -43,6 +43,21 @@ What can i help you today?
 For more information and help center, Please click /help
 """
 
+PAYMENT_INVALID_MESSAGE = "This invoice is not valid anymore. Please start the donation again."
+PAYMENT_CAMPAIGN_CLOSED_MESSAGE = "This campaign is not accepting donations anymore."
+DONATION_THANKS_MESSAGE = "Thank you for your donation! 💚"
+
+WITHDRAW_USAGE_MESSAGE = "Send /withdraw followed by the amount, e.g. /withdraw 25.50"
+WITHDRAW_NO_CAMPAIGNS_MESSAGE = "You have no campaign to withdraw from."
+WITHDRAW_CHOOSE_CAMPAIGN_MESSAGE = "Which campaign do you want to withdraw from?"
+WITHDRAW_REQUESTED_MESSAGE = "Your withdrawal of {amount} from {title} is on its way. It will be paid out with the next payout run."
+WITHDRAW_INSUFFICIENT_MESSAGE = "You can withdraw at most {available} from this campaign right now."
+WITHDRAW_SETTLED_MESSAGE = "Your withdrawal of {amount} has been paid out."
+
+CAMPAIGN_CARD_CAPTION = "{title}\n\n{raised} raised of {goal} from {donors} donors."
+
+NO_TRENDING_MESSAGE = "No campaign has received donations lately. Be the first with /donate!"
+
 # /help command
 HELP_COMMAND = """WeRise Bot Help Center
 
@@ -52,6 +67,7 @@ HELP_COMMAND = """WeRise Bot Help Center
 
 /create_campaign - Create a campaign.
 /my_campaigns - List all your campaigns.
+/trending - Campaigns raising the most right now.
 
 /verify - Verify your identity.
 /donate - Donate to a campaign.
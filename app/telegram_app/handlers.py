@@ -1,10 +1,18 @@
+import uuid
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext._contexttypes import ContextTypes
 
 from app.models.user import UserSchema
+from internal.dao.campaign import get_campaign
 from internal.dao.user import create_user, get_user
+from internal.trending import trending_campaigns
 
 from app.telegram_app import constants
+from app.telegram_app.outbox import outbox
+from app.telegram_app import webhook_reply
+from app.telegram_app.pagination import format_amount
+from app.telegram_app.progress_card import send_progress_card
 
 
 # Example handler
@@ -20,20 +28,58 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_details = UserSchema(**user_data)
         create_user(user_details)
         message = constants.WELLCOME_MESSAGE.format(first_name=user_details.first_name)
-        await context.bot.send_message(chat_id=chat_id, text=message)
+        await outbox.send_message(chat_id, message)
+        await _show_linked_campaign(chat_id, context.args)
         return {"status": "ok"}
 
     message = constants.START_COMMAND.format(first_name=user.first_name)
-    await context.bot.send_message(chat_id=chat_id, text=message)
+    await outbox.send_message(chat_id, message)
+    await _show_linked_campaign(chat_id, context.args)
     return {"status": "ok"}
 
+
+async def _show_linked_campaign(chat_id: int, args):
+    """Show the campaign of a `t.me/<bot>?start=donate_<id>` deep link."""
+    if not args or not args[0].startswith("donate_"):
+        return
+    try:
+        campaign = get_campaign(uuid.UUID(args[0][len("donate_"):]))
+    except ValueError:
+        return
+    if campaign is None:
+        return
+    caption = constants.CAMPAIGN_CARD_CAPTION.format(
+        title=campaign.title,
+        raised=format_amount(campaign.raised_amount, campaign.currency),
+        goal=format_amount(campaign.goal_amount, campaign.currency),
+        donors=campaign.donor_count,
+    )
+    await send_progress_card(chat_id, campaign, caption)
+
 async def echo(update: Update, _: ContextTypes.DEFAULT_TYPE):
     """Echo the user message."""
-    await update.message.reply_text(update.message.text)
+    await webhook_reply.send_message(update.message.chat_id, update.message.text)
 
     return {"status": "ok"}
 
 
 async def help(update: Update, _: ContextTypes.DEFAULT_TYPE):
     """Send a message when the command /help is issued."""
-    await update.message.reply_text(constants.HELP_COMMAND)
\ No newline at end of file
+    await webhook_reply.send_message(update.message.chat_id, constants.HELP_COMMAND)
+
+
+async def trending(update: Update, _: ContextTypes.DEFAULT_TYPE):
+    """Send the trending campaigns."""
+    campaigns = trending_campaigns(10)
+    if not campaigns:
+        text = constants.NO_TRENDING_MESSAGE
+    else:
+        lines = ["Trending campaigns:", ""]
+        for rank, (campaign, _score) in enumerate(campaigns, start=1):
+            lines.append(
+                f"{rank}. {campaign.title}\n"
+                f"   {format_amount(campaign.raised_amount, campaign.currency)}"
+                f" of {format_amount(campaign.goal_amount, campaign.currency)}"
+            )
+        text = "\n".join(lines)
+    await webhook_reply.send_message(update.message.chat_id, text)
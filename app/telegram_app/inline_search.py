@@ -0,0 +1,73 @@
+"""`@bot <terms>` inline search over campaigns.
+
+Answers go back in the webhook response when possible, so a keystroke
+costs one indexed query at most and no outbound Bot API call.
+"""
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Update,
+)
+from telegram.ext._contexttypes import ContextTypes
+
+from internal.campaign_search import search
+
+from app.settings import settings
+from app.telegram_app import webhook_reply
+from app.telegram_app.pagination import format_amount
+
+# Telegram shows at most 50 results per answer
+RESULTS_PER_PAGE = 20
+DESCRIPTION_LENGTH = 200
+
+
+def _article(hit, bot_username: str):
+    progress = (
+        f"{format_amount(hit.raised_amount, hit.currency)}"
+        f" of {format_amount(hit.goal_amount, hit.currency)} raised"
+    )
+    description = hit.description
+    if len(description) > DESCRIPTION_LENGTH:
+        description = description[:DESCRIPTION_LENGTH].rstrip() + "…"
+    parts = [hit.title, description, f"{progress}, {hit.donor_count} donors"]
+    text = "\n\n".join(part for part in parts if part)
+    return InlineQueryResultArticle(
+        id=str(hit.id),
+        title=hit.title,
+        description=progress,
+        input_message_content=InputTextMessageContent(text),
+        reply_markup=InlineKeyboardMarkup(
+            [[
+                InlineKeyboardButton(
+                    "Donate", url=f"https://t.me/{bot_username}?start=donate_{hit.id}"
+                )
+            ]]
+        ),
+    )
+
+
+async def inline_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Answer an inline query with matching campaigns."""
+    query = update.inline_query
+    offset = int(query.offset) if query.offset.isdigit() else 0
+    hits = search(query.query, RESULTS_PER_PAGE, offset)
+    results = [_article(hit, context.bot.username) for hit in hits]
+    next_offset = str(offset + RESULTS_PER_PAGE) if len(hits) == RESULTS_PER_PAGE else ""
+
+    if webhook_reply.reply_with(
+        "answerInlineQuery",
+        inline_query_id=query.id,
+        results=[result.to_dict() for result in results],
+        cache_time=settings.INLINE_CACHE_TIME,
+        is_personal=False,
+        next_offset=next_offset,
+    ):
+        return
+    await query.answer(
+        results,
+        cache_time=settings.INLINE_CACHE_TIME,
+        is_personal=False,
+        next_offset=next_offset,
+    )
@@ -1,16 +1,34 @@
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from telegram.ext import (
+    Application,
+    CallbackQueryHandler,
+    CommandHandler,
+    InlineQueryHandler,
+    MessageHandler,
+    filters,
+)
 from pathlib import Path
 from app.settings import settings
-from .handlers import start, echo, help
+from internal.metrics import timed_handler
+from internal.profiler import profiler
+from .handlers import start, echo, help, trending
+from .inline_search import inline_search
+from .pagination import CALLBACK_PREFIX, change_page, my_campaigns, withdraw_history
 from .passport import verify_user, get_passport_data
+from .payments import successful_payment
+from .transport import RoutingRequest
+from .withdrawals import CALLBACK_PREFIX as WITHDRAW_CALLBACK_PREFIX, choose_campaign, withdraw
+from . import broadcast  # noqa: F401 (registers the broadcast jobs)
 
 
 private_key = Path(f"{settings.BASE_DIR}/private.key")
+# API calls and file downloads get their own connection pools
+bot_request = RoutingRequest()
 # Initialize python telegram bot
 ptb = (
     Application.builder()
     .updater(None)
     .token(settings.TELEGRAM_TOKEN)
+    .request(bot_request)
     .private_key(private_key.read_bytes())
     .build()
 )
@@ -18,5 +36,20 @@ ptb = (
 ptb.add_handler(CommandHandler("start", start))
 ptb.add_handler(CommandHandler("help", help))
 ptb.add_handler(CommandHandler("verify", verify_user))
+ptb.add_handler(CommandHandler("trending", trending))
+ptb.add_handler(CommandHandler("my_campaigns", my_campaigns))
+ptb.add_handler(CommandHandler("withdraw_history", withdraw_history))
+ptb.add_handler(CallbackQueryHandler(change_page, pattern=f"^{CALLBACK_PREFIX}"))
+ptb.add_handler(CommandHandler("withdraw", withdraw))
+ptb.add_handler(CallbackQueryHandler(choose_campaign, pattern=f"^{WITHDRAW_CALLBACK_PREFIX}"))
+ptb.add_handler(InlineQueryHandler(inline_search))
 ptb.add_handler(MessageHandler(filters.PASSPORT_DATA, get_passport_data))
+ptb.add_handler(MessageHandler(filters.SUCCESSFUL_PAYMENT, successful_payment))
 ptb.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, echo))
+
+# record latency and errors of every handler registered above, and file
+# profiler samples under it
+for group in ptb.handlers.values():
+    for handler in group:
+        profiler.track(handler.callback)
+        handler.callback = timed_handler(handler.callback)
@@ -0,0 +1,293 @@
+"""Outbound message scheduler.
+
+Every Bot API send goes through `outbox` so the bot stays under Telegram's
+flood limits (about 30 messages per second overall and one per second per
+chat) while sending as fast as those limits allow:
+
+* messages wait in per-chat queues, a chat has at most one send in
+  flight, and it becomes ready again one `per_chat_interval` after that
+  send finished, so a chat's messages go out in order;
+* a global token bucket paces sends across all chats;
+* among ready chats, transactional replies go before bulk messages;
+* an identical message already queued for the same chat is not queued
+  twice, the caller gets the pending result instead;
+* a `RetryAfter` from Telegram puts the message back at the front of its
+  chat's queue and pauses that chat for the requested time, and since
+  flood limits are mostly bot-wide, the global bucket too.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from telegram.error import RetryAfter
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONAL = 0
+BULK = 1
+PRIORITIES = (TRANSACTIONAL, BULK)
+
+
+@dataclass
+class OutboundMessage:
+    method: str
+    chat_id: int
+    kwargs: dict
+    priority: int
+    future: asyncio.Future
+    key: object = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+IDLE = "idle"
+WAITING = "waiting"
+READY = "ready"
+SENDING = "sending"
+
+
+@dataclass
+class ChatQueue:
+    queues: tuple = field(default_factory=lambda: tuple(deque() for _ in PRIORITIES))
+    next_at: float = 0.0
+    # IDLE: nothing scheduled, WAITING: in the timer heap, READY: may send now,
+    # SENDING: a send is in flight
+    state: str = IDLE
+
+    def priority(self):
+        for priority, queue in zip(PRIORITIES, self.queues):
+            if queue:
+                return priority
+        return None
+
+    def pop(self):
+        for queue in self.queues:
+            if queue:
+                return queue.popleft()
+        return None
+
+
+@dataclass
+class OutboxStats:
+    sent: int = 0
+    failed: int = 0
+    coalesced: int = 0
+    retried: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def as_dict(self, queued: int):
+        return {
+            "queued": queued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "retried": self.retried,
+            "latency_avg": self.latency_total / self.sent if self.sent else 0.0,
+            "latency_max": self.latency_max,
+        }
+
+
+class Outbox:
+    def __init__(self, global_rate: float = 30.0, per_chat_interval: float = 1.0):
+        self.global_rate = global_rate
+        self.per_chat_interval = per_chat_interval
+        self.bot = None
+        self.stats = OutboxStats()
+        self._chats = {}
+        self._pending = {}
+        self._ready = tuple(deque() for _ in PRIORITIES)
+        self._waiting = []
+        self._tokens = global_rate
+        self._tokens_at = time.monotonic()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._sending = set()
+
+    async def start(self, bot):
+        self.bot = bot
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await asyncio.gather(*self._sending, return_exceptions=True)
+        # nothing will send what is still queued; don't leave callers waiting
+        for chat in self._chats.values():
+            for queue in chat.queues:
+                for message in queue:
+                    message.future.cancel()
+        self._chats.clear()
+        self._pending.clear()
+        self._waiting.clear()
+        for ready in self._ready:
+            ready.clear()
+
+    def queued(self):
+        return sum(len(queue) for chat in self._chats.values() for queue in chat.queues)
+
+    def send(self, method: str, chat_id: int, priority: int = TRANSACTIONAL, **kwargs):
+        """Queue a Bot API call for `chat_id`; await the result for the reply."""
+        try:
+            key = (method, chat_id, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            key = None
+        if key is not None and key in self._pending:
+            self.stats.coalesced += 1
+            return self._pending[key].future
+
+        future = asyncio.get_running_loop().create_future()
+        message = OutboundMessage(method, chat_id, kwargs, priority, future, key)
+        if key is not None:
+            self._pending[key] = message
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = ChatQueue()
+        chat.queues[priority].append(message)
+        if chat.state == READY:
+            # let a transactional reply overtake bulk traffic to other chats
+            self._ready[priority].append(chat_id)
+        else:
+            self._schedule(chat_id, chat)
+        return future
+
+    def send_message(self, chat_id: int, text: str, priority: int = TRANSACTIONAL, **kwargs):
+        return self.send("send_message", chat_id, priority, text=text, **kwargs)
+
+    def _schedule(self, chat_id, chat: ChatQueue):
+        if chat.state != IDLE:
+            return
+        chat.state = WAITING
+        heapq.heappush(self._waiting, (chat.next_at, chat_id))
+        self._wakeup.set()
+
+    def _take_token(self, now: float):
+        self._tokens = min(
+            self.global_rate, self._tokens + (now - self._tokens_at) * self.global_rate
+        )
+        self._tokens_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.global_rate
+
+    def _hold(self, seconds: float):
+        """Free no token for `seconds`."""
+        until = time.monotonic() + seconds
+        if until > self._tokens_at:
+            # _take_token refills from _tokens_at, so the bucket stays empty until then
+            self._tokens = 0.0
+            self._tokens_at = until
+
+    def _next_ready(self):
+        for ready in self._ready:
+            while ready:
+                chat_id = ready.popleft()
+                chat = self._chats.get(chat_id)
+                # entries can be stale, e.g. a chat promoted to a higher
+                # priority has already been sent from there
+                if chat is not None and chat.state == READY and chat.priority() is not None:
+                    return chat_id, chat
+        return None, None
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            while self._waiting and self._waiting[0][0] <= now:
+                next_at, chat_id = heapq.heappop(self._waiting)
+                chat = self._chats.get(chat_id)
+                if chat is None or chat.state != WAITING or chat.next_at != next_at:
+                    continue
+                chat.state = READY
+                self._ready[chat.priority()].append(chat_id)
+
+            timeout = self._waiting[0][0] - now if self._waiting else None
+            chat_id, chat = self._next_ready()
+            if chat is not None:
+                delay = self._take_token(now)
+                if not delay:
+                    self._dispatch(chat_id, chat, now)
+                    continue
+                self._ready[chat.priority()].appendleft(chat_id)
+                timeout = delay if timeout is None else min(timeout, delay)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self, chat_id, chat: ChatQueue, now: float):
+        message = chat.pop()
+        chat.state = SENDING
+        task = asyncio.create_task(self._send(message))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    def _done(self, chat_id, delay: float):
+        """The chat's send finished; it may send again after `delay`."""
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            # stopped meanwhile
+            return
+        chat.next_at = max(chat.next_at, time.monotonic() + delay)
+        chat.state = IDLE
+        if chat.priority() is not None:
+            self._schedule(chat_id, chat)
+        else:
+            # keep the per-chat spacing for a while, then forget the chat
+            asyncio.get_running_loop().call_later(delay, self._forget, chat_id)
+
+    def _forget(self, chat_id):
+        chat = self._chats.get(chat_id)
+        if chat is not None and chat.state == IDLE and chat.priority() is None:
+            del self._chats[chat_id]
+
+    def _requeue(self, message: OutboundMessage, delay: float):
+        chat = self._chats.get(message.chat_id)
+        if chat is None:
+            # stopped meanwhile
+            message.future.cancel()
+            return
+        chat.queues[message.priority].appendleft(message)
+        self._done(message.chat_id, delay)
+
+    async def _send(self, message: OutboundMessage):
+        latency = time.monotonic() - message.enqueued_at
+        try:
+            result = await getattr(self.bot, message.method)(
+                chat_id=message.chat_id, **message.kwargs
+            )
+        except RetryAfter as e:
+            self.stats.retried += 1
+            retry_after = e.retry_after
+            if hasattr(retry_after, "total_seconds"):
+                retry_after = retry_after.total_seconds()
+            logger.warning("Flood limit hit for %s, retrying in %ss", message.chat_id, retry_after)
+            self._hold(retry_after)
+            self._requeue(message, retry_after)
+            return
+        except Exception as e:
+            self.stats.failed += 1
+            self._pending.pop(message.key, None)
+            if not message.future.done():
+                message.future.set_exception(e)
+            self._done(message.chat_id, self.per_chat_interval)
+            return
+
+        self.stats.sent += 1
+        self.stats.latency_total += latency
+        self.stats.latency_max = max(self.stats.latency_max, latency)
+        self._pending.pop(message.key, None)
+        if not message.future.done():
+            message.future.set_result(result)
+        self._done(message.chat_id, self.per_chat_interval)
+
+
+outbox = Outbox(settings.OUTBOX_GLOBAL_RATE, settings.OUTBOX_PER_CHAT_INTERVAL)
@@ -0,0 +1,191 @@
+"""Paginated list views: /my_campaigns and /withdraw_history.
+
+A command sends the first page with prev/next buttons; pressing one edits
+the same message in place. The buttons carry everything needed to show
+their page in the callback data (`pg:<view><direction><cursor>`): whose
+list it is and the keyset position to go on from, packed into 32 bytes
+and base64 encoded. "Next" continues after the last row shown, "Prev"
+goes back from the first one, so paging works on any worker and after a
+restart. Rendered pages are kept in `view_cache`, so flipping back and
+forth doesn't query the database again until the owner's data changes.
+"""
+import base64
+import datetime
+import struct
+import uuid
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import BadRequest
+from telegram.ext._contexttypes import ContextTypes
+
+from internal.dao.campaign import CAMPAIGNS_VIEW, get_campaigns_page
+from internal.dao.donation_ledger import WITHDRAWALS_VIEW, get_withdrawals_page
+from internal.view_cache import view_cache
+
+from app.telegram_app import webhook_reply
+from app.telegram_app.outbox import outbox
+
+CALLBACK_PREFIX = "pg:"
+PAGE_SIZE = 10
+NEXT = "n"
+PREV = "p"
+
+EXPIRED_MESSAGE = "This list has expired, please send the command again."
+
+EPOCH = datetime.datetime(1970, 1, 1)
+CURSOR = struct.Struct(">qq16s")
+
+
+def _microseconds(moment: datetime.datetime):
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (moment - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def encode_cursor(telegram_id: str, position):
+    """Pack an owner and a `(created_at, id)` position for callback data."""
+    created_at, id = position
+    raw = CURSOR.pack(int(telegram_id), _microseconds(created_at), id.bytes)
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """The owner and position `encode_cursor` packed, or None if invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        telegram_id, microseconds, id = CURSOR.unpack(raw)
+    except (ValueError, struct.error):
+        return None
+    created_at = EPOCH + datetime.timedelta(microseconds=microseconds)
+    return str(telegram_id), (created_at, uuid.UUID(bytes=id))
+
+
+def format_amount(amount: int, currency: str):
+    """Amounts are stored in the smallest currency unit."""
+    return f"{amount / 100:,.2f} {currency}"
+
+
+def _render_campaigns(telegram_id: str, after, before):
+    campaigns, more = get_campaigns_page(telegram_id, after, PAGE_SIZE, before)
+    if not campaigns:
+        return "You have no campaigns yet. Create one with /create_campaign.", None, None, False
+    lines = ["Your campaigns:", ""]
+    for campaign in campaigns:
+        status = getattr(campaign.status, "value", campaign.status)
+        lines.append(
+            f"• {campaign.title} ({status})\n"
+            f"  {format_amount(campaign.raised_amount, campaign.currency)}"
+            f" of {format_amount(campaign.goal_amount, campaign.currency)},"
+            f" {campaign.donor_count} donors"
+        )
+    first, last = campaigns[0], campaigns[-1]
+    return "\n".join(lines), (first.created_at, first.id), (last.created_at, last.id), more
+
+
+def _render_withdrawals(telegram_id: str, after, before):
+    rows, more = get_withdrawals_page(telegram_id, after, PAGE_SIZE, before)
+    if not rows:
+        return "You have no withdrawals yet.", None, None, False
+    lines = ["Your withdrawals:", ""]
+    for entry, title in rows:
+        lines.append(
+            f"• {entry.created_at:%Y-%m-%d} {format_amount(-entry.amount, entry.currency)}"
+            f" from {title}"
+        )
+    first, last = rows[0][0], rows[-1][0]
+    return "\n".join(lines), (first.created_at, first.id), (last.created_at, last.id), more
+
+
+# view name -> (callback code, view_cache namespace, renderer)
+VIEWS = {
+    "my_campaigns": ("c", CAMPAIGNS_VIEW, _render_campaigns),
+    "withdraw_history": ("w", WITHDRAWALS_VIEW, _render_withdrawals),
+}
+VIEW_CODES = {code: view for view, (code, _, _) in VIEWS.items()}
+
+
+def _button(label: str, view: str, direction: str, telegram_id: str, position):
+    code = VIEWS[view][0]
+    data = f"{CALLBACK_PREFIX}{code}{direction}{encode_cursor(telegram_id, position)}"
+    return InlineKeyboardButton(label, callback_data=data)
+
+
+def render(view: str, telegram_id: str, direction: str = NEXT, position=None):
+    """Text and keyboard of the page after (NEXT) or before (PREV) `position`.
+
+    Without a position it is the first page.
+    """
+    _, namespace, renderer = VIEWS[view]
+    key = (view, direction, position)
+    page = view_cache.get(namespace, telegram_id, key)
+    if page is None:
+        after, before = (position, None) if direction == NEXT else (None, position)
+        page = renderer(telegram_id, after, before)
+        view_cache.put(namespace, telegram_id, key, page)
+    text, first, last, more = page
+    if first is None and position is not None:
+        # everything on that side is gone, start over
+        return render(view, telegram_id)
+
+    has_prev = more if direction == PREV else position is not None
+    has_next = more if direction == NEXT else True
+    buttons = []
+    if first is not None and has_prev:
+        buttons.append(_button("« Prev", view, PREV, telegram_id, first))
+    if last is not None and has_next:
+        buttons.append(_button("Next »", view, NEXT, telegram_id, last))
+    markup = InlineKeyboardMarkup([buttons]) if buttons else None
+    return text, markup
+
+
+async def _send_first_page(update: Update, view: str):
+    text, markup = render(view, str(update.message.from_user.id))
+    await outbox.send_message(update.message.chat_id, text, reply_markup=markup)
+
+
+async def my_campaigns(update: Update, _: ContextTypes.DEFAULT_TYPE):
+    """List the user's campaigns, a page at a time."""
+    await _send_first_page(update, "my_campaigns")
+
+
+async def withdraw_history(update: Update, _: ContextTypes.DEFAULT_TYPE):
+    """List the user's withdrawals, a page at a time."""
+    await _send_first_page(update, "withdraw_history")
+
+
+async def change_page(update: Update, _: ContextTypes.DEFAULT_TYPE):
+    """Show the page a prev/next button points to, in the same message."""
+    query = update.callback_query
+    data = query.data[len(CALLBACK_PREFIX):]
+    view = VIEW_CODES.get(data[:1])
+    direction = data[1:2]
+    cursor = decode_cursor(data[2:])
+    if (
+        view is None
+        or direction not in (NEXT, PREV)
+        or cursor is None
+        or cursor[0] != str(query.from_user.id)
+    ):
+        if not webhook_reply.reply_with(
+            "answerCallbackQuery", callback_query_id=query.id, text=EXPIRED_MESSAGE
+        ):
+            await query.answer(EXPIRED_MESSAGE)
+        return
+
+    # stop the button's loading spinner for free, in the webhook response
+    if not webhook_reply.reply_with("answerCallbackQuery", callback_query_id=query.id):
+        await query.answer()
+    telegram_id, position = cursor
+    text, markup = render(view, telegram_id, direction, position)
+    try:
+        await outbox.send(
+            "edit_message_text",
+            query.message.chat_id,
+            message_id=query.message.message_id,
+            text=text,
+            reply_markup=markup,
+        )
+    except BadRequest as e:
+        # a double tap asks for the page that's already shown
+        if "not modified" not in str(e).lower():
+            raise
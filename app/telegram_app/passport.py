@@ -1,20 +1,42 @@
+import asyncio
+import logging
 from secrets import token_urlsafe
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext._contexttypes import ContextTypes
 
 from internal.dao.user import create_user, get_user
 from internal.dao.session import create_session, get_session
+from internal.dao.job import enqueue_job
+from internal.dao.telegram_verification import save_verification
+from internal.identity_index import DOCUMENT_NUMBER, check_submission, document_hash, image_file_hash
+from internal.jobs import register
+from app.models.telegram_verification import TelegramVerificationSchema
 from app.models.user import UserSchema
 from app.telegram_app import constants
+from app.telegram_app.outbox import outbox
 from app.settings import settings
 
+logger = logging.getLogger(__name__)
+
+PROCESS_PASSPORT_DATA = "passport.process"
+
+# Verification column each decrypted passport element is stored in
+DOCUMENT_FIELDS = {
+    "personal_details": "personal_details",
+    "passport": "passport_data",
+    "internal_passport": "passport_data",
+    "driver_license": "driver_license",
+    "identity_card": "identity_card",
+    "address": "address",
+}
+
 
 async def verify_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Echo the user message."""
     chat_id = update.message.chat.id
     chat_type = update.message.chat.type
     if chat_type != "private":
-        await update.message.reply_text(constants.USE_ONLY_PRIVATE_CHAT)
+        await outbox.send_message(chat_id, constants.USE_ONLY_PRIVATE_CHAT)
         return {"status": "error"}
 
     user_id = update.message.from_user.id
@@ -26,7 +48,7 @@ async def verify_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_details = UserSchema(**user_data)
         create_user(user_details)
         message = constants.WELLCOME_MESSAGE.format(first_name=user_details.first_name)
-        await context.bot.send_message(chat_id=chat_id, text=message)
+        await outbox.send_message(chat_id, message)
         return {"status": "ok"}
 
     message = constants.VERIFY_IDENTIFY
@@ -40,9 +62,7 @@ async def verify_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         ],
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    await context.bot.send_message(
-        chat_id=chat_id, text=message, reply_markup=reply_markup
-    )
+    await outbox.send_message(chat_id, message, reply_markup=reply_markup)
 
     # save token to session
     create_session(user_id, token, None)
@@ -50,22 +70,30 @@ async def verify_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def get_passport_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Downloads and prints the received passport data."""
+    """Queue the received passport data and acknowledge it right away."""
+    user = update.message.from_user
+    enqueue_job(PROCESS_PASSPORT_DATA, {"update": update.to_dict()})
+    await outbox.send_message(user.id, constants.DOCUMENT_RECIEVED.format(first_name=user.first_name))
+
+
+@register(PROCESS_PASSPORT_DATA, concurrency=2)
+async def process_passport_data(bot, payload: dict) -> None:
+    """Downloads and stores the received passport data."""
+    update = Update.de_json(payload["update"], bot)
     # Retrieve passport data
     passport_data = update.message.passport_data
     token = passport_data.decrypted_credentials.nonce
     session = get_session(token=token)
     if not session:
-        print("session not found")
+        logger.warning("Passport session not found for user %s", update.message.from_user.id)
     
     user = update.message.from_user
+    verification = TelegramVerificationSchema(telegram_id=str(user.id))
+    fingerprints = []
 
     for data in passport_data.decrypted_data:
         if data.type == "phone_number":
-            print("Phone: ", data.phone_number)
-
-        elif data.type == "email":
-            print("Email: ", data.email)
+            verification.phone_number = data.phone_number
 
         if data.type in (
             "personal_details",
@@ -75,7 +103,10 @@ async def get_passport_data(update: Update, context: ContextTypes.DEFAULT_TYPE)
             "internal_passport",
             "address",
         ):
-            print(data.type, data.data)
+            setattr(verification, DOCUMENT_FIELDS[data.type], data.data.to_dict())
+            document_no = getattr(data.data, "document_no", None)
+            if document_no:
+                fingerprints.append((DOCUMENT_NUMBER, document_hash(document_no)))
 
         if data.type in (
             "utility_bill",
@@ -84,10 +115,16 @@ async def get_passport_data(update: Update, context: ContextTypes.DEFAULT_TYPE)
             "passport_registration",
             "temporary_registration",
         ):
-            print(data.type, len(data.files), "files")
+            files = {"files": [file.file_id for file in data.files]}
+            if data.type in ("utility_bill", "bank_statement"):
+                setattr(verification, data.type, files)
+            else:
+                verification.address_documents = {
+                    **(verification.address_documents or {}),
+                    data.type: files,
+                }
             for file in data.files:
                 actual_file = await file.get_file()
-                print(actual_file)
                 await actual_file.download_to_drive()
         if (
             data.type
@@ -95,20 +132,22 @@ async def get_passport_data(update: Update, context: ContextTypes.DEFAULT_TYPE)
             and data.front_side
         ):
             front_file = await data.front_side.get_file()
-            print(data.type, front_file)
-            await front_file.download_to_drive()
-        if data.type in ("driver_license" and "identity_card") and data.reverse_side:
+            path = await front_file.download_to_drive()
+            verification.identity_front_side = data.front_side.file_id
+            fingerprints.append(("front_side", await asyncio.to_thread(image_file_hash, path)))
+        if data.type in ("driver_license", "identity_card") and data.reverse_side:
             reverse_file = await data.reverse_side.get_file()
-            print(data.type, reverse_file)
             await reverse_file.download_to_drive()
+            verification.identity_reverse_side = data.reverse_side.file_id
         if (
             data.type
             in ("passport", "driver_license", "identity_card", "internal_passport")
             and data.selfie
         ):
             selfie_file = await data.selfie.get_file()
-            print(data.type, selfie_file)
-            await selfie_file.download_to_drive()
+            path = await selfie_file.download_to_drive()
+            verification.selfie = data.selfie.file_id
+            fingerprints.append(("selfie", await asyncio.to_thread(image_file_hash, path)))
         if data.translation and data.type in (
             "passport",
             "driver_license",
@@ -120,10 +159,9 @@ async def get_passport_data(update: Update, context: ContextTypes.DEFAULT_TYPE)
             "passport_registration",
             "temporary_registration",
         ):
-            print(data.type, len(data.translation), "translation")
             for file in data.translation:
                 actual_file = await file.get_file()
-                print(actual_file)
                 await actual_file.download_to_drive()
 
-    await context.bot.send_message(user.id, constants.DOCUMENT_RECIEVED.format(first_name=user.first_name)) 
\ No newline at end of file
+    verification.duplicate_matches = check_submission(verification.telegram_id, fingerprints) or None
+    save_verification(verification)
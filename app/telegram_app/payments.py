@@ -0,0 +1,172 @@
+"""Donations paid through Telegram Payments.
+
+Telegram waits at most 10 seconds for the answer to a pre_checkout_query
+and cancels the payment after that. So the webhook route answers it
+before the update reaches PTB (`answer_pre_checkout_query`), in the
+webhook response body, after checking the invoice payload against
+`payable_campaigns`. That is an in-memory map of the campaigns accepting
+donations, kept current by the NOTIFY each campaign change sends and
+refreshed in the background, so the answer never waits on the database.
+
+The successful_payment message only enqueues a job. The job records the
+donation, idempotently on the charge id, and thanks the donor.
+"""
+import asyncio
+import json
+import logging
+import uuid
+
+from telegram import Update
+from telegram.ext._contexttypes import ContextTypes
+
+from app.models.donation import DonationSchema
+from app.telegram_app import constants
+from app.telegram_app.outbox import outbox
+from db_connections import session
+from internal.dao.campaign import CAMPAIGNS_CHANNEL, get_campaign, get_payable_campaigns
+from internal.dao.donation import record_donation
+from internal.dao.job import enqueue_job
+from internal.jobs import register
+from internal.pg_listener import pg_listener
+
+logger = logging.getLogger(__name__)
+
+RECORD_PAYMENT = "payment.record"
+INVOICE_PAYLOAD_PREFIX = "donate:"
+
+
+def invoice_payload(campaign_id):
+    """Payload of a donation invoice for a campaign."""
+    return f"{INVOICE_PAYLOAD_PREFIX}{campaign_id}"
+
+
+def parse_invoice_payload(payload: str):
+    """Campaign id of a donation invoice payload, or None."""
+    if not payload or not payload.startswith(INVOICE_PAYLOAD_PREFIX):
+        return None
+    try:
+        return uuid.UUID(payload[len(INVOICE_PAYLOAD_PREFIX):])
+    except ValueError:
+        return None
+
+
+class PayableCampaigns:
+    """Currency of each campaign accepting donations, kept in memory.
+
+    Campaign changes arrive on CAMPAIGNS_CHANNEL; the periodic refresh
+    catches up on any missed while LISTEN was down. An id missing from
+    the map is answered as closed, whatever it is, without a lookup.
+    """
+
+    def __init__(self):
+        self._currencies = {}
+
+    def refresh(self):
+        self._currencies = get_payable_campaigns()
+
+    def currency(self, campaign_id):
+        return self._currencies.get(campaign_id)
+
+    def on_notify(self, payload: str):
+        """pg_listener callback for CAMPAIGNS_CHANNEL."""
+        event = json.loads(payload)
+        campaign_id = uuid.UUID(event["id"])
+        if event["payable"]:
+            self._currencies[campaign_id] = event["currency"]
+        else:
+            self._currencies.pop(campaign_id, None)
+
+    def start(self):
+        """Follow campaign changes; call `refresh` after, so none is missed in between."""
+        try:
+            pg_listener.subscribe(CAMPAIGNS_CHANNEL, self.on_notify)
+        except Exception:
+            # pg_listener keeps the subscription and LISTENs once it reconnects
+            logger.exception("Could not LISTEN for campaigns, relying on the periodic refresh")
+
+    def stop(self):
+        pg_listener.unsubscribe(CAMPAIGNS_CHANNEL, self.on_notify)
+
+
+payable_campaigns = PayableCampaigns()
+
+
+def answer_pre_checkout_query(query: dict):
+    """The answerPreCheckoutQuery call for a pre_checkout_query update."""
+    error = None
+    campaign_id = parse_invoice_payload(query.get("invoice_payload"))
+    if campaign_id is None:
+        error = constants.PAYMENT_INVALID_MESSAGE
+    else:
+        currency = payable_campaigns.currency(campaign_id)
+        if currency is None:
+            error = constants.PAYMENT_CAMPAIGN_CLOSED_MESSAGE
+        elif currency != query.get("currency") or query.get("total_amount", 0) <= 0:
+            error = constants.PAYMENT_INVALID_MESSAGE
+
+    answer = {"method": "answerPreCheckoutQuery", "pre_checkout_query_id": query["id"]}
+    if error:
+        logger.warning("Rejected pre-checkout %s: %s", query["id"], error)
+        answer.update(ok=False, error_message=error)
+    else:
+        answer["ok"] = True
+    return answer
+
+
+async def successful_payment(update: Update, _: ContextTypes.DEFAULT_TYPE):
+    """Hand a successful payment to a job; recording it can take its time."""
+    payment = update.message.successful_payment
+    enqueue_job(
+        RECORD_PAYMENT,
+        {
+            "chat_id": update.message.chat_id,
+            "donor_telegram_id": str(update.message.from_user.id),
+            "invoice_payload": payment.invoice_payload,
+            "amount": payment.total_amount,
+            "currency": payment.currency,
+            "telegram_payment_charge_id": payment.telegram_payment_charge_id,
+            "provider_payment_charge_id": payment.provider_payment_charge_id,
+        },
+    )
+
+
+@register(RECORD_PAYMENT, concurrency=4)
+async def record_payment(bot, payload: dict) -> None:
+    """Record the donation of a successful payment, once."""
+    campaign_id = parse_invoice_payload(payload["invoice_payload"])
+    if campaign_id is None:
+        # charged for something that isn't a donation; keep it for a human
+        raise ValueError(f"Unknown invoice payload {payload['invoice_payload']!r}")
+    campaign = get_campaign(campaign_id)
+    if campaign is not None and campaign.currency != payload["currency"]:
+        # paid against a stale pre-checkout answer; summing it into the
+        # campaign's totals would mix currencies, so keep it for a human
+        raise ValueError(
+            f"Payment {payload['telegram_payment_charge_id']} in {payload['currency']} "
+            f"does not match campaign {campaign_id}"
+        )
+    donation, created = record_donation(
+        DonationSchema(
+            campaign_id=campaign_id,
+            donor_telegram_id=payload["donor_telegram_id"],
+            amount=payload["amount"],
+            currency=payload["currency"],
+            telegram_payment_charge_id=payload["telegram_payment_charge_id"],
+            provider_payment_charge_id=payload["provider_payment_charge_id"],
+        )
+    )
+    if created:
+        await outbox.send_message(payload["chat_id"], constants.DONATION_THANKS_MESSAGE)
+
+
+async def refresh_payable_campaigns_forever(interval: float = 10.0):
+    """Always run this function in background.
+    It keeps `payable_campaigns` at most `interval` seconds behind.
+    """
+    while True:
+        try:
+            payable_campaigns.refresh()
+        except Exception:
+            session.rollback()
+            logger.exception("Refreshing payable campaigns failed")
+        await asyncio.sleep(interval)
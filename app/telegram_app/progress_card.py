@@ -0,0 +1,45 @@
+"""Send campaign progress cards, uploading each card at most once.
+
+The first send of a card uploads the PNG; Telegram's file_id of it is
+then kept in memory and in the database, so later sends of the same card
+reference it and upload nothing.
+"""
+from collections import OrderedDict
+
+from app.telegram_app.outbox import TRANSACTIONAL, outbox
+from app.telegram_app.pagination import format_amount
+from internal.dao.progress_card import get_card_file_id, save_card_file_id
+from internal.progress_card import card_key, progress_bucket, progress_cards
+
+MAX_FILE_IDS = 10000
+
+# card key -> file_id, least recently used first
+_file_ids = OrderedDict()
+
+
+def _remember(key: str, file_id: str):
+    _file_ids[key] = file_id
+    _file_ids.move_to_end(key)
+    while len(_file_ids) > MAX_FILE_IDS:
+        _file_ids.popitem(last=False)
+
+
+async def send_progress_card(chat_id: int, campaign, caption: str, priority: int = TRANSACTIONAL, **kwargs):
+    """Send a campaign's progress card with `caption`, or just the caption without Pillow."""
+    if not progress_cards.enabled:
+        return await outbox.send_message(chat_id, caption, priority, **kwargs)
+
+    key = card_key(campaign, progress_bucket(campaign.raised_amount, campaign.goal_amount))
+    file_id = _file_ids.get(key) or get_card_file_id(key)
+    if file_id:
+        _remember(key, file_id)
+        return await outbox.send("send_photo", chat_id, priority, photo=file_id, caption=caption, **kwargs)
+
+    key, content = await progress_cards.get(
+        campaign, format_amount(campaign.goal_amount, campaign.currency)
+    )
+    message = await outbox.send("send_photo", chat_id, priority, photo=content, caption=caption, **kwargs)
+    file_id = message.photo[-1].file_id
+    _remember(key, file_id)
+    save_card_file_id(key, file_id)
+    return message
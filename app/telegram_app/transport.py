@@ -0,0 +1,184 @@
+"""Separate connection pools for Bot API calls and file downloads.
+
+PTB sends both API methods and file downloads through the bot's single
+request object. `RoutingRequest` is that object: it looks at the URL and
+hands file downloads (`/file/bot<token>/...`) to their own pool, so a few
+large passport downloads can't hold every connection while a chat reply
+waits.
+
+Each pool is guarded by a semaphore of its size; the time spent waiting
+on it is the pool wait, recorded per pool and bounded by `pool_timeout`.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+
+import httpx
+from telegram.error import TimedOut
+from telegram.request import BaseRequest, HTTPXRequest
+
+from app.settings import settings
+from internal.metrics import BOT_API_DURATION, BOT_API_ERRORS
+
+FILE_PATH_MARKER = "/file/bot"
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    in_flight: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def as_dict(self, size: int):
+        return {
+            "size": size,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "wait_avg": self.wait_total / self.requests if self.requests else 0.0,
+            "wait_max": self.wait_max,
+        }
+
+
+class Pool:
+    def __init__(self, name: str, size: int, read_timeout: float, keepalive: float, http2: bool):
+        self.name = name
+        self.size = size
+        self.stats = PoolStats()
+        # created in initialize, on the loop that uses it
+        self._semaphore = None
+        self.request = HTTPXRequest(
+            connection_pool_size=size,
+            read_timeout=read_timeout,
+            write_timeout=read_timeout,
+            connect_timeout=settings.BOT_API_CONNECT_TIMEOUT,
+            pool_timeout=settings.BOT_API_POOL_TIMEOUT,
+            http_version="2" if http2 else "1.1",
+            httpx_kwargs={
+                "limits": httpx.Limits(
+                    max_connections=size,
+                    max_keepalive_connections=size,
+                    keepalive_expiry=keepalive,
+                ),
+            },
+        )
+
+    async def initialize(self):
+        self._semaphore = asyncio.Semaphore(self.size)
+        await self.request.initialize()
+
+    async def shutdown(self):
+        await self.request.shutdown()
+
+    def _release_unused(self, acquire):
+        # a slot granted just as the caller gave up
+        if not acquire.cancelled() and acquire.exception() is None:
+            self._semaphore.release()
+
+    async def _acquire(self, timeout):
+        """Take a slot within `timeout` seconds or raise TimedOut.
+
+        Not `wait_for`: before Python 3.12 it can time out or be cancelled
+        after the acquire succeeded, and that slot would never come back.
+        """
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            await asyncio.wait((acquire,), timeout=timeout)
+        except asyncio.CancelledError:
+            acquire.cancel()
+            acquire.add_done_callback(self._release_unused)
+            raise
+        if not acquire.done():
+            acquire.cancel()
+            acquire.add_done_callback(self._release_unused)
+            raise TimedOut(
+                f"Pool timeout: all {self.size} connections of the {self.name} pool are busy"
+            )
+
+    async def do_request(self, *args, **kwargs):
+        pool_timeout = kwargs.get("pool_timeout", BaseRequest.DEFAULT_NONE)
+        if pool_timeout is BaseRequest.DEFAULT_NONE:
+            pool_timeout = settings.BOT_API_POOL_TIMEOUT
+        started = time.monotonic()
+        await self._acquire(pool_timeout)
+        try:
+            wait = time.monotonic() - started
+            self.stats.requests += 1
+            self.stats.wait_total += wait
+            self.stats.wait_max = max(self.stats.wait_max, wait)
+            self.stats.in_flight += 1
+            try:
+                return await self.request.do_request(*args, **kwargs)
+            finally:
+                self.stats.in_flight -= 1
+        finally:
+            self._semaphore.release()
+
+
+class RoutingRequest(BaseRequest):
+    def __init__(self):
+        self.api = Pool(
+            "api",
+            settings.BOT_API_POOL_SIZE,
+            settings.BOT_API_READ_TIMEOUT,
+            settings.BOT_API_KEEPALIVE,
+            settings.BOT_API_HTTP2,
+        )
+        self.files = Pool(
+            "files",
+            settings.BOT_FILE_POOL_SIZE,
+            settings.BOT_FILE_READ_TIMEOUT,
+            settings.BOT_API_KEEPALIVE,
+            settings.BOT_API_HTTP2,
+        )
+
+    @property
+    def read_timeout(self):
+        return self.api.request.read_timeout
+
+    async def initialize(self):
+        await self.api.initialize()
+        await self.files.initialize()
+
+    async def shutdown(self):
+        await self.api.shutdown()
+        await self.files.shutdown()
+
+    async def do_request(
+        self,
+        url,
+        method,
+        request_data=None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ):
+        if FILE_PATH_MARKER in url:
+            pool, api_method = self.files, "file_download"
+        else:
+            pool, api_method = self.api, url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await pool.do_request(
+                url=url,
+                method=method,
+                request_data=request_data,
+                read_timeout=read_timeout,
+                write_timeout=write_timeout,
+                connect_timeout=connect_timeout,
+                pool_timeout=pool_timeout,
+            )
+        except Exception:
+            BOT_API_ERRORS.inc(api_method)
+            raise
+        finally:
+            BOT_API_DURATION.observe(time.perf_counter() - started, api_method)
+        if code >= 400:
+            BOT_API_ERRORS.inc(api_method)
+        return code, payload
+
+    def stats(self):
+        return {
+            pool.name: pool.stats.as_dict(pool.size) for pool in (self.api, self.files)
+        }
@@ -0,0 +1,45 @@
+"""Answer an update in the body of the webhook response.
+
+Telegram accepts one Bot API method call as the response to a webhook
+request. Replying that way saves the outbound HTTPS call, but there is no
+result to look at, so it only suits fire-and-forget replies such as /help.
+
+The webhook route opens a slot with `collect()` before processing the
+update; handlers run in the same task, so `send_message` can claim the
+slot. Later replies, or replies outside a webhook request, go through the
+outbox as usual.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.telegram_app.outbox import outbox
+
+_reply = ContextVar("webhook_reply", default=None)
+
+
+@contextmanager
+def collect():
+    """Open the reply slot for the current webhook request."""
+    slot = {}
+    token = _reply.set(slot)
+    try:
+        yield slot
+    finally:
+        _reply.reset(token)
+
+
+def reply_with(method: str, **params):
+    """Claim the reply slot for `method`; False if it's unavailable."""
+    slot = _reply.get()
+    if slot is None or slot:
+        return False
+    slot["method"] = method
+    slot.update({key: value for key, value in params.items() if value is not None})
+    return True
+
+
+async def send_message(chat_id: int, text: str, **kwargs):
+    """sendMessage in the webhook response if possible, else via the outbox."""
+    if reply_with("sendMessage", chat_id=chat_id, text=text, **kwargs):
+        return None
+    return await outbox.send_message(chat_id, text, **kwargs)
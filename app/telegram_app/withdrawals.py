@@ -0,0 +1,164 @@
+"""/withdraw and the periodic settlement of withdrawals.
+
+A request reserves the amount on the campaign straight away. Payout runs
+settle everything pending in batches every SETTLEMENT_INTERVAL seconds.
+Requests are keyed by the Telegram message they came from, so a
+redelivered update or a second tap on the same button never withdraws
+twice.
+"""
+import asyncio
+import decimal
+import logging
+import uuid
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext._contexttypes import ContextTypes
+
+from app.telegram_app import constants, webhook_reply
+from app.telegram_app.outbox import BULK, outbox
+from app.telegram_app.pagination import format_amount
+from db_connections import session
+from internal.dao.campaign import get_campaign, get_campaigns_by_owner
+from internal.dao.donation_ledger import WITHDRAWALS_VIEW
+from internal.dao.telegram_verification import is_verified
+from internal.dao.withdrawal import (
+    get_available_balance,
+    request_withdrawal,
+    settle_pending_withdrawals,
+)
+from internal.view_cache import view_cache
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_PREFIX = "wd:"
+MAX_CAMPAIGN_BUTTONS = 10
+
+
+def parse_amount(text: str):
+    """'25' or '25.50' in the smallest currency unit, or None."""
+    try:
+        amount = decimal.Decimal(text)
+    except decimal.InvalidOperation:
+        return None
+    if not amount.is_finite() or amount <= 0 or amount != amount.quantize(decimal.Decimal("0.01")):
+        return None
+    return int(amount * 100)
+
+
+def _withdraw(owner_telegram_id: str, campaign_id, amount: int, idempotency_key: str):
+    """Request a withdrawal and return the message telling the owner how it went."""
+    withdrawal, _ = request_withdrawal(owner_telegram_id, campaign_id, amount, idempotency_key)
+    campaign = get_campaign(campaign_id)
+    if withdrawal is not None:
+        return constants.WITHDRAW_REQUESTED_MESSAGE.format(
+            amount=format_amount(withdrawal.amount, withdrawal.currency),
+            title=campaign.title,
+        )
+    if campaign is None or campaign.owner_telegram_id != owner_telegram_id:
+        return constants.WITHDRAW_NO_CAMPAIGNS_MESSAGE
+    return constants.WITHDRAW_INSUFFICIENT_MESSAGE.format(
+        available=format_amount(max(get_available_balance(campaign), 0), campaign.currency)
+    )
+
+
+async def withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Withdraw funds from one of the user's campaigns: /withdraw <amount>."""
+    chat_id = update.message.chat_id
+    owner_telegram_id = str(update.message.from_user.id)
+    amount = parse_amount(context.args[0]) if len(context.args) == 1 else None
+    if amount is None:
+        await webhook_reply.send_message(chat_id, constants.WITHDRAW_USAGE_MESSAGE)
+        return
+    if not is_verified(owner_telegram_id):
+        await webhook_reply.send_message(chat_id, constants.VERIFY_IDENTIFY)
+        return
+
+    campaigns = get_campaigns_by_owner(owner_telegram_id)
+    if not campaigns:
+        await webhook_reply.send_message(chat_id, constants.WITHDRAW_NO_CAMPAIGNS_MESSAGE)
+        return
+    if len(campaigns) == 1:
+        key = f"{chat_id}:{update.message.message_id}"
+        text = _withdraw(owner_telegram_id, campaigns[0].id, amount, key)
+        await webhook_reply.send_message(chat_id, text)
+        return
+
+    buttons = [
+        [InlineKeyboardButton(campaign.title, callback_data=f"{CALLBACK_PREFIX}{campaign.id.hex}:{amount}")]
+        for campaign in campaigns[:MAX_CAMPAIGN_BUTTONS]
+    ]
+    await outbox.send_message(
+        chat_id,
+        constants.WITHDRAW_CHOOSE_CAMPAIGN_MESSAGE,
+        reply_markup=InlineKeyboardMarkup(buttons),
+    )
+
+
+async def choose_campaign(update: Update, _: ContextTypes.DEFAULT_TYPE):
+    """Withdraw from the campaign picked on the /withdraw keyboard."""
+    query = update.callback_query
+    if not webhook_reply.reply_with("answerCallbackQuery", callback_query_id=query.id):
+        await query.answer()
+    campaign_id, _, amount = query.data[len(CALLBACK_PREFIX):].partition(":")
+    # every button of a keyboard shares its message, so only one can withdraw
+    key = f"{query.message.chat_id}:{query.message.message_id}"
+    text = _withdraw(str(query.from_user.id), uuid.UUID(campaign_id), int(amount), key)
+    await outbox.send(
+        "edit_message_text",
+        query.message.chat_id,
+        message_id=query.message.message_id,
+        text=text,
+    )
+
+
+# notification tasks still sending, so they aren't garbage collected
+_notifying = set()
+
+
+async def _notify_settled(withdrawals):
+    futures = [
+        outbox.send_message(
+            int(withdrawal.owner_telegram_id),
+            constants.WITHDRAW_SETTLED_MESSAGE.format(
+                amount=format_amount(withdrawal.amount, withdrawal.currency)
+            ),
+            priority=BULK,
+        )
+        for withdrawal in withdrawals
+    ]
+    await asyncio.gather(*futures, return_exceptions=True)
+
+
+async def settle_withdrawals_forever(interval: float = 300.0, batch_size: int = 500):
+    """Always run this function in background.
+    Every `interval` seconds it settles pending withdrawals in payout runs
+    of up to `batch_size`, until none are left.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        while True:
+            try:
+                run, withdrawals = settle_pending_withdrawals(batch_size)
+            except Exception:
+                session.rollback()
+                logger.exception("Settling withdrawals failed")
+                break
+            if run is None:
+                break
+            logger.info(
+                "Payout run %s: %s withdrawals over %s campaigns in %.3fs, latency avg %.0fs max %.0fs",
+                run.id,
+                run.withdrawal_count,
+                run.campaign_count,
+                run.duration_seconds,
+                run.latency_avg,
+                run.latency_max,
+            )
+            for withdrawal in withdrawals:
+                view_cache.invalidate(WITHDRAWALS_VIEW, withdrawal.owner_telegram_id)
+            # at bulk priority this can take a while, don't hold up the next run
+            task = asyncio.create_task(_notify_settled(withdrawals))
+            _notifying.add(task)
+            task.add_done_callback(_notifying.discard)
+            if len(withdrawals) < batch_size:
+                break
@@ -0,0 +1,157 @@
+"""Donations per second on a single hot campaign.
+
+First the counter UPDATE alone: adding every donation to the campaign
+row itself, then spreading them over counter shards. Then `create_donation`
+end to end, with the donation insert, the ledger append, the donor upsert
+and the NOTIFY, for each shard count. Only the end-to-end figures are
+what the payment path sustains. Needs the database from `make run-db`:
+
+    python -m benchmarks.hot_campaign --workers 32 --seconds 10
+
+The ledger is append-only, so the end-to-end runs leave their ledger
+entries behind; run it against a development database.
+"""
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy import create_engine, delete, update
+from sqlalchemy.orm import Session
+
+from app.models.campaign import Campaign, CampaignCounterShard
+from app.models.donation import CampaignDonor, Donation
+from db_connections import CONNECTION_STRING
+from internal.dao.campaign_counter import shard_increment
+
+
+def _single_row(session, campaign_id, shards):
+    session.execute(
+        update(Campaign)
+        .where(Campaign.id == campaign_id)
+        .values(raised_amount=Campaign.raised_amount + 100, donor_count=Campaign.donor_count + 1)
+    )
+
+
+def _sharded(session, campaign_id, shards):
+    session.execute(shard_increment(campaign_id, random.randrange(shards), 100, True))
+
+
+def run(engine, donate, campaign_id, workers: int, seconds: float, shards: int):
+    done = []
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        count = 0
+        with Session(engine) as session:
+            while time.monotonic() < deadline:
+                donate(session, campaign_id, shards)
+                session.commit()
+                count += 1
+        done.append(count)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(done) / seconds
+
+
+def _donation_worker(campaign_id, seconds: float, ready, results):
+    count = 0
+    try:
+        # imported in the worker: each process gets its own module-level session
+        from app.models.donation import DonationSchema
+        from internal.dao.donation import create_donation
+
+        ready.wait(timeout=60)
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            create_donation(
+                DonationSchema(
+                    campaign_id=campaign_id,
+                    donor_telegram_id=uuid4().hex,
+                    amount=100,
+                    currency="USD",
+                    telegram_payment_charge_id=f"benchmark-{uuid4()}",
+                )
+            )
+            count += 1
+    finally:
+        # a failed worker still reports, so the run doesn't wait for it forever
+        results.put(count)
+
+
+def run_end_to_end(engine, campaign_id, workers: int, seconds: float, shards: int):
+    """Donations per second through `create_donation`, one process per worker.
+
+    The DAOs share one session per process, so the workers are processes,
+    not threads.
+    """
+    with Session(engine) as session:
+        session.execute(update(Campaign).where(Campaign.id == campaign_id).values(counter_shards=shards))
+        session.commit()
+    context = multiprocessing.get_context("spawn")
+    # everyone starts together, once every process has imported the app
+    ready = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_donation_worker, args=(campaign_id, seconds, ready, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    done = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(done) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+    engine = create_engine(CONNECTION_STRING, pool_size=args.workers)
+
+    campaign_id = uuid4()
+    with Session(engine) as session:
+        session.add(
+            Campaign(
+                id=campaign_id,
+                owner_telegram_id="benchmark",
+                title="benchmark",
+                goal_amount=1,
+                currency="USD",
+                raised_amount=0,
+                donor_count=0,
+            )
+        )
+        session.commit()
+
+    try:
+        print("counter UPDATE only")
+        rate = run(engine, _single_row, campaign_id, args.workers, args.seconds, 1)
+        print(f"  campaign row           {rate:10.0f} updates/s")
+        for shards in args.shards:
+            rate = run(engine, _sharded, campaign_id, args.workers, args.seconds, shards)
+            print(f"  {shards:3d} counter shard(s)  {rate:10.0f} updates/s")
+        print("create_donation end to end")
+        for shards in args.shards:
+            rate = run_end_to_end(engine, campaign_id, args.workers, args.seconds, shards)
+            print(f"  {shards:3d} counter shard(s)  {rate:10.0f} donations/s")
+    finally:
+        with Session(engine) as session:
+            session.execute(delete(Donation).where(Donation.campaign_id == campaign_id))
+            session.execute(delete(CampaignDonor).where(CampaignDonor.campaign_id == campaign_id))
+            session.execute(delete(CampaignCounterShard).where(CampaignCounterShard.campaign_id == campaign_id))
+            session.execute(delete(Campaign).where(Campaign.id == campaign_id))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 from app.settings import settings
+from internal import db_events
 
 # Get the database connection information from the environment variables
 DB_NAME = settings.DB_NAME
@@ -13,4 +14,6 @@ PORT = settings.DB_PORT
 CONNECTION_STRING = f'postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DB_NAME}'
 # Create the database engine
 engine = create_engine(CONNECTION_STRING)
+# time every query per DAO function
+db_events.install(engine)
 session = Session(engine)
\ No newline at end of file
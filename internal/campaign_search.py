@@ -0,0 +1,93 @@
+"""Campaign search for inline queries, with an in-process prefix cache.
+
+Inline queries arrive on every keystroke, so most of them extend a query
+that was just answered: "hel", "help", "help m". Results are cached in
+`view_cache` per normalised query. When a query isn't cached but one of
+its prefixes is, and that prefix's result was complete (fewer hits than
+the limit), every match of the longer query is already among those hits.
+They are filtered in memory instead of querying Postgres. The filter
+matches words the same way the 'simple' text search configuration
+splits them, closely enough for typing-as-you-go. Filtered hits keep the
+prefix's ranking.
+"""
+import re
+import uuid
+from dataclasses import dataclass
+
+from internal.dao.campaign import SEARCH_VIEW, search_campaigns
+from internal.view_cache import view_cache
+
+WORD = re.compile(r"\w+")
+MAX_WORDS = 8
+
+
+@dataclass(frozen=True)
+class CampaignHit:
+    id: uuid.UUID
+    title: str
+    description: str
+    raised_amount: int
+    goal_amount: int
+    currency: str
+    donor_count: int
+    words: frozenset
+
+    @classmethod
+    def from_campaign(cls, campaign):
+        description = campaign.description or ""
+        return cls(
+            id=campaign.id,
+            title=campaign.title,
+            description=description,
+            raised_amount=campaign.raised_amount,
+            goal_amount=campaign.goal_amount,
+            currency=campaign.currency,
+            donor_count=campaign.donor_count,
+            words=frozenset(split_words(f"{campaign.title} {description}")),
+        )
+
+    def matches(self, words):
+        return all(any(own.startswith(word) for own in self.words) for word in words)
+
+
+def split_words(text: str):
+    return [word.lower() for word in WORD.findall(text)]
+
+
+def normalize_query(query: str):
+    """The query's words, lower case, in order, at most MAX_WORDS."""
+    return tuple(split_words(query)[:MAX_WORDS])
+
+
+def search(query: str, limit: int = 20, offset: int = 0):
+    """Hits for an inline query, best first."""
+    words = normalize_query(query)
+    if not words:
+        return []
+    key = (words, offset)
+    hits = view_cache.get(SEARCH_VIEW, None, key)
+    if hits is not None:
+        return hits
+
+    if offset == 0:
+        for prefix in _prefixes(words):
+            cached = view_cache.get(SEARCH_VIEW, None, (prefix, 0))
+            if cached is not None and len(cached) < limit:
+                hits = [hit for hit in cached if hit.matches(words)]
+                view_cache.put(SEARCH_VIEW, None, key, hits)
+                return hits
+
+    hits = [
+        CampaignHit.from_campaign(campaign)
+        for campaign in search_campaigns(words, limit, offset)
+    ]
+    view_cache.put(SEARCH_VIEW, None, key, hits)
+    return hits
+
+
+def _prefixes(words):
+    """Shorter queries whose results contain every result of `words`, longest first."""
+    for count in range(len(words), 0, -1):
+        head, last = words[:count - 1], words[count - 1]
+        for length in range(len(last) - (1 if count == len(words) else 0), 0, -1):
+            yield head + (last[:length],)
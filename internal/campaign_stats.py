@@ -0,0 +1,150 @@
+"""Live campaign totals for streaming to web viewers.
+
+Donations reach the hub through the NOTIFY `create_donation` sends, on
+the process's single LISTEN connection. A notification only marks its
+campaign dirty. Every `interval` the hub reads the exact totals of the
+dirty campaigns that have viewers, one query per campaign however many
+donations arrived, and offers them to the subscribers.
+
+A subscriber holds only the latest state. A viewer that reads slower
+than updates arrive skips the states it missed instead of queueing them,
+so a slow connection costs one slot of memory and never holds up the
+others.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+
+from app.settings import settings
+from db_connections import session
+from internal.dao.campaign_counter import get_campaign_totals
+from internal.dao.donation import DONATIONS_CHANNEL
+from internal.pg_listener import pg_listener
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    def __init__(self, campaign_id):
+        self.campaign_id = campaign_id
+        self._latest = None
+        self._ready = asyncio.Event()
+
+    def offer(self, state: dict):
+        """Replace the pending state; a state not read yet is dropped."""
+        self._latest = state
+        self._ready.set()
+
+    async def next(self, timeout: float = None):
+        """The latest state once there is one, or None after `timeout`."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        state, self._latest = self._latest, None
+        return state
+
+
+class CampaignStatsHub:
+    def __init__(self, interval: float = 1.0, max_subscribers: int = 10000):
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._subscribers = defaultdict(set)
+        self._count = 0
+        # campaign_id -> last state published, handed to new subscribers
+        self._states = {}
+        self._dirty = set()
+        self._task = None
+
+    def __len__(self):
+        return self._count
+
+    def _read_state(self, campaign_id):
+        totals = get_campaign_totals(campaign_id)
+        last = totals["last_donation_at"]
+        return {
+            "campaign_id": str(campaign_id),
+            "raised_amount": totals["raised_amount"],
+            "donor_count": totals["donor_count"],
+            "donation_count": totals["donation_count"],
+            "last_donation_at": last.isoformat() if last else None,
+        }
+
+    def subscribe(self, campaign_id):
+        """A subscriber with the campaign's current state, or None when full."""
+        if self._count >= self.max_subscribers:
+            return None
+        state = self._states.get(campaign_id)
+        if state is None:
+            state = self._states[campaign_id] = self._read_state(campaign_id)
+        subscriber = Subscriber(campaign_id)
+        subscriber.offer(state)
+        self._subscribers[campaign_id].add(subscriber)
+        self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._subscribers.get(subscriber.campaign_id)
+        if not subscribers or subscriber not in subscribers:
+            return
+        subscribers.remove(subscriber)
+        self._count -= 1
+        if not subscribers:
+            del self._subscribers[subscriber.campaign_id]
+            self._states.pop(subscriber.campaign_id, None)
+
+    def on_notify(self, payload: str):
+        """pg_listener callback for DONATIONS_CHANNEL."""
+        campaign_id = uuid.UUID(json.loads(payload)["campaign_id"])
+        if campaign_id in self._subscribers:
+            self._dirty.add(campaign_id)
+
+    def publish(self):
+        """Read and offer the totals of every campaign changed since the last call."""
+        dirty, self._dirty = self._dirty, set()
+        try:
+            for campaign_id in dirty:
+                subscribers = self._subscribers.get(campaign_id)
+                if not subscribers:
+                    continue
+                state = self._states[campaign_id] = self._read_state(campaign_id)
+                for subscriber in subscribers:
+                    subscriber.offer(state)
+        except Exception:
+            # try again next time; offering a state twice is harmless
+            self._dirty |= dirty
+            raise
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.publish()
+            except Exception:
+                session.rollback()
+                logger.exception("Publishing campaign stats failed")
+
+    def start(self):
+        try:
+            pg_listener.subscribe(DONATIONS_CHANNEL, self.on_notify)
+        except Exception:
+            # pg_listener keeps the subscription and LISTENs once it reconnects
+            logger.exception("Could not LISTEN for donations, stats streams stall until reconnected")
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        pg_listener.unsubscribe(DONATIONS_CHANNEL, self.on_notify)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+def format_event(state: dict):
+    """A state as a Server-Sent Event."""
+    return f"event: stats\nid: {state['donation_count']}\ndata: {json.dumps(state)}\n\n"
+
+
+campaign_stats = CampaignStatsHub(settings.STATS_STREAM_INTERVAL, settings.STATS_STREAM_MAX_SUBSCRIBERS)
@@ -0,0 +1,53 @@
+from uuid import uuid4
+
+from sqlalchemy import func
+
+from app.models.broadcast import Broadcast, BroadcastStatusEnum
+from db_connections import session
+
+
+def create_broadcast(text: str, total: int):
+    """Create a broadcast to `total` recipients."""
+    broadcast = Broadcast(text=text, total=total, id=uuid4())
+    session.add(broadcast)
+    session.commit()
+    return broadcast
+
+
+def get_broadcast(id):
+    """Get a broadcast by id."""
+    broadcast = (
+        session.query(Broadcast)
+        .filter(Broadcast.id == id)
+        .filter_by(is_deleted=False)
+        .first()
+    )
+    return broadcast
+
+
+def checkpoint_broadcast(broadcast: Broadcast, last_user_id, sent: int, failed: int, blocked: int, elapsed: float):
+    """Record the progress of one batch."""
+    broadcast.last_user_id = last_user_id
+    broadcast.sent_count = Broadcast.sent_count + sent
+    broadcast.failed_count = Broadcast.failed_count + failed
+    broadcast.blocked_count = Broadcast.blocked_count + blocked
+    broadcast.elapsed_seconds = Broadcast.elapsed_seconds + elapsed
+    session.commit()
+    return broadcast
+
+
+def resume_broadcast(broadcast: Broadcast):
+    """Set a paused broadcast running again under a new generation."""
+    broadcast.status = BroadcastStatusEnum.running
+    broadcast.generation = Broadcast.generation + 1
+    session.commit()
+    return broadcast
+
+
+def set_broadcast_status(broadcast: Broadcast, status: BroadcastStatusEnum):
+    """Change the status of a broadcast."""
+    broadcast.status = status
+    if status in (BroadcastStatusEnum.done, BroadcastStatusEnum.cancelled):
+        broadcast.finished_at = func.now()
+    session.commit()
+    return broadcast
@@ -0,0 +1,176 @@
+import json
+from uuid import uuid4
+
+from sqlalchemy import func, text, tuple_
+
+from app.models.campaign import Campaign, CampaignSchema, CampaignStatusEnum
+from db_connections import session
+from internal.view_cache import view_cache
+
+# view_cache namespace of the pages listing an owner's campaigns
+CAMPAIGNS_VIEW = "campaigns"
+# view_cache namespace of inline search results, shared by everyone
+SEARCH_VIEW = "campaign_search"
+# view_cache namespace of single campaigns, scoped by campaign id
+CAMPAIGN_VIEW = "campaign"
+
+# Channel notified whenever a campaign is created, updated or deleted; the
+# payload is a JSON object with id, currency and whether it is payable.
+CAMPAIGNS_CHANNEL = "campaigns"
+
+
+def _notify_changed(campaign: Campaign):
+    """Tell every process about the campaign on commit.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    # fill in the column defaults of a new campaign
+    session.flush()
+    payable = (
+        not campaign.is_deleted
+        and CampaignStatusEnum(campaign.status) == CampaignStatusEnum.active
+    )
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": CAMPAIGNS_CHANNEL,
+            "payload": json.dumps(
+                {"id": str(campaign.id), "currency": campaign.currency, "payable": payable}
+            ),
+        },
+    )
+
+
+def create_campaign(campaign: CampaignSchema):
+    """Create a campaign."""
+    campaign = Campaign(
+        **campaign.model_dump(
+            include={"owner_telegram_id", "title", "description", "goal_amount", "currency"}
+        ),
+        id=uuid4(),
+    )
+    session.add(campaign)
+    _notify_changed(campaign)
+    session.commit()
+    view_cache.invalidate(CAMPAIGNS_VIEW, campaign.owner_telegram_id)
+    view_cache.invalidate(SEARCH_VIEW, None)
+    return campaign
+
+
+def get_campaign(id):
+    """Get a campaign by id.
+
+    Its totals are the folded ones, a few seconds behind at most; use
+    `get_campaign_totals` when they must be exact.
+    """
+    campaign = session.get(Campaign, id)
+    if campaign is None or campaign.is_deleted:
+        return None
+    return campaign
+
+
+def get_campaigns_by_owner(owner_telegram_id: str):
+    """Get all campaigns of an owner, newest first."""
+    campaigns = (
+        session.query(Campaign)
+        .filter(Campaign.owner_telegram_id == owner_telegram_id)
+        .filter_by(is_deleted=False)
+        .order_by(Campaign.created_at.desc())
+        .all()
+    )
+    return campaigns
+
+
+def get_campaigns_page(owner_telegram_id: str, after=None, limit: int = 10, before=None):
+    """Get a page of an owner's campaigns, newest first, using keyset pagination.
+
+    `after` is the `(created_at, id)` of the last campaign of the previous
+    page; `before`, of the first campaign of the next page, to go back.
+    Returns the page, newest first, and whether there are more campaigns
+    past it in the direction of travel.
+    """
+    query = (
+        session.query(Campaign)
+        .filter(Campaign.owner_telegram_id == owner_telegram_id)
+        .filter_by(is_deleted=False)
+    )
+    position = tuple_(Campaign.created_at, Campaign.id)
+    if before:
+        query = query.filter(position > tuple_(*before)).order_by(
+            Campaign.created_at, Campaign.id
+        )
+    else:
+        if after:
+            query = query.filter(position < tuple_(*after))
+        query = query.order_by(Campaign.created_at.desc(), Campaign.id.desc())
+    campaigns = query.limit(limit + 1).all()
+    more = len(campaigns) > limit
+    campaigns = campaigns[:limit]
+    if before:
+        campaigns.reverse()
+    return campaigns, more
+
+
+def get_payable_campaigns():
+    """Currency of every campaign accepting donations, by campaign id."""
+    rows = (
+        session.query(Campaign.id, Campaign.currency)
+        .filter(Campaign.status == CampaignStatusEnum.active)
+        .filter_by(is_deleted=False)
+        .all()
+    )
+    return dict(rows)
+
+
+def search_campaigns(words, limit: int = 20, offset: int = 0):
+    """Full-text search of active campaigns, every word matched as a prefix.
+
+    `words` must already be split into plain word characters; the best
+    matches (title before description) come first.
+    """
+    if not words:
+        return []
+    query = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+    rank = func.ts_rank(Campaign.search_vector, query)
+    campaigns = (
+        session.query(Campaign)
+        .filter(Campaign.search_vector.op("@@")(query))
+        .filter(Campaign.status == CampaignStatusEnum.active)
+        .filter_by(is_deleted=False)
+        .order_by(rank.desc(), Campaign.raised_amount.desc(), Campaign.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return campaigns
+
+
+def update_campaign(id, campaign: CampaignSchema):
+    """Update the editable fields of a campaign."""
+    instance = get_campaign(id)
+    if not instance:
+        return None
+    for key, value in campaign.model_dump(
+        include={"title", "description", "goal_amount", "status"}
+    ).items():
+        setattr(instance, key, value)
+    _notify_changed(instance)
+    session.commit()
+    view_cache.invalidate(CAMPAIGNS_VIEW, instance.owner_telegram_id)
+    view_cache.invalidate(SEARCH_VIEW, None)
+    view_cache.invalidate(CAMPAIGN_VIEW, instance.id)
+    return instance
+
+
+def delete_campaign(id):
+    """Delete a campaign."""
+    campaign = get_campaign(id)
+    if not campaign:
+        return None
+    campaign.is_deleted = True
+    _notify_changed(campaign)
+    session.commit()
+    view_cache.invalidate(CAMPAIGNS_VIEW, campaign.owner_telegram_id)
+    view_cache.invalidate(SEARCH_VIEW, None)
+    view_cache.invalidate(CAMPAIGN_VIEW, campaign.id)
+    return campaign
@@ -0,0 +1,162 @@
+import asyncio
+import datetime
+import logging
+import math
+import random
+import time
+from uuid import uuid4
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.campaign import Campaign, CampaignCounterShard
+from db_connections import engine, session
+
+logger = logging.getLogger(__name__)
+
+MAX_SHARDS = 64
+# Donations per second one shard row comfortably absorbs
+TARGET_SHARD_RATE = 20.0
+
+
+def shard_increment(campaign_id, shard: int, amount: int, new_donor: bool):
+    """Statement adding one donation to a counter shard (created on demand)."""
+    statement = insert(CampaignCounterShard).values(
+        id=uuid4(),
+        campaign_id=campaign_id,
+        shard=shard,
+        raised_amount=amount,
+        donor_count=1 if new_donor else 0,
+        donation_count=1,
+        last_donation_at=func.now(),
+        is_deleted=False,
+    )
+    return statement.on_conflict_do_update(
+        constraint="uq_campaign_counter_shard",
+        set_={
+            "raised_amount": CampaignCounterShard.raised_amount + statement.excluded.raised_amount,
+            "donor_count": CampaignCounterShard.donor_count + statement.excluded.donor_count,
+            "donation_count": CampaignCounterShard.donation_count + 1,
+            "last_donation_at": statement.excluded.last_donation_at,
+        },
+    )
+
+
+def add_to_counters(campaign_id, amount: int, new_donor: bool, shards: int = None):
+    """Add a donation to a random shard of the campaign.
+
+    `shards` is the campaign's counter_shards, read here if not given.
+    Runs in the caller's transaction; the caller commits.
+    """
+    if shards is None:
+        shards = session.execute(
+            select(Campaign.counter_shards).where(Campaign.id == campaign_id)
+        ).scalar()
+    shards = shards or 1
+    session.execute(shard_increment(campaign_id, random.randrange(shards), amount, new_donor))
+
+
+def get_campaign_totals(campaign_id):
+    """Exact totals of a campaign, summed over its shards."""
+    raised, donors, donations, last = session.execute(
+        select(
+            func.coalesce(func.sum(CampaignCounterShard.raised_amount), 0),
+            func.coalesce(func.sum(CampaignCounterShard.donor_count), 0),
+            func.coalesce(func.sum(CampaignCounterShard.donation_count), 0),
+            func.max(CampaignCounterShard.last_donation_at),
+        ).where(CampaignCounterShard.campaign_id == campaign_id)
+    ).one()
+    return {
+        "raised_amount": raised,
+        "donor_count": donors,
+        "donation_count": donations,
+        "last_donation_at": last,
+    }
+
+
+def fold_counters(since=None, previous_counts=None, interval: float = None, db: Session = session):
+    """Fold shard totals into the campaign rows.
+
+    Only campaigns with a donation after `since` are touched. When the
+    donation counts of the previous fold and the `interval` since are
+    given, campaigns receiving more than TARGET_SHARD_RATE donations per
+    second per shard get more shards. `db` is the session to use.
+
+    Returns the donation count per folded campaign, for the next call.
+    """
+    totals = (
+        select(
+            CampaignCounterShard.campaign_id,
+            Campaign.counter_shards,
+            func.sum(CampaignCounterShard.raised_amount).label("raised_amount"),
+            func.sum(CampaignCounterShard.donor_count).label("donor_count"),
+            func.sum(CampaignCounterShard.donation_count).label("donation_count"),
+            func.max(CampaignCounterShard.last_donation_at).label("last_donation_at"),
+        )
+        .join(Campaign, Campaign.id == CampaignCounterShard.campaign_id)
+        .group_by(CampaignCounterShard.campaign_id, Campaign.counter_shards)
+    )
+    if since is not None:
+        changed = select(CampaignCounterShard.campaign_id).where(
+            CampaignCounterShard.last_donation_at > since
+        )
+        totals = totals.where(CampaignCounterShard.campaign_id.in_(changed))
+    rows = db.execute(totals).all()
+
+    counts = {}
+    for row in rows:
+        values = {
+            "raised_amount": row.raised_amount,
+            "donor_count": row.donor_count,
+            "last_donation_at": row.last_donation_at,
+        }
+        previous = (previous_counts or {}).get(row.campaign_id)
+        if previous is not None and interval:
+            rate = (row.donation_count - previous) / interval
+            needed = max(1, math.ceil(rate / TARGET_SHARD_RATE))
+            wanted = min(MAX_SHARDS, 1 << (needed - 1).bit_length())
+            if wanted > row.counter_shards:
+                logger.info(
+                    "Campaign %s: %.1f donations/s, %s -> %s shards",
+                    row.campaign_id, rate, row.counter_shards, wanted,
+                )
+                values["counter_shards"] = wanted
+        db.execute(update(Campaign).where(Campaign.id == row.campaign_id).values(**values))
+        counts[row.campaign_id] = row.donation_count
+    db.commit()
+    return counts
+
+
+def _fold(db: Session, since, counts, interval: float):
+    try:
+        # the database clock, the one last_donation_at comes from
+        started = db.execute(select(func.now())).scalar()
+        return started, fold_counters(since, counts, interval, db)
+    except Exception:
+        db.rollback()
+        raise
+
+
+async def fold_counters_forever(interval: float = 5.0):
+    """Always run this function in background.
+    It keeps the campaign totals at most `interval` seconds behind.
+    Folding runs in a thread on its own session, off the event loop.
+    """
+    since = None
+    counts = {}
+    last_run = time.monotonic()
+    # donations committing while we fold carry an earlier timestamp, so
+    # look back a little further than the previous run; folding is idempotent
+    overlap = datetime.timedelta(seconds=max(60, 2 * interval))
+    with Session(engine) as db:
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            try:
+                started, counts = await asyncio.to_thread(_fold, db, since, counts, now - last_run)
+            except Exception:
+                logger.exception("Folding campaign counters failed")
+                continue
+            since = started - overlap
+            last_run = now
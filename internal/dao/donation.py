@@ -0,0 +1,133 @@
+import json
+from uuid import uuid4
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.models.campaign import Campaign
+from app.models.donation import CampaignDonor, Donation, DonationSchema
+from app.models.donation_ledger import LedgerEntryKindEnum
+from db_connections import session
+from internal.dao.campaign_counter import add_to_counters
+from internal.dao.donation_ledger import append_entry
+
+# Channel notified of every donation; the payload is a JSON object with
+# ledger_id, campaign_id, amount and currency.
+DONATIONS_CHANNEL = "donations"
+
+
+def _add_donor(donation: DonationSchema):
+    """Record the donor of a campaign; True if they hadn't donated before.
+
+    A concurrent first donation by the same donor waits on the unique key
+    and then inserts nothing, so each donor is counted once.
+    """
+    if donation.donor_telegram_id is None:
+        # anonymous donations always count as a new donor
+        return True
+    result = session.execute(
+        insert(CampaignDonor)
+        .values(
+            id=uuid4(),
+            campaign_id=donation.campaign_id,
+            donor_telegram_id=donation.donor_telegram_id,
+            is_deleted=False,
+        )
+        .on_conflict_do_nothing(constraint="uq_campaign_donor")
+    )
+    return result.rowcount == 1
+
+
+def create_donation(donation: DonationSchema):
+    """Record a donation, its ledger entry and the counter update in one transaction.
+
+    The campaign row itself is updated by `fold_counters`, so hot campaigns
+    don't serialise every donation on its row lock. Raises ValueError for
+    an unknown campaign or a currency other than the campaign's.
+    """
+    campaign = session.execute(
+        select(Campaign.currency, Campaign.counter_shards).where(Campaign.id == donation.campaign_id)
+    ).first()
+    if campaign is None:
+        raise ValueError(f"Unknown campaign {donation.campaign_id}")
+    if campaign.currency != donation.currency:
+        raise ValueError(
+            f"Donation in {donation.currency} to campaign {donation.campaign_id} in {campaign.currency}"
+        )
+    new_donor = _add_donor(donation)
+    instance = Donation(
+        **donation.model_dump(exclude={"id", "created_at"}),
+        id=uuid4(),
+    )
+    session.add(instance)
+    ledger_id = append_entry(
+        LedgerEntryKindEnum.donation,
+        donation.campaign_id,
+        donation.amount,
+        donation.currency,
+        donation_id=instance.id,
+        donor_telegram_id=donation.donor_telegram_id,
+        telegram_payment_charge_id=donation.telegram_payment_charge_id,
+    )
+    add_to_counters(donation.campaign_id, donation.amount, new_donor, campaign.counter_shards)
+    # delivered on commit, listeners never see a donation that rolled back
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": DONATIONS_CHANNEL,
+            "payload": json.dumps(
+                {
+                    "ledger_id": str(ledger_id),
+                    "campaign_id": str(donation.campaign_id),
+                    "amount": donation.amount,
+                    "currency": donation.currency,
+                }
+            ),
+        },
+    )
+    session.commit()
+    return instance
+
+
+def get_donation_by_charge_id(telegram_payment_charge_id: str):
+    """Get a donation by its Telegram payment charge id."""
+    return (
+        session.query(Donation)
+        .filter(Donation.telegram_payment_charge_id == telegram_payment_charge_id)
+        .first()
+    )
+
+
+def record_donation(donation: DonationSchema):
+    """Create a donation for a payment unless it was recorded already.
+
+    Telegram can deliver the same successful_payment more than once; the
+    charge id is unique, so a duplicate, even a concurrent one, leaves no
+    trace. Returns the donation and whether it was created now.
+    """
+    existing = get_donation_by_charge_id(donation.telegram_payment_charge_id)
+    if existing:
+        return existing, False
+    try:
+        return create_donation(donation), True
+    except IntegrityError:
+        # a concurrent delivery won the race; its transaction holds everything
+        session.rollback()
+        existing = get_donation_by_charge_id(donation.telegram_payment_charge_id)
+        if existing is None:
+            raise
+        return existing, False
+
+
+def get_donations_by_campaign(campaign_id, limit: int = 20):
+    """Get the latest donations of a campaign."""
+    donations = (
+        session.query(Donation)
+        .filter(Donation.campaign_id == campaign_id)
+        .filter_by(is_deleted=False)
+        .order_by(Donation.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return donations
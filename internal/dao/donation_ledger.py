@@ -0,0 +1,135 @@
+from uuid import uuid4
+
+from sqlalchemy import func, insert, select, tuple_
+
+from app.models.campaign import Campaign
+from app.models.donation_ledger import DonationLedgerEntry, LedgerEntryKindEnum
+from db_connections import session
+
+# view_cache namespace of the pages listing an owner's withdrawals; whoever
+# appends a withdrawal invalidates the owner's scope after committing
+WITHDRAWALS_VIEW = "withdrawals"
+
+# The ledger is append-only: there are deliberately no update or delete
+# functions here, and the database rejects them anyway. A correction is a
+# new entry, e.g. a refund with a negative amount.
+
+
+def append_entry(
+    kind: LedgerEntryKindEnum,
+    campaign_id,
+    amount: int,
+    currency: str,
+    donation_id=None,
+    donor_telegram_id: str = None,
+    telegram_payment_charge_id: str = None,
+):
+    """Append an entry to the ledger and return its id.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    entry_id = uuid4()
+    session.execute(
+        insert(DonationLedgerEntry).values(
+            id=entry_id,
+            kind=kind,
+            campaign_id=campaign_id,
+            donation_id=donation_id,
+            donor_telegram_id=donor_telegram_id,
+            amount=amount,
+            currency=currency,
+            telegram_payment_charge_id=telegram_payment_charge_id,
+            is_deleted=False,
+        )
+    )
+    return entry_id
+
+
+def append_entries(entries):
+    """Append many entries in one statement; each is a dict of append_entry arguments.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    if not entries:
+        return
+    session.execute(
+        insert(DonationLedgerEntry),
+        [
+            {
+                "id": uuid4(),
+                "donation_id": None,
+                "donor_telegram_id": None,
+                "telegram_payment_charge_id": None,
+                "is_deleted": False,
+                **entry,
+            }
+            for entry in entries
+        ],
+    )
+
+
+def _ledger(column, value, since=None, until=None, limit: int = 100):
+    query = select(DonationLedgerEntry).where(column == value)
+    # bounds on created_at let Postgres skip partitions outside the range
+    if since is not None:
+        query = query.where(DonationLedgerEntry.created_at >= since)
+    if until is not None:
+        query = query.where(DonationLedgerEntry.created_at < until)
+    query = query.order_by(DonationLedgerEntry.created_at.desc()).limit(limit)
+    return session.execute(query).scalars().all()
+
+
+def get_campaign_ledger(campaign_id, since=None, until=None, limit: int = 100):
+    """Get the latest ledger entries of a campaign."""
+    return _ledger(DonationLedgerEntry.campaign_id, campaign_id, since, until, limit)
+
+
+def get_donor_ledger(donor_telegram_id: str, since=None, until=None, limit: int = 100):
+    """Get the latest ledger entries of a donor."""
+    return _ledger(DonationLedgerEntry.donor_telegram_id, donor_telegram_id, since, until, limit)
+
+
+def get_withdrawals_page(owner_telegram_id: str, after=None, limit: int = 10, before=None):
+    """Get a page of withdrawals from an owner's campaigns, newest first.
+
+    `after` is the `(created_at, id)` of the last entry of the previous
+    page; `before`, of the first entry of the next page, to go back.
+    Returns `(entry, campaign title)` rows, newest first, and whether
+    there are more past them in the direction of travel.
+    """
+    query = (
+        select(DonationLedgerEntry, Campaign.title)
+        .join(Campaign, Campaign.id == DonationLedgerEntry.campaign_id)
+        .where(Campaign.owner_telegram_id == owner_telegram_id)
+        .where(DonationLedgerEntry.kind == LedgerEntryKindEnum.withdrawal)
+    )
+    position = tuple_(DonationLedgerEntry.created_at, DonationLedgerEntry.id)
+    if before:
+        query = query.where(position > tuple_(*before)).order_by(
+            DonationLedgerEntry.created_at, DonationLedgerEntry.id
+        )
+    else:
+        if after:
+            query = query.where(position < tuple_(*after))
+        query = query.order_by(DonationLedgerEntry.created_at.desc(), DonationLedgerEntry.id.desc())
+    rows = session.execute(query.limit(limit + 1)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if before:
+        rows.reverse()
+    return rows, more
+
+
+def get_recent_donations(seconds: float):
+    """Donations of the last `seconds` as `(entry id, campaign_id, amount, age in seconds)`.
+
+    The age is computed by Postgres against its own clock, the one
+    created_at comes from. Only the partitions covering the window are read.
+    """
+    age = func.extract("epoch", func.now() - DonationLedgerEntry.created_at)
+    rows = session.execute(
+        select(DonationLedgerEntry.id, DonationLedgerEntry.campaign_id, DonationLedgerEntry.amount, age)
+        .where(DonationLedgerEntry.kind == LedgerEntryKindEnum.donation)
+        .where(DonationLedgerEntry.created_at >= func.now() - func.make_interval(0, 0, 0, 0, 0, 0, seconds))
+    ).all()
+    return [(entry_id, campaign_id, amount, float(age)) for entry_id, campaign_id, amount, age in rows]
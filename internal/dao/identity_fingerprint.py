@@ -0,0 +1,29 @@
+from uuid import uuid4
+
+from app.models.identity_fingerprint import IdentityFingerprint
+from db_connections import session
+
+
+def create_fingerprints(telegram_id: str, fingerprints):
+    """Store (kind, value) fingerprints of a user's submission."""
+    rows = [
+        IdentityFingerprint(telegram_id=telegram_id, kind=kind, value=value, id=uuid4())
+        for kind, value in fingerprints
+    ]
+    session.add_all(rows)
+    session.commit()
+    return rows
+
+
+def get_fingerprints(since=None, batch_size: int = 10000):
+    """Stream fingerprints, optionally only those created after `since`."""
+    query = session.query(
+        IdentityFingerprint.id,
+        IdentityFingerprint.telegram_id,
+        IdentityFingerprint.kind,
+        IdentityFingerprint.value,
+        IdentityFingerprint.created_at,
+    ).filter_by(is_deleted=False)
+    if since is not None:
+        query = query.filter(IdentityFingerprint.created_at > since)
+    return query.order_by(IdentityFingerprint.created_at).yield_per(batch_size)
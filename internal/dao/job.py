@@ -0,0 +1,170 @@
+import datetime
+from uuid import uuid4
+
+from sqlalchemy import and_, func, or_, text, update
+from sqlalchemy.orm import Session
+
+from app.models.job import Job, JobStatusEnum
+from db_connections import session
+
+# Channel workers LISTEN on; the payload is the job type.
+JOBS_CHANNEL = "jobs"
+
+
+def enqueue_job(type: str, payload: dict = None, delay: int = 0, max_attempts: int = 5):
+    """Create a job and wake up the workers listening for its type."""
+    job = Job(
+        type=type,
+        payload=payload or {},
+        max_attempts=max_attempts,
+        id=uuid4(),
+    )
+    if delay:
+        job.run_at = func.now() + datetime.timedelta(seconds=delay)
+    session.add(job)
+    # NOTIFY is delivered on commit, so workers never see the job early.
+    session.execute(
+        text("SELECT pg_notify(:channel, :type)"),
+        {"channel": JOBS_CHANNEL, "type": type},
+    )
+    session.commit()
+    return job
+
+
+def claim_jobs(type: str, worker: str, limit: int, lease_seconds: int = 300):
+    """Claim up to `limit` runnable jobs of `type` for `worker`.
+
+    Runnable means pending and due, or running with an expired lease (the
+    worker that had it died) and attempts left. A job whose lease expired
+    on its last attempt is dead-lettered instead, so a job that keeps
+    killing its worker doesn't come back forever. Rows locked by other
+    workers are skipped.
+    """
+    now = func.now()
+    session.execute(
+        update(Job)
+        .where(Job.type == type)
+        .where(Job.status == JobStatusEnum.running)
+        .where(Job.locked_until < now)
+        .where(Job.attempts >= Job.max_attempts)
+        .values(
+            status=JobStatusEnum.dead,
+            last_error="Lease expired on the last attempt",
+            finished_at=now,
+            locked_by=None,
+            locked_until=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    jobs = (
+        session.query(Job)
+        .filter(Job.type == type)
+        .filter(
+            or_(
+                and_(Job.status == JobStatusEnum.pending, Job.run_at <= now),
+                and_(
+                    Job.status == JobStatusEnum.running,
+                    Job.locked_until < now,
+                    Job.attempts < Job.max_attempts,
+                ),
+            )
+        )
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in jobs:
+        job.status = JobStatusEnum.running
+        job.attempts = Job.attempts + 1
+        job.locked_by = worker
+        job.locked_until = now + datetime.timedelta(seconds=lease_seconds)
+    session.commit()
+    return jobs
+
+
+def extend_lease(id, worker: str, lease_seconds: int, db: Session = session):
+    """Push back the lease of a job `worker` is running; False if it lost it."""
+    result = db.execute(
+        update(Job)
+        .where(Job.id == id)
+        .where(Job.status == JobStatusEnum.running)
+        .where(Job.locked_by == worker)
+        .values(locked_until=func.now() + datetime.timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def get_running_job_payloads(type: str):
+    """Payloads of the jobs of `type` a live worker is running."""
+    rows = (
+        session.query(Job.payload)
+        .filter(Job.type == type)
+        .filter(Job.status == JobStatusEnum.running)
+        .filter(Job.locked_until >= func.now())
+        .all()
+    )
+    return [payload for payload, in rows]
+
+
+def complete_job(job: Job):
+    """Mark a job as done, dropping its payload (it can hold personal data)."""
+    job.status = JobStatusEnum.done
+    job.payload = {}
+    job.finished_at = func.now()
+    job.locked_by = None
+    job.locked_until = None
+    session.commit()
+    return job
+
+
+def fail_job(job: Job, error: str, backoff: int = 10):
+    """Schedule a retry with exponential backoff, or dead-letter the job."""
+    job.last_error = error
+    job.locked_by = None
+    job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = JobStatusEnum.dead
+        job.finished_at = func.now()
+    else:
+        job.status = JobStatusEnum.pending
+        job.run_at = func.now() + datetime.timedelta(seconds=backoff * 2 ** (job.attempts - 1))
+    session.commit()
+    return job
+
+
+def retry_dead_job(id):
+    """Put a dead-lettered job back in the queue."""
+    job = (
+        session.query(Job)
+        .filter(Job.id == id)
+        .filter(Job.status == JobStatusEnum.dead)
+        .first()
+    )
+    if not job:
+        return None
+    job.status = JobStatusEnum.pending
+    job.attempts = 0
+    job.run_at = func.now()
+    job.finished_at = None
+    session.execute(
+        text("SELECT pg_notify(:channel, :type)"),
+        {"channel": JOBS_CHANNEL, "type": job.type},
+    )
+    session.commit()
+    return job
+
+
+def count_jobs_by_status():
+    """Count jobs per type and status."""
+    rows = (
+        session.query(Job.type, Job.status, func.count(Job.id))
+        .group_by(Job.type, Job.status)
+        .all()
+    )
+    counts = {}
+    for type, status, count in rows:
+        counts.setdefault(type, {})[JobStatusEnum(status).value] = count
+    return counts
@@ -0,0 +1,25 @@
+from uuid import uuid4
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.progress_card import ProgressCardFile
+from db_connections import session
+
+
+def get_card_file_id(card_key: str):
+    """Get the Telegram file_id of an uploaded card, or None."""
+    return (
+        session.query(ProgressCardFile.file_id)
+        .filter(ProgressCardFile.card_key == card_key)
+        .scalar()
+    )
+
+
+def save_card_file_id(card_key: str, file_id: str):
+    """Remember the file_id of an uploaded card; the first one uploaded wins."""
+    session.execute(
+        insert(ProgressCardFile)
+        .values(id=uuid4(), card_key=card_key, file_id=file_id, is_deleted=False)
+        .on_conflict_do_nothing(index_elements=["card_key"])
+    )
+    session.commit()
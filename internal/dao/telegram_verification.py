@@ -0,0 +1,303 @@
+import base64
+import datetime
+import uuid
+
+from sqlalchemy import func, or_, select, tuple_, update
+
+from app.models.telegram_verification import (
+    StatusEnum,
+    TelegramVerification,
+    TelegramVerificationSchema,
+)
+from app.models.user import User
+from db_connections import session
+
+
+def _encode_cursor(verification: TelegramVerification):
+    """Encode the keyset position of a verification as an opaque cursor."""
+    raw = f"{verification.created_at.isoformat()}|{verification.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """Decode a cursor produced by `_encode_cursor`.
+
+    Raises ValueError for anything else, a malformed or tampered cursor.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        # binascii.Error and UnicodeDecodeError are ValueErrors too
+        created_at, id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(id)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor {cursor!r}") from e
+
+
+def normalize_document_number(document_number: str):
+    """Normalize a document number the same way the generated column does.
+
+    The column keeps POSIX [:alnum:] characters, which in a UTF-8 database
+    are Unicode letters and digits, like str.isalnum.
+    """
+    return "".join(c for c in document_number or "" if c.isalnum()).upper()
+
+
+# Fields taken from a submission; everything else is owned by the reviewers.
+SUBMISSION_FIELDS = (
+    "phone_number",
+    "passport_data",
+    "personal_details",
+    "driver_license",
+    "identity_card",
+    "utility_bill",
+    "bank_statement",
+    "address",
+    "address_documents",
+    "identity_front_side",
+    "identity_reverse_side",
+    "selfie",
+    "duplicate_matches",
+)
+
+
+def save_verification(verification: TelegramVerificationSchema):
+    """Create a verification, or replace a user's previous submission.
+
+    A resubmission goes back to the pending queue.
+    """
+    values = verification.model_dump(include=set(SUBMISSION_FIELDS))
+    instance = (
+        session.query(TelegramVerification)
+        .filter(TelegramVerification.telegram_id == verification.telegram_id)
+        .first()
+    )
+    if not instance:
+        instance = TelegramVerification(
+            telegram_id=verification.telegram_id, id=uuid.uuid4(), **values
+        )
+        session.add(instance)
+    else:
+        for key, value in values.items():
+            setattr(instance, key, value)
+        instance.status = StatusEnum.pending
+        instance.is_deleted = False
+        instance.rejected_reason = None
+        instance.approved_at = None
+        instance.rejected_at = None
+        instance.claimed_by = None
+        instance.claimed_until = None
+    session.commit()
+    return instance
+
+
+def get_verification(id: uuid.UUID):
+    """Get a verification by id."""
+    verification = (
+        session.query(TelegramVerification)
+        .filter(TelegramVerification.id == id)
+        .filter_by(is_deleted=False)
+        .first()
+    )
+    return verification
+
+
+def is_verified(telegram_id: str):
+    """Whether a user has an approved verification."""
+    verification = (
+        session.query(TelegramVerification.id)
+        .filter(TelegramVerification.telegram_id == telegram_id)
+        .filter(TelegramVerification.status == StatusEnum.approved)
+        .filter_by(is_deleted=False)
+        .first()
+    )
+    return verification is not None
+
+
+def claim_pending_verifications(reviewer: str, limit: int = 10, lease_seconds: int = 300):
+    """Claim the next `limit` pending verifications for `reviewer`.
+
+    Rows locked by another reviewer's transaction are skipped instead of
+    waited on, and a claim only lasts `lease_seconds` so work abandoned by
+    a reviewer goes back to the queue on its own. The claim is a single
+    UPDATE ... RETURNING, and the claimed rows come back as schemas.
+    """
+    now = func.now()
+    candidates = (
+        select(TelegramVerification.id)
+        .where(TelegramVerification.status == StatusEnum.pending)
+        .where(TelegramVerification.is_deleted.is_(False))
+        .where(
+            or_(
+                TelegramVerification.claimed_until.is_(None),
+                TelegramVerification.claimed_until < now,
+                TelegramVerification.claimed_by == reviewer,
+            )
+        )
+        .order_by(TelegramVerification.created_at, TelegramVerification.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    table = TelegramVerification.__table__
+    rows = session.execute(
+        update(table)
+        .where(table.c.id.in_(candidates))
+        .values(
+            claimed_by=reviewer,
+            claimed_until=now + datetime.timedelta(seconds=lease_seconds),
+        )
+        .returning(*table.c)
+    ).all()
+    verifications = sorted(
+        (TelegramVerificationSchema.from_orm(row) for row in rows),
+        key=lambda verification: (verification.created_at, verification.id),
+    )
+    session.commit()
+    return verifications
+
+
+def release_verification(id: uuid.UUID, reviewer: str):
+    """Give a claimed verification back to the queue."""
+    updated = (
+        session.query(TelegramVerification)
+        .filter(TelegramVerification.id == id)
+        .filter(TelegramVerification.claimed_by == reviewer)
+        .update(
+            {"claimed_by": None, "claimed_until": None},
+            synchronize_session=False,
+        )
+    )
+    session.commit()
+    return updated > 0
+
+
+def _review_verification(id: uuid.UUID, reviewer: str, values: dict):
+    """Apply a review decision if `reviewer` still holds the claim."""
+    verification = (
+        session.query(TelegramVerification)
+        .filter(TelegramVerification.id == id)
+        .filter(TelegramVerification.status == StatusEnum.pending)
+        .filter(TelegramVerification.claimed_by == reviewer)
+        .filter(TelegramVerification.claimed_until >= func.now())
+        .with_for_update()
+        .first()
+    )
+    if not verification:
+        session.rollback()
+        return None
+
+    for key, value in values.items():
+        setattr(verification, key, value)
+    verification.reviewed_by = reviewer
+    verification.claimed_by = None
+    verification.claimed_until = None
+    return verification
+
+
+def approve_verification(id: uuid.UUID, reviewer: str):
+    """Approve a claimed verification and mark its user as verified."""
+    verification = _review_verification(
+        id, reviewer, {"status": StatusEnum.approved, "approved_at": func.now()}
+    )
+    if not verification:
+        return None
+
+    session.query(User).filter(User.telegram_id == verification.telegram_id).update(
+        {"is_verified": True}, synchronize_session=False
+    )
+    session.commit()
+    return verification
+
+
+def reject_verification(id: uuid.UUID, reviewer: str, reason: str = None):
+    """Reject a claimed verification."""
+    verification = _review_verification(
+        id,
+        reviewer,
+        {
+            "status": StatusEnum.rejected,
+            "rejected_at": func.now(),
+            "rejected_reason": reason,
+        },
+    )
+    if not verification:
+        return None
+
+    session.commit()
+    return verification
+
+
+def get_verifications(status: StatusEnum = StatusEnum.pending, cursor: str = None, limit: int = 20):
+    """Get verifications by status, oldest first, using keyset pagination.
+
+    Returns the page and the cursor of the next page (or None). Raises
+    ValueError for a malformed cursor.
+    """
+    query = (
+        session.query(TelegramVerification)
+        .filter(TelegramVerification.status == status)
+        .filter_by(is_deleted=False)
+    )
+    if cursor:
+        query = query.filter(
+            tuple_(TelegramVerification.created_at, TelegramVerification.id)
+            > tuple_(*_decode_cursor(cursor))
+        )
+    verifications = (
+        query.order_by(TelegramVerification.created_at, TelegramVerification.id)
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(verifications) > limit:
+        verifications = verifications[:limit]
+        next_cursor = _encode_cursor(verifications[-1])
+    return verifications, next_cursor
+
+
+def count_verifications_by_status():
+    """Count verifications per status."""
+    rows = (
+        session.query(TelegramVerification.status, func.count(TelegramVerification.id))
+        .filter_by(is_deleted=False)
+        .group_by(TelegramVerification.status)
+        .all()
+    )
+    counts = {status.value: 0 for status in StatusEnum}
+    for status, count in rows:
+        counts[StatusEnum(status).value] = count
+    claimed = (
+        session.query(func.count(TelegramVerification.id))
+        .filter(TelegramVerification.status == StatusEnum.pending)
+        .filter(TelegramVerification.claimed_until >= func.now())
+        .filter_by(is_deleted=False)
+        .scalar()
+    )
+    counts["claimed"] = claimed
+    return counts
+
+
+def search_verifications(
+    document_number: str = None,
+    country_code: str = None,
+    name: str = None,
+    birth_date: datetime.date = None,
+    limit: int = 20,
+):
+    """Search verifications by their generated (and indexed) search fields."""
+    query = session.query(TelegramVerification).filter_by(is_deleted=False)
+    if document_number:
+        query = query.filter(
+            TelegramVerification.document_number
+            == normalize_document_number(document_number)
+        )
+    if country_code:
+        query = query.filter(TelegramVerification.country_code == country_code.upper())
+    if birth_date:
+        query = query.filter(TelegramVerification.birth_date == birth_date)
+    if name:
+        # Served by the trigram GIN index on full_name.
+        query = query.filter(TelegramVerification.full_name.contains(name.lower(), autoescape=True))
+    verifications = (
+        query.order_by(TelegramVerification.created_at.desc()).limit(limit).all()
+    )
+    return verifications
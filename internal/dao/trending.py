@@ -0,0 +1,26 @@
+from uuid import uuid4
+
+from sqlalchemy import delete
+
+from app.models.trending import TrendingCampaign
+from db_connections import session
+
+
+def replace_trending(ranking):
+    """Replace the trending snapshot with `ranking`, `(campaign_id, score)` best first."""
+    session.execute(delete(TrendingCampaign))
+    session.add_all(
+        TrendingCampaign(id=uuid4(), campaign_id=campaign_id, rank=rank, score=score)
+        for rank, (campaign_id, score) in enumerate(ranking, start=1)
+    )
+    session.commit()
+
+
+def get_trending(limit: int = 20):
+    """Get the latest trending snapshot, best first."""
+    return (
+        session.query(TrendingCampaign)
+        .order_by(TrendingCampaign.rank)
+        .limit(limit)
+        .all()
+    )
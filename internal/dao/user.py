@@ -1,3 +1,5 @@
+from sqlalchemy import func
+
 from app.models.user import User, UserSchema
 from db_connections import session
 from uuid import uuid4
@@ -33,6 +35,40 @@ def get_users(page: int = 1, limit: int = 10):
     return users
 
 
+def get_active_users_after(after_id=None, limit: int = 100):
+    """Get active users ordered by id, starting after `after_id` (keyset)."""
+    query = session.query(User.id, User.telegram_id).filter_by(
+        is_deleted=False, is_active=True
+    )
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    users = query.order_by(User.id).limit(limit).all()
+    return users
+
+
+def count_active_users():
+    """Count active users."""
+    count = (
+        session.query(func.count(User.id))
+        .filter_by(is_deleted=False, is_active=True)
+        .scalar()
+    )
+    return count
+
+
+def deactivate_users(telegram_ids):
+    """Mark users as inactive, e.g. because they blocked the bot."""
+    if not telegram_ids:
+        return 0
+    updated = (
+        session.query(User)
+        .filter(User.telegram_id.in_(telegram_ids))
+        .update({"is_active": False}, synchronize_session=False)
+    )
+    session.commit()
+    return updated
+
+
 def update_user(telegram_id: str, user: UserSchema):
     """Update a user."""
     user = (
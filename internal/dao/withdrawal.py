@@ -0,0 +1,172 @@
+import time
+from collections import defaultdict
+from uuid import uuid4
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models.campaign import Campaign
+from app.models.donation_ledger import LedgerEntryKindEnum
+from app.models.withdrawal import (
+    PayoutRun,
+    PayoutRunStatusEnum,
+    Withdrawal,
+    WithdrawalSchema,
+    WithdrawalStatusEnum,
+)
+from db_connections import session
+from internal.dao.campaign_counter import get_campaign_totals
+from internal.dao.donation_ledger import append_entries
+
+
+def _get_by_key(owner_telegram_id: str, idempotency_key: str):
+    return (
+        session.query(Withdrawal)
+        .filter(Withdrawal.owner_telegram_id == owner_telegram_id)
+        .filter(Withdrawal.idempotency_key == idempotency_key)
+        .first()
+    )
+
+
+def get_available_balance(campaign: Campaign):
+    """What the owner can still withdraw: exact raised total minus paid out and reserved."""
+    raised = get_campaign_totals(campaign.id)["raised_amount"]
+    return raised - campaign.withdrawn_amount - campaign.reserved_amount
+
+
+def request_withdrawal(owner_telegram_id: str, campaign_id, amount: int, idempotency_key: str):
+    """Reserve `amount` of a campaign's balance for the next payout run.
+
+    The campaign row is locked with SELECT ... FOR UPDATE, so concurrent
+    requests can't both spend the same balance. A request repeating an
+    idempotency key returns the withdrawal it created the first time.
+    Returns the withdrawal and whether it was created now; the withdrawal
+    is None when the campaign isn't the owner's or the balance is too low.
+    """
+    campaign = (
+        session.query(Campaign)
+        .filter(Campaign.id == campaign_id)
+        .filter(Campaign.owner_telegram_id == owner_telegram_id)
+        .filter_by(is_deleted=False)
+        .with_for_update()
+        .first()
+    )
+    if campaign is None:
+        session.rollback()
+        return None, False
+    # checked under the lock, so a retry racing the original waits for it
+    existing = _get_by_key(owner_telegram_id, idempotency_key)
+    if existing:
+        session.rollback()
+        return existing, False
+    if amount <= 0 or amount > get_available_balance(campaign):
+        session.rollback()
+        return None, False
+
+    withdrawal = Withdrawal(
+        id=uuid4(),
+        campaign_id=campaign.id,
+        owner_telegram_id=owner_telegram_id,
+        idempotency_key=idempotency_key,
+        amount=amount,
+        currency=campaign.currency,
+    )
+    session.add(withdrawal)
+    campaign.reserved_amount += amount
+    try:
+        session.commit()
+    except IntegrityError:
+        # the same key used for another campaign of the owner
+        session.rollback()
+        return _get_by_key(owner_telegram_id, idempotency_key), False
+    return withdrawal, True
+
+
+def settle_pending_withdrawals(batch_size: int = 500):
+    """Settle the oldest pending withdrawals as one payout run.
+
+    Withdrawals locked by a run in another process are skipped. Each
+    campaign in the batch is locked once, in id order, and updated once
+    for all of its withdrawals; the ledger entries go in with one
+    statement. Returns the run and its withdrawals (as schemas, so using
+    them doesn't reload each row), or (None, []) when nothing is pending.
+    """
+    started = time.monotonic()
+    withdrawals = (
+        session.query(Withdrawal)
+        .filter(Withdrawal.status == WithdrawalStatusEnum.pending)
+        .order_by(Withdrawal.created_at, Withdrawal.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not withdrawals:
+        session.rollback()
+        return None, []
+
+    # naive, like created_at
+    now = session.execute(select(func.localtimestamp())).scalar()
+    run = PayoutRun(id=uuid4())
+    session.add(run)
+    session.flush()
+
+    amounts = defaultdict(int)
+    for withdrawal in withdrawals:
+        amounts[withdrawal.campaign_id] += withdrawal.amount
+    campaigns = (
+        session.query(Campaign)
+        .filter(Campaign.id.in_(amounts))
+        .order_by(Campaign.id)
+        .with_for_update()
+        .all()
+    )
+    for campaign in campaigns:
+        campaign.reserved_amount -= amounts[campaign.id]
+        campaign.withdrawn_amount += amounts[campaign.id]
+
+    append_entries(
+        [
+            {
+                "kind": LedgerEntryKindEnum.withdrawal,
+                "campaign_id": withdrawal.campaign_id,
+                "amount": -withdrawal.amount,
+                "currency": withdrawal.currency,
+            }
+            for withdrawal in withdrawals
+        ]
+    )
+    session.execute(
+        update(Withdrawal)
+        .where(Withdrawal.id.in_([withdrawal.id for withdrawal in withdrawals]))
+        .values(status=WithdrawalStatusEnum.settled, settled_at=now, payout_run_id=run.id)
+        .execution_options(synchronize_session=False)
+    )
+
+    latencies = [(now - withdrawal.created_at).total_seconds() for withdrawal in withdrawals]
+    run.status = PayoutRunStatusEnum.done
+    run.withdrawal_count = len(withdrawals)
+    run.campaign_count = len(amounts)
+    run.total_amount = sum(amounts.values())
+    run.latency_avg = sum(latencies) / len(latencies)
+    run.latency_max = max(latencies)
+    run.finished_at = now
+    run.duration_seconds = time.monotonic() - started
+    settled = [
+        WithdrawalSchema.from_orm(withdrawal).model_copy(
+            update={"status": WithdrawalStatusEnum.settled.value, "settled_at": now, "payout_run_id": run.id}
+        )
+        for withdrawal in withdrawals
+    ]
+    session.commit()
+    return run, settled
+
+
+def get_payout_runs(limit: int = 20):
+    """Get the latest payout runs."""
+    return (
+        session.query(PayoutRun)
+        .filter_by(is_deleted=False)
+        .order_by(PayoutRun.created_at.desc())
+        .limit(limit)
+        .all()
+    )
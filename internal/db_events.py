@@ -0,0 +1,153 @@
+"""SQLAlchemy engine event hooks.
+
+`install` times every statement and records it under the DAO function
+that ran it: the outermost `internal.dao` frame on the stack, so a query
+made by a helper counts for the public function that called it.
+
+Statements are also attributed to the webhook update being processed,
+through the `current_update` context variable that `track_update` sets.
+When the update is done its query count and time are recorded, and a
+statement that ran DB_REPEATED_QUERY_THRESHOLD times or more is logged
+as a possible N+1. Queries slower than DB_SLOW_QUERY_SECONDS are logged
+with the parameter values left out.
+"""
+import contextvars
+import logging
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+from app.settings import settings
+from internal.metrics import (
+    DB_QUERIES_PER_UPDATE,
+    DB_QUERY_DURATION,
+    DB_REPEATED_QUERIES,
+    DB_TIME_PER_UPDATE,
+)
+
+logger = logging.getLogger(__name__)
+
+DAO_PACKAGE = "internal.dao."
+MAX_LOGGED_STATEMENT = 500
+
+
+@dataclass
+class UpdateQueries:
+    update_id: int
+    update_type: str
+    count: int = 0
+    duration: float = 0.0
+    # statement -> times run, and the DAO function that first ran it
+    statements: Counter = field(default_factory=Counter)
+    functions: dict = field(default_factory=dict)
+
+
+current_update = contextvars.ContextVar("current_update", default=None)
+
+
+def dao_function():
+    """`module.function` of the DAO function running the current query."""
+    frame = sys._getframe(1)
+    found = None
+    while frame is not None:
+        name = frame.f_globals.get("__name__", "")
+        if name.startswith(DAO_PACKAGE):
+            found = frame
+        elif found is not None:
+            break
+        frame = frame.f_back
+    if found is None:
+        return "other"
+    return f"{found.f_globals['__name__'][len(DAO_PACKAGE):]}.{found.f_code.co_name}"
+
+
+def _placeholder(value):
+    return "NULL" if value is None else f"<{type(value).__name__}>"
+
+
+def redact(parameters):
+    """Statement parameters with each value replaced by its type."""
+    if isinstance(parameters, dict):
+        return {key: _placeholder(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany
+            return f"{len(parameters)} rows of {redact(parameters[0])}"
+        return [_placeholder(value) for value in parameters]
+    return _placeholder(parameters)
+
+
+def _oneline(statement: str):
+    return " ".join(statement.split())[:MAX_LOGGED_STATEMENT]
+
+
+@contextmanager
+def track_update(update_id: int, update_type: str):
+    """Attribute the queries run in the block to an update, and report them."""
+    queries = UpdateQueries(update_id, update_type)
+    token = current_update.set(queries)
+    try:
+        yield queries
+    finally:
+        current_update.reset(token)
+        _report(queries)
+
+
+def _report(queries: UpdateQueries):
+    DB_QUERIES_PER_UPDATE.observe(queries.count, queries.update_type)
+    DB_TIME_PER_UPDATE.observe(queries.duration, queries.update_type)
+    for statement, count in queries.statements.items():
+        if count < settings.DB_REPEATED_QUERY_THRESHOLD:
+            continue
+        function = queries.functions[statement]
+        DB_REPEATED_QUERIES.inc(function)
+        logger.warning(
+            "Possible N+1 in update %s (%s): %s ran %s times: %s",
+            queries.update_id,
+            queries.update_type,
+            function,
+            count,
+            _oneline(statement),
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    function = dao_function()
+    DB_QUERY_DURATION.observe(elapsed, function)
+
+    if elapsed >= settings.DB_SLOW_QUERY_SECONDS:
+        logger.warning(
+            "Slow query (%.3fs) in %s: %s parameters=%s",
+            elapsed,
+            function,
+            _oneline(statement),
+            redact(parameters),
+        )
+
+    queries = current_update.get()
+    if queries is not None:
+        queries.count += 1
+        queries.duration += elapsed
+        queries.statements[statement] += 1
+        queries.functions.setdefault(statement, function)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def install(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
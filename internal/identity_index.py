@@ -0,0 +1,183 @@
+"""In-memory index of identity fingerprints used to spot duplicate KYC
+submissions.
+
+Document numbers are matched exactly through a dict of their sha256.
+Perceptual image hashes are matched by Hamming distance through a
+multi-index hash table: the 64 bit hash is split into `max_distance + 1`
+chunks, and by the pigeonhole principle any hash within `max_distance`
+bits shares at least one chunk exactly with the query. Only the few
+hashes in those buckets are compared, so a lookup touches a handful of
+entries instead of every past submission.
+
+The index is filled from `identity_fingerprints` on startup and catches
+up on rows written by other processes before every check. created_at is
+the start of the writing transaction, so a row can commit after rows
+with a later created_at; each refresh re-reads the last REFRESH_OVERLAP
+and skips the rows it already has.
+"""
+import datetime
+import hashlib
+import io
+import logging
+import threading
+from collections import defaultdict
+
+from internal.dao.identity_fingerprint import create_fingerprints, get_fingerprints
+from internal.dao.telegram_verification import normalize_document_number
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_NUMBER = "document_number"
+HASH_BITS = 64
+DEFAULT_MAX_DISTANCE = 4
+# longer than any transaction writing fingerprints is expected to stay open
+REFRESH_OVERLAP = datetime.timedelta(minutes=10)
+
+
+def document_hash(document_number: str):
+    """Hash a document number after normalizing it."""
+    normalized = normalize_document_number(document_number)
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def image_hash(content: bytes):
+    """Compute the 64 bit difference hash (dHash) of an image, in hex.
+
+    Returns None when Pillow is not installed or the image can't be read.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            pixels = list(image.convert("L").resize((9, 8)).getdata())
+    except Exception:
+        logger.warning("Could not compute image hash", exc_info=True)
+        return None
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return f"{value:016x}"
+
+
+def image_file_hash(path):
+    """`image_hash` of a file; blocking, run it in a thread."""
+    return image_hash(path.read_bytes())
+
+
+class MultiIndexHashTable:
+    """Near-neighbour lookup of 64 bit hashes under Hamming distance."""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, bits: int = HASH_BITS):
+        self.max_distance = max_distance
+        chunks = max_distance + 1
+        size, extra = divmod(bits, chunks)
+        self._chunks = []
+        shift = 0
+        for i in range(chunks):
+            width = size + (1 if i < extra else 0)
+            self._chunks.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables = [defaultdict(list) for _ in self._chunks]
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._tables[0].values())
+
+    def add(self, value: int, key):
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            table[(value >> shift) & mask].append((value, key))
+
+    def search(self, value: int, max_distance: int = None):
+        """Return {key: distance} for every hash within `max_distance`."""
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        matches = {}
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            for candidate, key in table.get((value >> shift) & mask, ()):
+                distance = bin(candidate ^ value).count("1")
+                if distance <= max_distance and distance < matches.get(key, HASH_BITS + 1):
+                    matches[key] = distance
+        return matches
+
+
+class IdentityIndex:
+    """Exact document and near-duplicate image lookups across users."""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._documents = defaultdict(set)
+        self._images = defaultdict(lambda: MultiIndexHashTable(self.max_distance))
+        self._last_seen = None
+        # id -> created_at of the rows a refresh can read again
+        self._recent = {}
+        self._lock = threading.Lock()
+
+    def _add(self, telegram_id: str, kind: str, value: str):
+        if kind == DOCUMENT_NUMBER:
+            self._documents[value].add(telegram_id)
+        else:
+            self._images[kind].add(int(value, 16), telegram_id)
+
+    def refresh(self):
+        """Load fingerprints written since the last refresh."""
+        with self._lock:
+            since = self._last_seen - REFRESH_OVERLAP if self._last_seen else None
+            for id, telegram_id, kind, value, created_at in get_fingerprints(since):
+                if id in self._recent:
+                    continue
+                self._recent[id] = created_at
+                self._add(telegram_id, kind, value)
+                if self._last_seen is None or created_at > self._last_seen:
+                    self._last_seen = created_at
+            if self._last_seen is not None:
+                cutoff = self._last_seen - REFRESH_OVERLAP
+                self._recent = {id: at for id, at in self._recent.items() if at >= cutoff}
+
+    def find_duplicates(self, telegram_id: str, fingerprints):
+        """Find other users matching any of the (kind, value) fingerprints."""
+        self.refresh()
+        matches = []
+        for kind, value in fingerprints:
+            if kind == DOCUMENT_NUMBER:
+                for other in self._documents.get(value, ()):
+                    if other != telegram_id:
+                        matches.append({"kind": kind, "telegram_id": other, "distance": 0})
+                continue
+            table = self._images.get(kind)
+            if table is None:
+                continue
+            for other, distance in table.search(int(value, 16)).items():
+                if other != telegram_id:
+                    matches.append({"kind": kind, "telegram_id": other, "distance": distance})
+        return matches
+
+    def record(self, telegram_id: str, fingerprints):
+        """Persist fingerprints and add them to the index."""
+        fingerprints = list(fingerprints)
+        if not fingerprints:
+            return
+        create_fingerprints(telegram_id, fingerprints)
+        self.refresh()
+
+
+identity_index = IdentityIndex()
+
+
+def check_submission(telegram_id: str, fingerprints):
+    """Look up duplicates of a submission, then record its fingerprints."""
+    fingerprints = [(kind, value) for kind, value in fingerprints if value]
+    matches = identity_index.find_duplicates(telegram_id, fingerprints)
+    identity_index.record(telegram_id, fingerprints)
+    if matches:
+        logger.warning("Possible duplicate identity for %s: %s", telegram_id, matches)
+    return matches
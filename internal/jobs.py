@@ -0,0 +1,147 @@
+"""Durable background jobs on top of the `jobs` table.
+
+Handlers register a job type with `register`, anything can `enqueue_job`
+work for it, and the `JobWorker` started in the lifespan runs it. Workers
+claim rows with `SKIP LOCKED`, so any number of processes can share the
+queue, and they are woken up by NOTIFY instead of polling hard. Failed
+jobs are retried with exponential backoff and dead-lettered after
+`max_attempts`. A running job's lease is renewed every third of
+`lease_seconds`, so a long job isn't claimed a second time while it runs;
+if the worker dies the lease runs out and the job is retried.
+"""
+import asyncio
+import logging
+import os
+import socket
+import traceback
+from dataclasses import dataclass
+
+from sqlalchemy.orm import Session
+
+from db_connections import engine, session
+from internal.dao.job import JOBS_CHANNEL, claim_jobs, complete_job, extend_lease, fail_job
+from internal.pg_listener import pg_listener
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobType:
+    handler: object
+    concurrency: int
+    lease_seconds: int
+
+
+JOB_TYPES = {}
+
+
+def register(type: str, concurrency: int = 4, lease_seconds: int = 300):
+    """Register an `async def handler(bot, payload)` for a job type.
+
+    `concurrency` caps how many jobs of this type run at once in a process.
+    """
+
+    def decorator(handler):
+        JOB_TYPES[type] = JobType(handler, concurrency, lease_seconds)
+        return handler
+
+    return decorator
+
+
+class JobWorker:
+    def __init__(self, bot, poll_interval: float = 5.0):
+        self.bot = bot
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._running = {type: set() for type in JOB_TYPES}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def _on_notify(self, type: str):
+        if type in JOB_TYPES:
+            self._wakeup.set()
+
+    async def start(self):
+        try:
+            pg_listener.subscribe(JOBS_CHANNEL, self._on_notify)
+        except Exception:
+            logger.exception("Could not LISTEN for jobs, falling back to polling")
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        pg_listener.unsubscribe(JOBS_CHANNEL, self._on_notify)
+        if self._task:
+            self._task.cancel()
+        running = [task for tasks in self._running.values() for task in tasks]
+        # unfinished jobs keep their lease and are picked up again after it expires
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            for type, job_type in JOB_TYPES.items():
+                running = self._running.setdefault(type, set())
+                free = job_type.concurrency - len(running)
+                if free <= 0:
+                    continue
+                try:
+                    jobs = claim_jobs(type, self.name, free, job_type.lease_seconds)
+                except Exception:
+                    session.rollback()
+                    logger.exception("Could not claim %s jobs", type)
+                    continue
+                for job in jobs:
+                    task = asyncio.create_task(self._run(job, job_type))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _extend_lease(self, id, lease_seconds: int):
+        # own session: the shared one may be in the middle of the handler's transaction
+        with Session(engine) as db:
+            return extend_lease(id, self.name, lease_seconds, db)
+
+    async def _heartbeat(self, id, name: str, lease_seconds: int):
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                renewed = await asyncio.to_thread(self._extend_lease, id, lease_seconds)
+            except Exception:
+                logger.exception("Could not renew the lease of job %s", name)
+                continue
+            if not renewed:
+                logger.warning("Job %s lost its lease, it may run twice", name)
+                return
+
+    async def _run(self, job, job_type: JobType):
+        # read now, a rollback expires the job
+        name = f"{job.id} ({job.type})"
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, name, job_type.lease_seconds))
+        try:
+            await job_type.handler(self.bot, job.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Job %s failed", name)
+            # the handler may have left the shared session in a failed transaction
+            session.rollback()
+            self._finish(name, fail_job, job, traceback.format_exc())
+        else:
+            self._finish(name, complete_job, job)
+        finally:
+            heartbeat.cancel()
+            # a slot just freed up, look for more work
+            self._wakeup.set()
+
+    def _finish(self, name: str, finish, job, *args):
+        """Record a job's outcome; if that fails, the lease runs out and it is retried."""
+        try:
+            finish(job, *args)
+        except Exception:
+            session.rollback()
+            logger.exception("Could not record the outcome of job %s", name)
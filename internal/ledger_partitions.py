@@ -0,0 +1,158 @@
+"""Monthly partitions of the donation ledger.
+
+`donation_ledger` has one partition per calendar month, named
+`donation_ledger_yYYYYmMM`. Partitions have to exist before rows for
+their month arrive (there is no default partition, it would block
+creating new ones as soon as it held a row), so `ensure_partitions`
+creates them a few months ahead. Months past the retention period are
+detached and moved to the `ledger_archive` schema, and optionally to a
+cheaper tablespace: they stay queryable, but the live table and its
+indexes no longer carry them.
+
+    python -m internal.ledger_partitions create [--months-ahead N]
+    python -m internal.ledger_partitions detach [--keep-months N]
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import re
+
+from sqlalchemy import text
+
+from app.settings import settings
+from db_connections import engine
+
+logger = logging.getLogger(__name__)
+
+PARENT = "donation_ledger"
+ARCHIVE_SCHEMA = "ledger_archive"
+PARTITION_NAME = re.compile(rf"^{PARENT}_y(\d{{4}})m(\d{{2}})$")
+
+
+def _add_months(month: datetime.date, months: int):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date):
+    return f"{PARENT}_y{month:%Y}m{month:%m}"
+
+
+def get_partitions(connection):
+    """Months that currently have an attached partition, oldest first."""
+    names = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :parent"
+        ),
+        {"parent": PARENT},
+    ).scalars()
+    months = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(datetime.date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def ensure_partitions(months_ahead: int = None, today: datetime.date = None):
+    """Create the partitions for this month and `months_ahead` months after it.
+
+    Indexes declared on the parent are created on each new partition.
+    Returns the names of the partitions created.
+    """
+    if months_ahead is None:
+        months_ahead = settings.LEDGER_PARTITIONS_AHEAD
+    month = (today or datetime.date.today()).replace(day=1)
+    created = []
+    with engine.begin() as connection:
+        # every process runs this; one at a time, the others then find the
+        # partitions already there
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"{PARENT}_partitions"}
+        )
+        existing = set(get_partitions(connection))
+        for _ in range(months_ahead + 1):
+            following = _add_months(month, 1)
+            if month not in existing:
+                name = partition_name(month)
+                connection.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+                    )
+                )
+                created.append(name)
+            month = following
+    for name in created:
+        logger.info("Created ledger partition %s", name)
+    return created
+
+
+def detach_partitions(keep_months: int = None, today: datetime.date = None):
+    """Detach partitions older than `keep_months` months and archive them.
+
+    The detach runs CONCURRENTLY, so inserts into the ledger aren't
+    blocked while it waits for readers of the old partition.
+    Returns the names of the partitions detached.
+    """
+    if keep_months is None:
+        keep_months = settings.LEDGER_RETENTION_MONTHS
+    cutoff = _add_months((today or datetime.date.today()).replace(day=1), -keep_months)
+    with engine.connect() as connection:
+        old = [month for month in get_partitions(connection) if month < cutoff]
+    detached = []
+    # DETACH ... CONCURRENTLY can't run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        for month in old:
+            name = partition_name(month)
+            connection.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name} CONCURRENTLY"))
+            if settings.LEDGER_ARCHIVE_TABLESPACE:
+                connection.execute(
+                    text(f"ALTER TABLE {name} SET TABLESPACE {settings.LEDGER_ARCHIVE_TABLESPACE}")
+                )
+            connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            logger.info("Detached ledger partition %s to %s", name, ARCHIVE_SCHEMA)
+            detached.append(name)
+    return detached
+
+
+async def maintain_partitions_forever(interval: float = 24 * 60 * 60):
+    """Always run this function in background.
+    It keeps future partitions created; detaching old ones is left to
+    `python -m internal.ledger_partitions detach`, run deliberately.
+    Creating partitions waits on locks, so it runs in a thread, off the
+    event loop.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(ensure_partitions)
+        except Exception:
+            logger.exception("Creating ledger partitions failed")
+        await asyncio.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="create partitions ahead of time")
+    create.add_argument("--months-ahead", type=int, default=None)
+    detach = commands.add_parser("detach", help="detach and archive old partitions")
+    detach.add_argument("--keep-months", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "create":
+        created = ensure_partitions(args.months_ahead)
+        print(f"created {len(created)} partition(s)")
+    else:
+        detached = detach_partitions(args.keep_months)
+        print(f"detached {len(detached)} partition(s)")
+
+
+if __name__ == "__main__":
+    main()
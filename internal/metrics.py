@@ -0,0 +1,170 @@
+"""Counters and histograms exposed in the Prometheus text format.
+
+Recording is a dict lookup and an integer increment (plus a bisect for a
+histogram), cheap enough for every request and query. Values are per
+process; with several workers, Prometheus scrapes and sums each one.
+"""
+import bisect
+import functools
+import math
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (the last one is +Inf), sum]
+        self._values = {}
+
+    def observe(self, value: float, *labels):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', le)])} {cumulative}"
+                )
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+WEBHOOK_DURATION = registry.histogram(
+    "werise_webhook_duration_seconds",
+    "Time to process a webhook update, by update type.",
+    ("update_type",),
+)
+HANDLER_DURATION = registry.histogram(
+    "werise_handler_duration_seconds",
+    "Time spent in a bot handler.",
+    ("handler",),
+)
+HANDLER_ERRORS = registry.counter(
+    "werise_handler_errors_total",
+    "Bot handler calls that raised.",
+    ("handler",),
+)
+DB_QUERY_DURATION = registry.histogram(
+    "werise_db_query_duration_seconds",
+    "Database query time, by the DAO function that ran it.",
+    ("function",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+DB_QUERIES_PER_UPDATE = registry.histogram(
+    "werise_db_queries_per_update",
+    "Database queries run while processing one webhook update.",
+    ("update_type",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_UPDATE = registry.histogram(
+    "werise_db_time_per_update_seconds",
+    "Database time spent processing one webhook update.",
+    ("update_type",),
+)
+DB_REPEATED_QUERIES = registry.counter(
+    "werise_db_repeated_queries_total",
+    "Statements run repeatedly within one update (N+1 candidates), by DAO function.",
+    ("function",),
+)
+BOT_API_DURATION = registry.histogram(
+    "werise_bot_api_duration_seconds",
+    "Outbound Bot API request time, by method.",
+    ("method",),
+)
+BOT_API_ERRORS = registry.counter(
+    "werise_bot_api_errors_total",
+    "Outbound Bot API requests that failed, by method.",
+    ("method",),
+)
+
+
+def timed_handler(callback):
+    """Wrap an async bot handler to record its latency and errors."""
+    name = getattr(callback, "__name__", repr(callback))
+
+    @functools.wraps(callback)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await callback(*args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, name)
+
+    return wrapper
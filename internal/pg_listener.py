@@ -0,0 +1,123 @@
+"""One Postgres LISTEN connection per process, shared by every subscriber.
+
+Notifications are read from the connection's socket by the event loop, so
+waiting for them costs nothing and never blocks a request.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+
+from db_connections import engine
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5
+
+
+class PgListener:
+    def __init__(self):
+        self._connection = None
+        self._fd = None
+        self._callbacks = defaultdict(list)
+        self._loop = None
+
+    def _on_readable(self):
+        connection = self._connection
+        try:
+            connection.poll()
+        except Exception:
+            logger.exception("LISTEN connection failed, reconnecting")
+            self._drop()
+            self._schedule_reconnect()
+            return
+        while connection.notifies:
+            notify = connection.notifies.pop(0)
+            for callback in self._callbacks.get(notify.channel, ()):
+                try:
+                    callback(notify.payload)
+                except Exception:
+                    logger.exception("NOTIFY callback for %s failed", notify.channel)
+
+    def _connect(self):
+        """Open the connection and LISTEN on every subscribed channel."""
+        self._loop = asyncio.get_running_loop()
+        raw = engine.raw_connection()
+        # keep the DBAPI connection for ourselves, outside of the pool
+        raw.detach()
+        self._connection = raw.driver_connection
+        self._fd = self._connection.fileno()
+        self._loop.add_reader(self._fd, self._on_readable)
+        try:
+            self._connection.autocommit = True
+            with self._connection.cursor() as cursor:
+                for channel in self._callbacks:
+                    cursor.execute(f'LISTEN "{channel}"')
+        except Exception:
+            self._drop()
+            raise
+
+    def _drop(self):
+        """Forget the connection, whatever state it is in."""
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        self._loop.remove_reader(self._fd)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _schedule_reconnect(self):
+        self._loop.call_later(RECONNECT_DELAY, self._reconnect)
+
+    def _reconnect(self):
+        if self._connection is not None or not self._callbacks:
+            return
+        try:
+            self._connect()
+        except Exception:
+            logger.exception("LISTEN reconnect failed")
+            self._schedule_reconnect()
+
+    def subscribe(self, channel: str, callback):
+        """Call `callback(payload)` on the event loop for every NOTIFY.
+
+        If LISTEN fails the subscription is kept and the error raised; the
+        listener reconnects in the background and LISTENs again.
+        """
+        new = channel not in self._callbacks
+        self._callbacks[channel].append(callback)
+        try:
+            if self._connection is None:
+                self._connect()
+            elif new:
+                with self._connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{channel}"')
+        except Exception:
+            self._drop()
+            if self._loop is not None:
+                self._schedule_reconnect()
+            raise
+
+    def unsubscribe(self, channel: str, callback):
+        callbacks = self._callbacks.get(channel)
+        if not callbacks or callback not in callbacks:
+            return
+        callbacks.remove(callback)
+        if not callbacks:
+            del self._callbacks[channel]
+            if self._connection is not None:
+                try:
+                    with self._connection.cursor() as cursor:
+                        cursor.execute(f'UNLISTEN "{channel}"')
+                except Exception:
+                    logger.exception("UNLISTEN %s failed, reconnecting", channel)
+                    self._drop()
+                    self._schedule_reconnect()
+
+    def close(self):
+        self._callbacks.clear()
+        self._drop()
+
+
+pg_listener = PgListener()
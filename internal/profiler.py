@@ -0,0 +1,239 @@
+"""On-demand sampling profiler for webhook updates.
+
+While it is enabled, a thread looks at the event loop thread's stack
+every `interval` seconds. A sample counts only if the loop was busy
+processing an update, that is if the stack goes through a function
+marked with `root`. It is filed under the bot handler it was in (a
+function passed to `track`), or under the root when it was in no handler.
+Between samples the loop runs untouched, so the cost is one stack walk
+per interval however busy the bot is.
+
+`enable` profiles every update. `capture` profiles only the task it runs
+in: samples taken while the loop runs any other task are skipped, and so
+is work the update hands to other tasks. Stacks deeper than MAX_DEPTH
+keep their outermost and innermost frames, with the middle elided.
+
+When the profiler turns off, each handler's samples are written in the
+collapsed stack format (`frame;frame;frame count`) that flamegraph.pl
+and speedscope read, one directory per profile, keeping the newest
+`retention` profiles.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_DEPTH = 128
+TRUNCATED = "[truncated]"
+ELIDED = "[elided]"
+
+
+def _frame_name(frame):
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        directory: str,
+        interval: float = 0.01,
+        max_seconds: float = 300,
+        max_stacks: int = 5000,
+        retention: int = 10,
+    ):
+        self.directory = directory
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.max_stacks = max_stacks
+        self.retention = retention
+        self._roots = {}
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_id = None
+        self._loop = None
+        self._until = 0.0
+        # tasks of the requests being captured
+        self._tasks = set()
+        self._started_at = None
+        # handler -> Counter of collapsed stacks
+        self._samples = defaultdict(Counter)
+        self._stacks = 0
+
+    def root(self, func):
+        """Mark `func` as update processing; use as a decorator."""
+        self._roots[func.__code__] = func.__name__
+        return func
+
+    def track(self, callback):
+        """Report samples inside `callback` under its name."""
+        self._handlers[callback.__code__] = callback.__name__
+        return callback
+
+    @property
+    def active(self):
+        return bool(self._tasks) or time.monotonic() < self._until
+
+    def status(self):
+        return {
+            "active": self.active,
+            "seconds_left": max(0.0, self._until - time.monotonic()),
+            "interval": self.interval,
+            "profiles": self.profiles(),
+        }
+
+    def enable(self, seconds: float):
+        """Profile every update for the next `seconds`, capped at `max_seconds`."""
+        seconds = max(0.0, min(seconds, self.max_seconds))
+        self._until = max(self._until, time.monotonic() + seconds)
+        self._start()
+        return seconds
+
+    @contextmanager
+    def capture(self):
+        """Profile the update processed by the current task while the block runs."""
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        self._start()
+        try:
+            yield
+        finally:
+            self._tasks.discard(task)
+
+    def disable(self):
+        self._until = 0.0
+
+    def stop(self):
+        """Turn off and wait for the running profile to be written."""
+        self.disable()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _start(self):
+        # called on the event loop thread, the one to sample
+        self._thread_id = threading.get_ident()
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._thread is None:
+                self._started_at = time.time()
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self.active:
+                    samples, self._samples = self._samples, defaultdict(Counter)
+                    self._stacks = 0
+                    started_at, self._thread = self._started_at, None
+                    break
+            self._sample()
+            time.sleep(self.interval)
+        try:
+            self._dump(started_at, samples)
+        except OSError:
+            logger.exception("Writing the profile failed")
+
+    def _sample(self):
+        task = None
+        if time.monotonic() >= self._until:
+            # only captured requests are profiled
+            task = asyncio.current_task(self._loop)
+            if task not in self._tasks:
+                return
+        frame = sys._current_frames().get(self._thread_id)
+        if task is not None and asyncio.current_task(self._loop) is not task:
+            # the loop switched tasks while we looked
+            return
+        names = []
+        handler = None
+        while frame is not None:
+            code = frame.f_code
+            names.append(_frame_name(frame))
+            if code in self._handlers:
+                handler = self._handlers[code]
+            if code in self._roots:
+                break
+            frame = frame.f_back
+        else:
+            # not processing an update
+            return
+        handler = handler or self._roots[frame.f_code]
+        if len(names) > MAX_DEPTH:
+            keep = MAX_DEPTH // 2
+            names = names[:keep] + [ELIDED] + names[-keep:]
+        stack = ";".join(reversed(names))
+        counts = self._samples[handler]
+        if stack not in counts:
+            if self._stacks >= self.max_stacks:
+                stack = TRUNCATED
+            else:
+                self._stacks += 1
+        counts[stack] += 1
+
+    def _dump(self, started_at, samples):
+        if not samples:
+            return
+        # milliseconds, and a counter on top, so profiles never share a directory
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(started_at))
+        stamp = f"{stamp}.{int(started_at * 1000) % 1000:03d}"
+        for n in itertools.count():
+            name = f"{stamp}-{n}" if n else stamp
+            path = os.path.join(self.directory, name)
+            try:
+                os.makedirs(path)
+                break
+            except FileExistsError:
+                continue
+        for handler, counts in samples.items():
+            with open(os.path.join(path, f"{handler}.folded"), "w") as f:
+                for stack, count in counts.most_common():
+                    f.write(f"{stack} {count}\n")
+        total = sum(sum(counts.values()) for counts in samples.values())
+        logger.info("Wrote profile %s, %s samples", name, total)
+        for old in self.profiles()[self.retention:]:
+            old_path = os.path.join(self.directory, old)
+            for file in os.listdir(old_path):
+                os.remove(os.path.join(old_path, file))
+            os.rmdir(old_path)
+
+    def profiles(self):
+        """Names of the profiles kept, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.listdir(self.directory), reverse=True)
+
+    def read(self, profile: str, handler: str):
+        """Collapsed stacks of one handler in a profile, or None."""
+        if profile not in self.profiles():
+            return None
+        path = os.path.join(self.directory, profile)
+        if f"{handler}.folded" not in os.listdir(path):
+            return None
+        with open(os.path.join(path, f"{handler}.folded")) as f:
+            return f.read()
+
+    def handlers(self, profile: str):
+        """Handlers with samples in a profile, or None for an unknown profile."""
+        if profile not in self.profiles():
+            return None
+        return sorted(name[: -len(".folded")] for name in os.listdir(os.path.join(self.directory, profile)))
+
+
+profiler = SamplingProfiler(
+    settings.PROFILER_DIR,
+    settings.PROFILER_INTERVAL,
+    settings.PROFILER_MAX_SECONDS,
+    settings.PROFILER_MAX_STACKS,
+    settings.PROFILER_RETENTION,
+)
@@ -0,0 +1,188 @@
+"""Campaign progress cards: a PNG with the title, a progress bar and the goal.
+
+Rendering costs tens of milliseconds of CPU, so it runs in a process pool
+and its output is cached on disk. A card's key is the campaign, its
+progress rounded down to a BUCKET_PERCENT bucket, and a hash of what else
+is drawn, so a campaign has at most 100 / BUCKET_PERCENT + 1 cards per
+version. The directory is shared by every worker process, so it is the
+only index: a card any process rendered is a hit for all of them, and
+after each write the directory is scanned and kept under `max_bytes` by
+evicting the least recently used cards (by mtime, which reads bump).
+Disk I/O runs in threads, off the event loop.
+
+Pillow is optional; without it `ProgressCards.enabled` is False and
+callers send text instead.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKET_PERCENT = 2
+WIDTH, HEIGHT = 800, 418
+BACKGROUND = (245, 247, 250)
+BAR_BACKGROUND = (222, 226, 232)
+BAR_FILL = (46, 160, 67)
+TEXT = (33, 37, 41)
+
+
+def progress_bucket(raised_amount: int, goal_amount: int):
+    """Progress in percent, rounded down to the bucket and capped at 100."""
+    if goal_amount <= 0:
+        return 100
+    percent = min(100, raised_amount * 100 // goal_amount)
+    return percent - percent % BUCKET_PERCENT
+
+
+def card_key(campaign, bucket: int):
+    """Cache key of a campaign's card; changes when anything drawn changes."""
+    version = hashlib.sha1(
+        f"{campaign.title}|{campaign.goal_amount}|{campaign.currency}".encode()
+    ).hexdigest()[:8]
+    return f"{campaign.id}-{bucket}-{version}"
+
+
+def _font(size: int):
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def render_card(title: str, percent: int, goal: str):
+    """Draw a card and return it as PNG bytes; runs in a worker process."""
+    image = Image.new("RGB", (WIDTH, HEIGHT), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    margin = 48
+
+    title_font = _font(40)
+    if draw.textlength(title, font=title_font) > WIDTH - 2 * margin:
+        while title and draw.textlength(title + "…", font=title_font) > WIDTH - 2 * margin:
+            title = title[:-1]
+        title += "…"
+    draw.text((margin, 70), title, fill=TEXT, font=title_font)
+
+    top, bottom = 190, 240
+    draw.rounded_rectangle((margin, top, WIDTH - margin, bottom), radius=25, fill=BAR_BACKGROUND)
+    if percent:
+        right = margin + (WIDTH - 2 * margin) * percent // 100
+        draw.rounded_rectangle((margin, top, max(right, margin + 50), bottom), radius=25, fill=BAR_FILL)
+
+    draw.text((margin, 280), f"{percent}% funded", fill=TEXT, font=_font(34))
+    draw.text((margin, 330), f"Goal: {goal}", fill=TEXT, font=_font(28))
+
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+class ProgressCards:
+    def __init__(self, directory: str, max_bytes: int, workers: int = 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._pool = None
+        self._rendering = {}
+
+    @property
+    def enabled(self):
+        return Image is not None
+
+    def _path(self, key: str):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def start(self):
+        """Create the cache directory and start the worker processes."""
+        if not self.enabled:
+            logger.warning("Pillow is not installed, progress cards are disabled")
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def stop(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _read(self, key: str):
+        """The cached card, or None; runs in a thread."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            # mtime is the recency order eviction goes by
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return content
+
+    def _write(self, key: str, content: bytes):
+        """Cache a card and evict the oldest ones over `max_bytes`; runs in a thread."""
+        path = self._path(key)
+        # other processes may be writing the same card
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(content)
+        os.replace(temporary, path)
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".png") and entry.path != path:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        size = len(content) + sum(size for _, _, size in entries)
+        for _, old, old_size in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                # evicted by another process
+                pass
+            size -= old_size
+
+    async def get(self, campaign, goal: str):
+        """PNG bytes of the campaign's current card, rendered if not cached.
+
+        `goal` is the goal as it should be printed.
+        """
+        bucket = progress_bucket(campaign.raised_amount, campaign.goal_amount)
+        key = card_key(campaign, bucket)
+        content = await asyncio.to_thread(self._read, key)
+        if content is not None:
+            return key, content
+
+        # concurrent requests for the same card share one render
+        future = self._rendering.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._pool, render_card, campaign.title, bucket, goal)
+            self._rendering[key] = future
+            try:
+                content = await future
+                await asyncio.to_thread(self._write, key, content)
+            finally:
+                del self._rendering[key]
+            return key, content
+        return key, await future
+
+
+progress_cards = ProgressCards(
+    settings.PROGRESS_CARD_DIR,
+    settings.PROGRESS_CARD_CACHE_BYTES,
+    settings.PROGRESS_CARD_WORKERS,
+)
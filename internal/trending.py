@@ -0,0 +1,228 @@
+"""Trending campaigns, ranked in memory from donation events.
+
+Every process keeps its own `TrendingRanking`, fed by the NOTIFY that
+`create_donation` sends on commit, so reading the ranking never touches
+the database. It is rebuilt from the donation ledger on startup and
+snapshotted to `trending_campaigns` periodically for anything that reads
+it from SQL.
+
+Donations are counted in buckets of `bucket_seconds` over a sliding
+`window`. A bucket's weight halves every `half_life`, so recent
+donations dominate. Scores use forward decay: a donation adds its value
+times 2^(t/half_life) relative to a landmark time, so scores only change
+on events and relative order holds without touching the other
+campaigns. The landmark moves forward now and then so the factors stay
+small.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import math
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from app.settings import settings
+from db_connections import session
+from app.models.campaign import CampaignSchema
+from internal.dao.campaign import CAMPAIGN_VIEW, get_campaign
+from internal.dao.donation import DONATIONS_CHANNEL
+from internal.dao.donation_ledger import get_recent_donations
+from internal.dao.trending import replace_trending
+from internal.pg_listener import pg_listener
+from internal.view_cache import view_cache
+
+logger = logging.getLogger(__name__)
+
+# move the landmark once weights reach 2^RENORMALIZE_AFTER
+RENORMALIZE_AFTER = 64
+
+
+def donation_value(amount: int):
+    """Every donation counts, larger ones a little more (amounts in cents)."""
+    return 1.0 + math.log10(1.0 + max(amount, 0) / 100)
+
+
+class TrendingRanking:
+    def __init__(
+        self,
+        window: float = 24 * 3600,
+        bucket_seconds: float = 300,
+        half_life: float = 6 * 3600,
+        k: int = 20,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.half_life = half_life
+        self.k = k
+        self.buckets_per_window = max(1, int(window // bucket_seconds))
+        # bucket index -> {campaign_id: value}, oldest first
+        self._buckets = OrderedDict()
+        # ledger ids counted so far, and the ids counted in each bucket
+        self._entries = set()
+        self._bucket_entries = {}
+        # campaign_id -> forward-decayed score, and how many buckets it's in
+        self._scores = {}
+        self._live = Counter()
+        self._landmark = time.time()
+        # the top k campaign ids, best first
+        self._top = []
+
+    def __len__(self):
+        return len(self._scores)
+
+    def _weight(self, index: int):
+        return 2.0 ** ((index * self.bucket_seconds - self._landmark) / self.half_life)
+
+    def record(self, campaign_id, value: float, at: float = None, entry_id=None):
+        """Add a donation event; `at` is a unix timestamp (default now).
+
+        An event with the `entry_id` of a ledger entry already counted is
+        ignored, so a donation both replayed and notified counts once.
+        """
+        now = time.time()
+        if at is None:
+            at = now
+        self._advance(now)
+        index = int(at // self.bucket_seconds)
+        if index <= int(now // self.bucket_seconds) - self.buckets_per_window:
+            return
+        if entry_id is not None:
+            if entry_id in self._entries:
+                return
+            self._entries.add(entry_id)
+            self._bucket_entries.setdefault(index, []).append(entry_id)
+        bucket = self._buckets.get(index)
+        if bucket is None:
+            bucket = self._buckets[index] = {}
+            # events replayed out of order, e.g. while rebuilding
+            if next(reversed(self._buckets)) != index:
+                self._buckets = OrderedDict(sorted(self._buckets.items()))
+        if campaign_id not in bucket:
+            bucket[campaign_id] = 0.0
+            self._live[campaign_id] += 1
+        bucket[campaign_id] += value
+        self._scores[campaign_id] = self._scores.get(campaign_id, 0.0) + value * self._weight(index)
+        self._promote(campaign_id)
+
+    def _promote(self, campaign_id):
+        score = self._scores[campaign_id]
+        if campaign_id in self._top:
+            self._top.sort(key=self._scores.__getitem__, reverse=True)
+        elif len(self._top) < self.k or score > self._scores[self._top[-1]]:
+            self._top.append(campaign_id)
+            self._top.sort(key=self._scores.__getitem__, reverse=True)
+            del self._top[self.k:]
+
+    def _advance(self, now: float):
+        """Expire buckets that left the window and move the landmark."""
+        oldest = int(now // self.bucket_seconds) - self.buckets_per_window
+        expired = False
+        while self._buckets:
+            index = next(iter(self._buckets))
+            if index > oldest:
+                break
+            weight = self._weight(index)
+            self._entries.difference_update(self._bucket_entries.pop(index, ()))
+            for campaign_id, value in self._buckets.pop(index).items():
+                self._live[campaign_id] -= 1
+                if self._live[campaign_id] <= 0:
+                    del self._live[campaign_id]
+                    del self._scores[campaign_id]
+                else:
+                    self._scores[campaign_id] -= value * weight
+            expired = True
+
+        if (now - self._landmark) / self.half_life > RENORMALIZE_AFTER:
+            factor = 2.0 ** (-(now - self._landmark) / self.half_life)
+            self._scores = {key: score * factor for key, score in self._scores.items()}
+            self._landmark = now
+
+        if expired:
+            # a score went down, so someone outside the top may belong in it
+            self._top = heapq.nlargest(self.k, self._scores, key=self._scores.__getitem__)
+
+    def top(self, n: int = None):
+        """`(campaign_id, score)` best first; scores are decayed to now."""
+        now = time.time()
+        self._advance(now)
+        decay = 2.0 ** ((self._landmark - now) / self.half_life)
+        return [
+            (campaign_id, self._scores[campaign_id] * decay)
+            for campaign_id in self._top[:n]
+        ]
+
+    def clear(self):
+        self._buckets.clear()
+        self._entries.clear()
+        self._bucket_entries.clear()
+        self._scores.clear()
+        self._live.clear()
+        self._top = []
+        self._landmark = time.time()
+
+    def rebuild(self):
+        """Replay the donations of the window from the ledger."""
+        self.clear()
+        now = time.time()
+        window = self.buckets_per_window * self.bucket_seconds
+        for entry_id, campaign_id, amount, age in get_recent_donations(window):
+            self.record(campaign_id, donation_value(amount), now - age, entry_id)
+        logger.info("Trending ranking rebuilt with %s campaigns", len(self))
+
+    def on_notify(self, payload: str):
+        """pg_listener callback for DONATIONS_CHANNEL."""
+        event = json.loads(payload)
+        entry_id = uuid.UUID(event["ledger_id"]) if "ledger_id" in event else None
+        self.record(uuid.UUID(event["campaign_id"]), donation_value(event["amount"]), entry_id=entry_id)
+
+    def start(self):
+        """Follow new donations; call `rebuild` after, so none is missed in between."""
+        try:
+            pg_listener.subscribe(DONATIONS_CHANNEL, self.on_notify)
+        except Exception:
+            # pg_listener keeps the subscription and LISTENs once it reconnects
+            logger.exception("Could not LISTEN for donations, trending misses them until reconnected")
+
+    def stop(self):
+        pg_listener.unsubscribe(DONATIONS_CHANNEL, self.on_notify)
+
+
+trending = TrendingRanking(
+    settings.TRENDING_WINDOW,
+    settings.TRENDING_BUCKET_SECONDS,
+    settings.TRENDING_HALF_LIFE,
+)
+
+
+def trending_campaigns(n: int = 10):
+    """The top `n` campaigns as `(CampaignSchema, score)`.
+
+    Campaign details come from view_cache, so a warm call doesn't touch
+    the database; deleted campaigns are skipped.
+    """
+    results = []
+    for campaign_id, score in trending.top():
+        campaign = view_cache.get(CAMPAIGN_VIEW, campaign_id, None)
+        if campaign is None:
+            instance = get_campaign(campaign_id)
+            campaign = CampaignSchema.from_orm(instance) if instance else False
+            view_cache.put(CAMPAIGN_VIEW, campaign_id, None, campaign)
+        if campaign:
+            results.append((campaign, score))
+            if len(results) == n:
+                break
+    return results
+
+
+async def snapshot_trending_forever(interval: float = 60.0):
+    """Always run this function in background.
+    It writes the current ranking to trending_campaigns every `interval` seconds.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            replace_trending(trending.top())
+        except Exception:
+            session.rollback()
+            logger.exception("Snapshotting trending campaigns failed")
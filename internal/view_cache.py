@@ -0,0 +1,61 @@
+"""Rendered bot views, cached in memory per user.
+
+Entries live in a namespace per kind of data and a scope (usually the
+owner's telegram id). Writers invalidate the scope they changed, e.g.
+`create_campaign` drops every cached page of the owner's campaigns; the
+TTL bounds staleness for changes nobody invalidates, such as totals
+folded from the counter shards.
+"""
+import time
+from collections import OrderedDict
+
+from app.settings import settings
+
+
+class ViewCache:
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # (namespace, scope, key) -> (value, expires_at), least recently used first
+        self._entries = OrderedDict()
+        # (namespace, scope) -> keys cached in it, so invalidate() can drop them;
+        # a scope with no entries left is removed, so this never outgrows _entries
+        self._scopes = {}
+
+    def _forget(self, full_key):
+        namespace, scope, key = full_key
+        keys = self._scopes.get((namespace, scope))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._scopes[(namespace, scope)]
+
+    def get(self, namespace: str, scope, key):
+        full_key = (namespace, scope, key)
+        entry = self._entries.get(full_key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[full_key]
+            self._forget(full_key)
+            return None
+        self._entries.move_to_end(full_key)
+        return value
+
+    def put(self, namespace: str, scope, key, value):
+        full_key = (namespace, scope, key)
+        self._entries[full_key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(full_key)
+        self._scopes.setdefault((namespace, scope), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            old, _ = self._entries.popitem(last=False)
+            self._forget(old)
+
+    def invalidate(self, namespace: str, scope):
+        """Drop every cached entry of a scope."""
+        for key in self._scopes.pop((namespace, scope), ()):
+            del self._entries[(namespace, scope, key)]
+
+
+view_cache = ViewCache(settings.VIEW_CACHE_TTL)
@@ -2,14 +2,20 @@ from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
+from app.assets import DIST_DIR, ImmutableStaticFiles
 from app.lifespan import lifespan
-from app.routes.bots import router
+from app.rate_limit import RateLimitMiddleware
+from app.routes import api, bots, metrics
 
 # Initialize FastAPI app (similar to Flask)
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(RateLimitMiddleware)
 
-# setup static files
+# setup static files, fingerprinted ones first so /static doesn't shadow them
+app.mount("/static/dist", ImmutableStaticFiles(directory=DIST_DIR, check_dir=False), name="static-dist")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Register routes
-app.include_router(router, prefix="/telegram")
+app.include_router(bots.router, prefix=bots.PREFIX)
+app.include_router(api.router, prefix=api.PREFIX)
+app.include_router(metrics.router, prefix=metrics.PREFIX)